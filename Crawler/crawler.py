@@ -17,6 +17,7 @@ import sys
 from dataclasses import dataclass, asdict
 import uuid
 import re
+import struct
 
 # Configure logging
 logging.basicConfig(
@@ -51,7 +52,8 @@ class DistributedCrawler:
         user_agent: str = "DistributedCrawler/1.0",
         allowed_domains: List[str] = None,
         s3_bucket: str = None,
-        max_page_limit: int = None  # Add this parameter
+        max_page_limit: int = None,  # Add this parameter
+        links_dir: str = "storage/links"
     ):
         self.redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
         self.worker_id = worker_id or f"worker-{uuid.uuid4()}"
@@ -63,6 +65,9 @@ class DistributedCrawler:
         self.allowed_domains = set(allowed_domains) if allowed_domains else None
         self.s3_bucket = s3_bucket
         self.max_page_limit = max_page_limit  # Store the max page limit
+        # Link graph of the stored pages, one append-only file per worker (search_engine.pagerank reads it)
+        self.links_dir = links_dir
+        self.links_file = None
         
         # Redis keys
         self.queue_key = "crawler:queue"
@@ -278,11 +283,15 @@ class DistributedCrawler:
             return
             
         # Store the result
-        await self.store_result(result)
+        stored_hash = await self.store_result(result)
         
-        # Extract and queue new links if we haven't reached max depth
-        if job.depth < self.max_depth:
+        # Extract links of stored pages (for the link graph) and of pages whose links get queued
+        if stored_hash or job.depth < self.max_depth:
             links = await self.parse_links(job, result["html"])
+            if stored_hash:
+                self.record_links(stored_hash, links)
+        # Queue new links if we haven't reached max depth
+        if job.depth < self.max_depth:
             for link in links:
                 new_job = CrawlJob(
                     url=link,
@@ -406,6 +415,7 @@ class DistributedCrawler:
                 f.write(extracted_content)
                 
             logger.info(f"Saved text content for '{title}' locally: {filename}")
+            return url_hash
         
         except Exception as e:
             logger.error(f"Error storing result for {result['url']}: {str(e)}")
@@ -413,6 +423,24 @@ class DistributedCrawler:
             url_hash = hashlib.md5(result["url"].encode()).hexdigest()
             with open(f"storage/{url_hash}.html", "w", encoding="utf-8") as f:
                 f.write(result["html"])
+            return None
+
+    def record_links(self, url_hash: str, links: List[str]):
+        """
+        Append a stored page's out-links to <links_dir>/<worker_id>.edges:
+        16-byte md5 of the page url, uint32 count, then the 16-byte md5 of each distinct link.
+        The digests are the storage file names, so edges map straight onto indexed documents.
+        """
+        try:
+            if self.links_file is None:
+                os.makedirs(self.links_dir, exist_ok=True)
+                self.links_file = open(os.path.join(self.links_dir, f"{self.worker_id}.edges"), "ab")
+            source = bytes.fromhex(url_hash)
+            targets = {hashlib.md5(link.encode()).digest() for link in links} - {source}
+            self.links_file.write(source + struct.pack("<I", len(targets)) + b"".join(sorted(targets)))
+            self.links_file.flush()
+        except Exception as e:
+            logger.error(f"Failed to record links of {url_hash}: {str(e)}")
     
     async def queue_job(self, job: CrawlJob):
         """Add a job to the distributed queue"""
@@ -536,6 +564,8 @@ class DistributedCrawler:
         self.stats["end_time"] = time.time()
         self.stats["runtime"] = self.stats["end_time"] - self.stats["start_time"]
         self.redis_client.hset(self.stats_key, self.worker_id, json.dumps(self.stats))
+        if self.links_file is not None:
+            self.links_file.close()
         
         sys.exit(0)
 
@@ -671,6 +701,7 @@ async def main():
     parser.add_argument('--mode', choices=['worker', 'manager', 'reset', 'status'], 
                         default='worker', help='Operation mode')
     parser.add_argument('--max-page-limit', type=int, help='Maximum number of pages to crawl globally')
+    parser.add_argument('--links-dir', default='storage/links', help='Directory for the link graph (<worker id>.edges)')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--log-file', default='crawler.log', help='Log file path')
     parser.add_argument('--log-level', default='INFO', help='Log level (DEBUG, INFO, WARNING, ERROR)')
@@ -691,7 +722,8 @@ async def main():
             user_agent=args.user_agent,
             allowed_domains=args.allowed_domains,
             s3_bucket=args.s3_bucket,
-            max_page_limit=args.max_page_limit
+            max_page_limit=args.max_page_limit,
+            links_dir=args.links_dir
         )
         
         if args.seed_urls:
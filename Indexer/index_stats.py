@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os, json, math, argparse
+
+# Collection statistics written next to the index (<output>_stats.json, or stats.json in a segment):
+#
+#   {"N": ..., "total_length": ..., "avgdl": ..., "unique_terms": ..., "postings": ...,
+#    "df_histogram": {"1": terms with df 1, "2": df 2-3, "4": df 4-7, ...},
+#    "stemming": whether terms were Porter-stemmed (--use-stemming)}
+#
+# The stemming setting travels with the index (metaData in Mongo, meta.json of search_engine.build)
+# so queries are tokenized the same way (search_engine/tokenizer.py).
+#
+# mongodb_scripts/metaDataInsert.py loads this file directly instead of re-deriving N/avgdl
+# with aggregations over every posting.
+
+
+def df_bucket(df):
+    """Power-of-two lower bound of df, used as the histogram key."""
+    return 1 << int(math.log2(df)) if df > 0 else 0
+
+def df_histogram(dfs):
+    histogram = {}
+    for df in dfs:
+        bucket = df_bucket(df)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    return histogram
+
+def build_stats(N, total_length, unique_terms=None, postings=None, histogram=None, stemming=None):
+    stats = {
+        "N": int(N),
+        "total_length": int(total_length),
+        "avgdl": total_length / N if N else 0.0,
+    }
+    if unique_terms is not None:
+        stats["unique_terms"] = int(unique_terms)
+    if postings is not None:
+        stats["postings"] = int(postings)
+    if histogram is not None:
+        stats["df_histogram"] = {str(k): int(v) for k, v in sorted(histogram.items())}
+    if stemming is not None:
+        stats["stemming"] = bool(stemming)
+    return stats
+
+def merged_stemming(stats_list):
+    """The parts' common stemming setting (None if none records it); parts built differently can't be merged."""
+    settings = {s["stemming"] for s in stats_list if "stemming" in s}
+    if len(settings) > 1:
+        raise ValueError("Parts were indexed with and without stemming; re-index them with the same --use-stemming")
+    return settings.pop() if settings else None
+
+def merge_stats(stats_list):
+    """
+    Combine stats of document-disjoint parts (segments, shards). N, total_length and avgdl are exact;
+    term-level fields are dropped because the same term can occur in several parts
+    (segments.py stats recomputes them exactly from the live postings).
+    """
+    N = sum(s["N"] for s in stats_list)
+    total_length = sum(s["total_length"] for s in stats_list)
+    return build_stats(N, total_length, stemming=merged_stemming(stats_list))
+
+def write_stats(path, stats):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp, path)
+
+def read_stats(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge index statistics of document-disjoint parts')
+    parser.add_argument('inputs', nargs='+', help='stats.json files')
+    parser.add_argument('--output', required=True, help='Merged stats.json path')
+    args = parser.parse_args()
+
+    stats = merge_stats([read_stats(p) for p in args.inputs])
+    write_stats(args.output, stats)
+    print(f"✅ Merged {len(args.inputs)} stats files: N={stats['N']}, avgdl={stats['avgdl']:.2f}")
+
+if __name__ == "__main__":
+    main()
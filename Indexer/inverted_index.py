@@ -1,79 +1,52 @@
 #!/usr/bin/env python3
 
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import input_file_name, explode, col, lit, regexp_replace, udf
-from pyspark.sql.types import ArrayType, StringType
-import os, re, argparse
+from pyspark.sql.functions import input_file_name, explode, col, lit, regexp_replace, udf, \
+    collect_list, sort_array, count, base64, log, floor, row_number, when, pmod, crc32, \
+    broadcast, spark_partition_id, log2, hash as spark_hash, max as spark_max, min as spark_min, sum as spark_sum, avg as spark_avg
+from pyspark.sql.window import Window
+from pyspark import StorageLevel
+from pyspark.sql.types import ArrayType, StringType, StructType, StructField, IntegerType, BinaryType
+import os, sys, math, argparse, shutil, tempfile
+import segments
+import index_stats
 
-# --- Import NLP tools ---
-import nltk
-nltk.download('punkt', quiet=True)
-from nltk.stem import PorterStemmer
-import spacy
-nlp = spacy.load("en_core_web_sm")
+# --- TOKENIZATION ---
+# search_engine/tokenizer.py is the one tokenizer the query side uses too; main() ships the
+# package to the executors, which run the UDFs below.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from search_engine.tokenizer import clean_text, extract_meaningful_tokens, extract_file_positional_tokens, \
+    load_model
+from search_engine.topk import DOC_IDS_FILE, CHECKSUM_MOD
 
+def ship_tokenizer(spark):
+    """Zip the search_engine package and add it to the executors' Python path."""
+    archive = shutil.make_archive(os.path.join(tempfile.mkdtemp(), "search_engine"), "zip",
+                                  REPO_ROOT, "search_engine")
+    spark.sparkContext.addPyFile(archive)
 
-# --- TEXT CLEANING & TOKENIZATION ---
 
-def clean_text(text):
-    """Lowercase and remove non-alphanumeric characters except spaces."""
-    if text is None:
-        return ""
-    return re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
+# --- POSITION ENCODING ---
 
-def extract_meaningful_tokens(text, use_stemming=True):
-    """
-    Extract meaningful tokens from text with dual indexing:
-    - Preserve named entities (PERSON, ORG, GPE) as complete phrases
-    - ALSO index individual words from those entities
-    - Apply Porter stemming to remaining non-entity tokens
-    - Filter out junk long numbers (e.g., '00000') but keep short ones (e.g., '2021')
-    """
-    if not text:
-        return []
-    
-    doc = nlp(text)
-    stemmer = PorterStemmer()
-    tokens = []
-    entity_words = set()  # Track words that are part of entities
-
-    # 1. Extract named entities and their components
-    for ent in doc.ents:
-        if ent.label_ in {"PERSON", "ORG", "GPE"}:
-            full_entity = ent.text.strip().lower()
-            
-            # Add the complete entity
-            tokens.append(full_entity)
-            
-            # Add individual words from the entity
-            words_in_entity = full_entity.split()
-            for word in words_in_entity:
-                clean_word = re.sub(r'[^a-zA-Z0-9]', '', word)
-                if len(clean_word) > 1:  # Skip single characters
-                    tokens.append(clean_word)
-                    entity_words.add(clean_word)  # Track to avoid double-processing
-
-    # 2. Extract remaining tokens (skip ones already processed as entity components)
-    for token in doc:
-        word = token.text.strip().lower()
-        clean_word = re.sub(r'[^a-zA-Z0-9]', '', word)
-        
-        if (not clean_word or clean_word in entity_words or 
-            token.is_punct or token.is_space or token.is_stop):
-            continue
-            
-        if clean_word.isdigit() and len(clean_word) > 4:
-            continue  # remove junky numeric tokens
-            
-        # Apply stemming to non-entity words
-        processed_word = stemmer.stem(clean_word) if use_stemming else clean_word
-        tokens.append(processed_word)
-
-    return tokens
+def encode_positions(positions):
+    """Delta-encode sorted token positions as LEB128 varints (decoded by search_engine.codec)."""
+    out = bytearray()
+    prev = 0
+    for pos in positions:
+        delta = pos - prev
+        prev = pos
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
 
 
 # --- SPARK UDF BUILDER ---
 
+POSITIONAL_TOKEN = StructType([StructField("term", StringType()), StructField("pos", IntegerType())])
+
 def build_udfs(use_stemming):
     @udf(ArrayType(StringType()))
     def preprocess_udf(text):
@@ -81,6 +54,203 @@ def build_udfs(use_stemming):
         return extract_meaningful_tokens(cleaned, use_stemming)
     return preprocess_udf
 
+def build_positional_udfs(use_stemming):
+    @udf(ArrayType(POSITIONAL_TOKEN))
+    def preprocess_positions_udf(text):
+        return extract_file_positional_tokens(text, use_stemming)
+
+    @udf(BinaryType())
+    def encode_positions_udf(positions):
+        return encode_positions(positions)
+
+    return preprocess_positions_udf, encode_positions_udf
+
+
+# --- SKEW HANDLING ---
+
+def input_size_bytes(spark, path):
+    """Total input size through the Hadoop FS API, so it works for local, HDFS and S3 paths."""
+    hadoop_path = spark._jvm.org.apache.hadoop.fs.Path(path)
+    fs = hadoop_path.getFileSystem(spark._jsc.hadoopConfiguration())
+    return fs.getContentSummary(hadoop_path).getLength()
+
+def configure_partitions(spark, input_path, target_partition_mb):
+    """Size shuffles from the input instead of the fixed default of 200, and let AQE split skewed joins."""
+    size = input_size_bytes(spark, input_path)
+    partitions = max(spark.sparkContext.defaultParallelism * 2,
+                     math.ceil(size / (target_partition_mb * 1024 * 1024)))
+    spark.conf.set("spark.sql.shuffle.partitions", str(partitions))
+    spark.conf.set("spark.sql.adaptive.enabled", "true")
+    spark.conf.set("spark.sql.adaptive.coalescePartitions.enabled", "true")
+    spark.conf.set("spark.sql.adaptive.skewJoin.enabled", "true")
+    return size, partitions
+
+def detect_hot_terms(words_df, sample_fraction, hot_share, max_hot_terms):
+    """
+    Terms holding at least hot_share of all token occurrences in a sample.
+    Returns {term: estimated occurrences}; a term above 1/partitions of the rows
+    would otherwise be a straggler task on its own.
+    """
+    sample = words_df.sample(False, sample_fraction, seed=42)
+    sampled = sample.count()
+    if not sampled:
+        return {}
+    rows = sample.groupBy("term").count() \
+                 .filter(col("count") >= sampled * hot_share) \
+                 .orderBy(col("count").desc()).limit(max_hot_terms).collect()
+    return {row["term"]: int(row["count"] / sample_fraction) for row in rows}
+
+def salted_document_frequency(words_df, hot_terms, salt_buckets):
+    """df per term; hot terms are first counted over salt_buckets sub-keys so no single task sees all their docs."""
+    pairs = words_df.distinct()
+    if not hot_terms:
+        return pairs.groupBy("term").count().withColumnRenamed("count", "df")
+    salt = when(col("term").isin(list(hot_terms)), pmod(spark_hash(col("filename")), lit(salt_buckets))).otherwise(lit(0))
+    return pairs.withColumn("salt", salt) \
+                .groupBy("term", "salt").count() \
+                .groupBy("term").agg(spark_sum("count").alias("df"))
+
+def join_on_term(postings_df, df_df, hot_terms):
+    """Join df onto postings; hot terms use a broadcast join so their postings stay spread across tasks."""
+    if not hot_terms:
+        return postings_df.join(df_df, "term")
+    is_hot = col("term").isin(list(hot_terms))
+    cold = postings_df.filter(~is_hot).join(df_df.filter(~is_hot), "term")
+    hot = postings_df.filter(is_hot).join(broadcast(df_df.filter(is_hot)), "term")
+    return cold.unionByName(hot)
+
+def find_pruned_terms(df_df, total_docs, stop_terms_path, max_df_ratio):
+    """Index-time stop terms: an explicit list plus every term whose df exceeds max_df_ratio * N."""
+    pruned = {}
+    if stop_terms_path:
+        with open(stop_terms_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    pruned[line.strip().lower()] = None
+    if max_df_ratio:
+        for row in df_df.filter(col("df") > lit(max_df_ratio * total_docs)).collect():
+            pruned[row["term"]] = row["df"]
+    return pruned
+
+def partition_balance(df):
+    """(max, average) rows per partition of df."""
+    sizes = df.groupBy(spark_partition_id().alias("partition")).count() \
+              .agg(spark_max("count").alias("max"), spark_avg("count").alias("avg")).collect()[0]
+    return sizes["max"] or 0, sizes["avg"] or 0.0
+
+
+# --- COLLECTION STATISTICS ---
+
+def collect_stats(doc_len_df, df_df, postings_df, stemming):
+    """N, total_length, avgdl and the df histogram, computed on the cluster (see index_stats.py)."""
+    totals = doc_len_df.agg(count(lit(1)).alias("N"), spark_sum("doc_len").alias("total_length")).collect()[0]
+    histogram = df_df.withColumn("bucket", floor(log2(col("df")))).groupBy("bucket").count().collect()
+    return index_stats.build_stats(
+        totals["N"], totals["total_length"] or 0,
+        unique_terms=df_df.count(), postings=postings_df.count(),
+        histogram={1 << int(row["bucket"]): row["count"] for row in histogram}, stemming=stemming)
+
+def write_stats(output, doc_len_df, df_df, postings_df, stemming):
+    """Write <output>_stats.json and the per-doc length table <output>_doc_lengths/."""
+    stats = collect_stats(doc_len_df, df_df, postings_df, stemming)
+    index_stats.write_stats(f"{output}_stats.json", stats)
+    doc_len_df.orderBy("filename").write.mode("overwrite").option("header", "true").csv(f"{output}_doc_lengths")
+    print(f"📊 Stats written to {output}_stats.json (N={stats['N']}, avgdl={stats['avgdl']:.2f})")
+    return stats
+
+
+# --- SEGMENT OUTPUT ---
+
+def write_segment(root, tf_df, doc_len_df, df_df, stemming):
+    """
+    Write this batch as a new segment: postings sorted by (term, filename) so segments
+    can be k-way merged, plus the batch's doc table. df/tfidf are left out because they
+    depend on global stats, which segments.py maintains in the manifest.
+    """
+    name = segments.allocate_segment(root)
+    seg_path = os.path.join(root, name)
+
+    columns = ["term", "filename", "tf", "doc_len"]
+    postings_df = tf_df.join(doc_len_df, "filename")
+    if "positions" in tf_df.columns:
+        postings_df = postings_df.withColumn("positions", base64(col("positions")))
+        columns.append("positions")
+    postings_df = postings_df.select(*columns)
+    postings_df.orderBy("term", "filename").write.option("header", "true").csv(f"{seg_path}/postings")
+    doc_len_df.orderBy("filename").coalesce(1).write.option("header", "true").csv(f"{seg_path}/docs")
+
+    stats = collect_stats(doc_len_df, df_df, postings_df, stemming)
+    index_stats.write_stats(os.path.join(seg_path, "stats.json"), stats)
+    docs = stats["N"]
+    replaced = segments.commit_segment(root, name, docs, stats["total_length"],
+                                       postings=stats["postings"], terms=stats["unique_terms"])
+
+    manifest = segments.load_manifest(root)
+    print(f"✅ Segment {name} committed under {root}")
+    print(f"📄 Documents in batch: {docs} ({replaced} replaced older copies)")
+    print(f"🌍 Global N: {manifest['N']}, avgdl: {manifest['avgdl']:.2f}")
+
+
+# --- SCORE UPPER BOUNDS ---
+
+# Same BM25 parameters as getDocuments (backend/services/mongoService.js)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def assign_doc_ids(doc_len_df):
+    """
+    (filename, doc_id): the 0-based filename rank, the ids search_engine.InvertedIndex and
+    search_engine.build (without --priors) assign. zipWithIndex numbers the range-partitioned
+    sort in place, so no single partition has to hold every filename.
+    """
+    names = doc_len_df.select("filename").rdd.map(lambda row: row["filename"])
+    return names.sortBy(lambda name: name).zipWithIndex().toDF(["filename", "doc_id"])
+
+def doc_ids_checksum(doc_ids):
+    """search_engine.topk.doc_ids_checksum of the assignment, computed on the cluster."""
+    total = doc_ids.agg(spark_sum(pmod(crc32(col("filename")) * (col("doc_id") + 1), lit(CHECKSUM_MOD)))).collect()[0][0]
+    return int(total or 0) % CHECKSUM_MOD
+
+def write_score_bounds(output, tf_df, doc_len_df, df_df, block_size, impact_ordered):
+    """
+    Emit per-term and per-block maxima of each posting's BM25 and TF-IDF contribution,
+    so query-time WAND / Block-Max WAND / MaxScore can skip postings that cannot reach the top-k.
+    Blocks are block_size consecutive postings in doc id order (assign_doc_ids). The id scheme
+    goes to <output>_blocks/_doc_ids.json, so a loader can refuse an index numbered differently.
+    """
+    totals = doc_len_df.agg(count(lit(1)).alias("N"), spark_sum("doc_len").alias("total_length")).collect()[0]
+    N, avgdl = totals["N"], totals["total_length"] / totals["N"]
+
+    doc_ids = assign_doc_ids(doc_len_df).persist(StorageLevel.MEMORY_AND_DISK)
+    contributions = tf_df.select("term", "filename", "tf").join(doc_ids, "filename") \
+        .join(doc_len_df, "filename").join(df_df, "term") \
+        .withColumn("bm25", log((lit(N) - col("df") + 0.5) / (col("df") + 0.5) + 1)
+                    * (col("tf") * (BM25_K1 + 1))
+                    / (col("tf") + BM25_K1 * (1 - BM25_B + BM25_B * (col("doc_len") / lit(avgdl))))) \
+        .withColumn("tfidf", col("tf") * log(lit(N) / col("df")))
+
+    contributions.groupBy("term") \
+        .agg(count(lit(1)).alias("df"), spark_max("bm25").alias("max_bm25"), spark_max("tfidf").alias("max_tfidf")) \
+        .write.mode("overwrite").option("header", "true").csv(f"{output}_bounds")
+
+    block_no = floor((row_number().over(Window.partitionBy("term").orderBy("doc_id")) - 1) / block_size)
+    contributions.withColumn("block", block_no) \
+        .groupBy("term", "block") \
+        .agg(spark_min("doc_id").alias("first_doc"), spark_max("doc_id").alias("last_doc"),
+             count(lit(1)).alias("postings"),
+             spark_max("bm25").alias("max_bm25"), spark_max("tfidf").alias("max_tfidf")) \
+        .orderBy("term", "block") \
+        .write.mode("overwrite").option("header", "true").csv(f"{output}_blocks")
+    index_stats.write_stats(os.path.join(f"{output}_blocks", DOC_IDS_FILE),
+                            {"doc_order": "filename", "N": N, "checksum": doc_ids_checksum(doc_ids)})
+
+    if impact_ordered:
+        contributions.select("term", "filename", "doc_id", "tf", "bm25", "tfidf") \
+            .orderBy(col("term"), col("bm25").desc(), col("doc_id")) \
+            .write.mode("overwrite").option("header", "true").csv(f"{output}_impacts")
+
+    print(f"📈 Score bounds written to {output}_bounds and {output}_blocks (block size {block_size})")
+
 
 # --- MAIN SPARK PIPELINE ---
 
@@ -91,47 +261,116 @@ def main():
     parser.add_argument('--use-stemming', action='store_true', help='Apply Porter stemming to non-proper nouns')
     parser.add_argument('--format', default='parquet', choices=['parquet', 'csv', 'json', 'text'], help='Output format')
     parser.add_argument('--show-stats', action='store_true', help='Show detailed indexing statistics')
+    parser.add_argument('--segment-root', help='Index only this batch into a new immutable segment under this directory')
+    parser.add_argument('--positions', action='store_true',
+                        help='Also store delta-encoded token positions per posting (enables phrase/proximity queries)')
+    parser.add_argument('--score-bounds', action='store_true',
+                        help='Also write per-term and per-block max BM25/TF-IDF contributions for top-k pruning')
+    parser.add_argument('--block-size', type=int, default=128, help='Postings per block for --score-bounds')
+    parser.add_argument('--impact-ordered', action='store_true',
+                        help='With --score-bounds, also write postings ordered by descending BM25 impact per term')
+    parser.add_argument('--target-partition-mb', type=int, default=32,
+                        help='Input MB per shuffle partition (sets spark.sql.shuffle.partitions from the input size)')
+    parser.add_argument('--hot-term-share', type=float, default=None,
+                        help='Token share above which a term is treated as hot (default: 1 / shuffle partitions)')
+    parser.add_argument('--salt-buckets', type=int, default=32, help='Sub-keys used to spread each hot term')
+    parser.add_argument('--stop-terms', help='File with one term per line to drop from the index')
+    parser.add_argument('--max-df-ratio', type=float, default=None,
+                        help='Drop terms appearing in more than this fraction of documents '
+                             '(of the batch, with --segment-root)')
+    parser.add_argument('--keep-parts', action='store_true',
+                        help='Write csv/json as one part per partition instead of coalescing to a single task '
+                             '(merge them with merge_index_files.py)')
     args = parser.parse_args()
 
+    load_model(required=True)  # fail before starting Spark when spaCy is missing
     spark = SparkSession.builder.appName("InvertedIndexDualNER").getOrCreate()
-    preprocess = build_udfs(args.use_stemming)
+    ship_tokenizer(spark)
+    input_bytes, shuffle_partitions = configure_partitions(spark, args.input_path, args.target_partition_mb)
 
     # Step 1: Read files and extract filename
-    df = spark.read.text(args.input_path).withColumn("filename", input_file_name())
+    # (positions must be document-wide, so positional mode reads each file as one row and
+    #  tokenizes it line by line, giving the same tokens as the default mode)
+    if args.positions:
+        preprocess, encode_positions_udf = build_positional_udfs(args.use_stemming)
+        df = spark.read.text(args.input_path, wholetext=True).withColumn("filename", input_file_name())
+    else:
+        preprocess = build_udfs(args.use_stemming)
+        df = spark.read.text(args.input_path).withColumn("filename", input_file_name())
     df = df.withColumn("tokens", preprocess(col("value")))
     df = df.withColumn("filename", regexp_replace(col("filename"), "^.*/", ""))
 
     # Step 2: Explode and clean tokens
-    words_df = df.select("filename", explode(col("tokens")).alias("term")) \
-                 .filter((col("term").isNotNull()) & (col("term") != ""))
+    if args.positions:
+        positions_df = df.select("filename", explode(col("tokens")).alias("token")) \
+                         .select("filename", col("token.term").alias("term"), col("token.pos").alias("pos")) \
+                         .filter((col("term").isNotNull()) & (col("term") != ""))
+        positions_df = positions_df.persist(StorageLevel.MEMORY_AND_DISK)
+        words_df = positions_df.select("filename", "term")
+    else:
+        words_df = df.select("filename", explode(col("tokens")).alias("term")) \
+                     .filter((col("term").isNotNull()) & (col("term") != ""))
+        # Tokenizing (spaCy) is the expensive part; every aggregation below reuses this result
+        words_df = words_df.persist(StorageLevel.MEMORY_AND_DISK)
+
+    hot_share = args.hot_term_share or 1.0 / shuffle_partitions
+    hot_terms = detect_hot_terms(words_df, 0.01, hot_share, max_hot_terms=1000)
 
     # Step 3: TF, DF, Doc Length
-    tf_df = words_df.groupBy("term", "filename").count().withColumnRenamed("count", "tf")
+    if args.positions:
+        tf_df = positions_df.groupBy("term", "filename") \
+                            .agg(count(lit(1)).alias("tf"),
+                                 encode_positions_udf(sort_array(collect_list("pos"))).alias("positions"))
+    else:
+        tf_df = words_df.groupBy("term", "filename").count().withColumnRenamed("count", "tf")
     doc_len_df = words_df.groupBy("filename").count().withColumnRenamed("count", "doc_len")
-    df_df = words_df.distinct().groupBy("term").count().withColumnRenamed("count", "df")
+    df_df = salted_document_frequency(words_df, hot_terms, args.salt_buckets)
     total_docs = df.select("filename").distinct().count()
 
+    # Index-time stop terms; doc_len still counts them so BM25 length normalization is unchanged
+    pruned_terms = find_pruned_terms(df_df, total_docs, args.stop_terms, args.max_df_ratio)
+    if pruned_terms:
+        kept = ~col("term").isin(list(pruned_terms))
+        pruned_postings = tf_df.filter(~kept).count() if args.show_stats else None
+        tf_df, df_df = tf_df.filter(kept), df_df.filter(kept)
+
+    if args.segment_root:
+        write_segment(args.segment_root, tf_df, doc_len_df, df_df, args.use_stemming)
+        spark.stop()
+        return
+
     # Step 4: Join and compute TF-IDF
-    indexed_df = tf_df.join(doc_len_df, "filename").join(df_df, "term") \
+    indexed_df = join_on_term(tf_df.join(doc_len_df, "filename"), df_df, hot_terms) \
                       .withColumn("tfidf", col("tf") * (lit(total_docs) / col("df"))) \
-                      .select("term", "filename", "tf", "df", "doc_len", "tfidf")
+                      .select("term", "filename", "tf", "df", "doc_len", "tfidf",
+                              *(["positions"] if args.positions else []))
+
+    # Binary positions stay binary in parquet; text formats carry them base64-encoded
+    if args.positions and args.format != "parquet":
+        indexed_df = indexed_df.withColumn("positions", base64(col("positions")))
 
     # Step 5: Write output
     if args.format == "parquet":
         indexed_df.write.mode("overwrite").parquet(args.output)
     elif args.format == "csv":
-        indexed_df.coalesce(1).write.mode("overwrite").option("header", "true").csv(args.output)
+        (indexed_df if args.keep_parts else indexed_df.coalesce(1)) \
+            .write.mode("overwrite").option("header", "true").csv(args.output)
     elif args.format == "json":
-        indexed_df.coalesce(1).write.mode("overwrite").json(args.output)
+        (indexed_df if args.keep_parts else indexed_df.coalesce(1)).write.mode("overwrite").json(args.output)
     elif args.format == "text":
         indexed_df.coalesce(1).write.mode("overwrite").option("header", "true") \
                   .csv(f"{args.output}_tmp", sep="\t")
-        import glob, shutil
+        import glob
         os.makedirs(args.output, exist_ok=True)
         part_file = glob.glob(f"{args.output}_tmp/part-*")[0]
         os.rename(part_file, f"{args.output}/inverted_index.txt")
         shutil.rmtree(f"{args.output}_tmp")
 
+    write_stats(args.output, doc_len_df, df_df, tf_df, args.use_stemming)
+
+    if args.score_bounds:
+        write_score_bounds(args.output, tf_df, doc_len_df, df_df, args.block_size, args.impact_ordered)
+
     # Step 6: Show statistics
     unique_terms = df_df.count()
     print(f"✅ Index created at {args.output}")
@@ -142,6 +381,15 @@ def main():
         print("\n📊 Detailed Statistics:")
         print(f"   • Total term-document pairs: {tf_df.count()}")
         print(f"   • Average terms per document: {words_df.count() / total_docs:.1f}")
+        print(f"   • Input size: {input_bytes / 1048576:.1f} MB -> {shuffle_partitions} shuffle partitions")
+        if hot_terms:
+            top_hot = sorted(hot_terms.items(), key=lambda kv: -kv[1])[:5]
+            print(f"   • Hot terms (salted/broadcast): {len(hot_terms)}, e.g. {top_hot}")
+        if pruned_terms:
+            top_pruned = sorted(pruned_terms.items(), key=lambda kv: -(kv[1] or 0))[:10]
+            print(f"   • Pruned stop terms: {len(pruned_terms)} ({pruned_postings} postings dropped), e.g. {top_pruned}")
+        max_rows, avg_rows = partition_balance(indexed_df)
+        print(f"   • Rows per partition: max {max_rows}, avg {avg_rows:.0f} (skew {max_rows / max(avg_rows, 1):.1f}x)")
         
         # Show sample of multi-word entities vs single words
         sample_terms = indexed_df.select("term").distinct().limit(20).collect()
@@ -1,17 +1,181 @@
-import glob
-import pandas as pd
+#!/usr/bin/env python3
 
-# Path to your partial index files (adjust as needed)
-index_files = glob.glob("IndexData/index_output/*.csv")
-print(f"Found {len(index_files)} index files.")
-# Load and combine all
-all_parts = [pd.read_csv(f) for f in index_files]
-merged_df = pd.concat(all_parts, ignore_index=True)
+import os, csv, json, glob, time, heapq, shutil, argparse, tempfile
+from itertools import islice
 
-# Optional: sort by term for cleanliness
-#merged_df.sort_values(by=["term", "filename"], inplace=True)
+# Merges the Spark part files into one index without ever holding the whole index in memory:
+#   1. (unless --assume-sorted) external sort: read bounded runs, sort each run, spill to disk
+#   2. k-way heap merge of the sorted runs by (term, filename), at most --fan-in files at a time
+#   3. stream the merged rows out as one CSV, or as term-grouped postings (one JSON doc per line)
 
-# Save to a single file
-merged_df.to_csv("IndexData/inverted_index.csv", index=False)
 
-print(f"Merged {len(index_files)} files into 'inverted_index.csv' with {len(merged_df)} rows.")
+# --- PROGRESS REPORTING ---
+
+class Progress:
+    def __init__(self, label, every):
+        self.label = label
+        self.every = every
+        self.rows = 0
+        self.start = time.time()
+
+    def tick(self):
+        self.rows += 1
+        if self.every and self.rows % self.every == 0:
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.time() - self.start, 1e-9)
+        mark = "✅" if final else "⏳"
+        print(f"{mark} {self.label}: {self.rows:,} rows in {elapsed:.1f}s ({self.rows / elapsed:,.0f} rows/s)")
+
+
+# --- READING & SORTING ---
+
+def row_key(row):
+    return (row[0], row[1])
+
+def iter_csv(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if row:
+                yield row
+
+def read_header(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), None)
+
+def write_run(rows, tmp_dir, header):
+    fd, path = tempfile.mkstemp(suffix=".csv", prefix="run-", dir=tmp_dir)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+def make_sorted_runs(files, header, run_size, tmp_dir, progress):
+    """Split the unsorted input into sorted runs of at most run_size rows each."""
+    runs = []
+    for path in files:
+        rows = iter_csv(path)
+        while True:
+            chunk = list(islice(rows, run_size))
+            if not chunk:
+                break
+            chunk.sort(key=row_key)
+            runs.append(write_run(chunk, tmp_dir, header))
+            progress.rows += len(chunk)
+            progress.report()
+    return runs
+
+def merge_streams(paths):
+    return heapq.merge(*(iter_csv(p) for p in paths), key=row_key)
+
+def reduce_runs(runs, header, fan_in, tmp_dir, keep):
+    """Merge runs in passes until at most fan_in remain, so open files stay bounded."""
+    while len(runs) > fan_in:
+        merged = []
+        for i in range(0, len(runs), fan_in):
+            group = runs[i:i + fan_in]
+            merged.append(write_run(merge_streams(group), tmp_dir, header))
+            for path in group:
+                if path not in keep:
+                    os.remove(path)
+        print(f"🔁 Intermediate merge pass: {len(runs)} runs -> {len(merged)}")
+        runs = merged
+    return runs
+
+
+# --- WRITERS ---
+
+def write_csv(rows, output, header, progress):
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            progress.tick()
+
+def posting_entry(row, columns):
+    """Same per-posting shape insertIndex.py stores in docIdList."""
+    entry = {"docId": row[columns["filename"]].split(".txt")[0]}
+    for name, cast in (("tf", float), ("df", int), ("doc_len", int), ("tfidf", float)):
+        if name in columns:
+            entry[name] = cast(row[columns[name]])
+    return entry
+
+def write_postings(rows, output, header, progress):
+    """One JSON document per term: {"word", "docIdList", "document_count"}, written incrementally."""
+    columns = {name: i for i, name in enumerate(header)}
+    terms = 0
+    with open(output, "w", encoding="utf-8") as f:
+        term, count = None, 0
+        for row in rows:
+            if row[0] != term:
+                if term is not None:
+                    f.write(f'], "document_count": {count}}}\n')
+                term, count = row[0], 0
+                terms += 1
+                f.write(f'{{"word": {json.dumps(term)}, "docIdList": [')
+            f.write((", " if count else "") + json.dumps(posting_entry(row, columns)))
+            count += 1
+            progress.tick()
+        if term is not None:
+            f.write(f'], "document_count": {count}}}\n')
+    return terms
+
+
+# --- MAIN ---
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming, out-of-core merge of inverted index part files')
+    parser.add_argument('inputs', nargs='*', default=["IndexData/index_output/*.csv"],
+                        help='Part files or glob patterns (default: IndexData/index_output/*.csv)')
+    parser.add_argument('--output', default="IndexData/inverted_index.csv", help='Merged output path')
+    parser.add_argument('--format', default='csv', choices=['csv', 'postings'],
+                        help='csv: merged rows; postings: one JSON line per term in the insertIndex.py layout')
+    parser.add_argument('--assume-sorted', action='store_true',
+                        help='Inputs are already sorted by (term, filename), e.g. written with orderBy; skip run generation')
+    parser.add_argument('--run-size', type=int, default=500_000, help='Rows per in-memory sorted run')
+    parser.add_argument('--fan-in', type=int, default=64, help='Maximum files merged at once')
+    parser.add_argument('--tmp-dir', default=None, help='Directory for sorted runs (default: system temp)')
+    parser.add_argument('--progress-every', type=int, default=1_000_000, help='Report throughput every N rows')
+    args = parser.parse_args()
+
+    index_files = sorted({f for pattern in args.inputs for f in glob.glob(pattern)})
+    print(f"Found {len(index_files)} index files.")
+    if not index_files:
+        return
+
+    header = read_header(index_files[0])
+    for path in index_files[1:]:
+        if read_header(path) != header:
+            raise ValueError(f"{path} has a different header than {index_files[0]}")
+
+    tmp_dir = tempfile.mkdtemp(prefix="merge-index-", dir=args.tmp_dir)
+    try:
+        if args.assume_sorted:
+            runs = index_files
+        else:
+            runs = make_sorted_runs(index_files, header, args.run_size, tmp_dir, Progress("Sorted runs", 0))
+            print(f"📝 Wrote {len(runs)} sorted runs to {tmp_dir}")
+        runs = reduce_runs(runs, header, args.fan_in, tmp_dir, keep=set(index_files))
+
+        progress = Progress("Merged", args.progress_every)
+        merged = merge_streams(runs)
+        if args.format == "csv":
+            write_csv(merged, args.output, header, progress)
+            progress.report(final=True)
+            print(f"Merged {len(index_files)} files into '{args.output}' with {progress.rows} rows.")
+        else:
+            terms = write_postings(merged, args.output, header, progress)
+            progress.report(final=True)
+            print(f"Merged {len(index_files)} files into '{args.output}': {terms} terms, {progress.rows} postings.")
+        size_mb = os.path.getsize(args.output) / 1048576
+        print(f"📦 Output size: {size_mb:.1f} MB ({size_mb / max(time.time() - progress.start, 1e-9):.1f} MB/s)")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+
+import os, csv, json, glob, time, math, heapq, shutil, argparse, fcntl
+from contextlib import contextmanager
+
+import index_stats
+
+# A segmented index lives under one root directory:
+#
+#   <root>/manifest.json        live segments + incremental global stats (N, total_length, avgdl)
+#   <root>/<segment>/postings/  immutable CSV parts sorted by (term, filename): term,filename,tf,doc_len[,...]
+#   <root>/<segment>/docs/      immutable CSV of filename,doc_len for every doc in the segment
+#   <root>/<segment>.del        tombstones: one deleted/updated filename per line
+#
+# Segments are never modified after they are written; deletes and updates only
+# append tombstones, and merges write a brand new segment before swapping the manifest.
+
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+
+
+# --- MANIFEST & LOCKING ---
+
+@contextmanager
+def locked(root):
+    """Serialize manifest read-modify-write cycles between the indexer and the compactor."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def empty_manifest():
+    return {"generation": 0, "next_segment": 0, "segments": [], "N": 0, "total_length": 0, "avgdl": 0.0}
+
+def load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.isfile(path):
+        return empty_manifest()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def save_manifest(root, manifest):
+    """Recompute the global stats from the live segments and atomically replace the manifest."""
+    manifest["N"] = sum(s["docs"] - s["deleted"] for s in manifest["segments"])
+    manifest["total_length"] = sum(s["total_length"] - s["deleted_length"] for s in manifest["segments"])
+    manifest["avgdl"] = manifest["total_length"] / manifest["N"] if manifest["N"] else 0.0
+    manifest["generation"] += 1
+    write_atomic(os.path.join(root, MANIFEST), json.dumps(manifest, indent=2))
+
+def allocate_segment(root):
+    """Reserve a new segment name; the caller writes <root>/<name>/ before committing it."""
+    with locked(root):
+        manifest = load_manifest(root)
+        name = f"seg_{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        write_atomic(os.path.join(root, MANIFEST), json.dumps(manifest, indent=2))
+    return name
+
+
+# --- SEGMENT FILES ---
+
+def postings_files(root, name):
+    """Part files of a segment in name order; Spark's range-partitioned sort keeps them globally ordered."""
+    return sorted(glob.glob(os.path.join(root, name, "postings", "*.csv")))
+
+def read_doc_table(root, name):
+    doc_lens = {}
+    for path in sorted(glob.glob(os.path.join(root, name, "docs", "*.csv"))):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                doc_lens[row["filename"]] = int(row["doc_len"])
+    return doc_lens
+
+def read_tombstones(root, name):
+    path = os.path.join(root, f"{name}.del")
+    if not os.path.isfile(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+def write_tombstones(root, name, filenames):
+    write_atomic(os.path.join(root, f"{name}.del"), "".join(f"{fn}\n" for fn in sorted(filenames)))
+
+def read_header(root, name):
+    for path in postings_files(root, name):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            header = next(csv.reader(f), None)
+            if header:
+                return header
+    return None
+
+def segment_stemming(root, names):
+    """Stemming setting the segments were indexed with (from their stats.json; None if unrecorded)."""
+    paths = [os.path.join(root, n, "stats.json") for n in names]
+    return index_stats.merged_stemming([index_stats.read_stats(p) for p in paths if os.path.exists(p)])
+
+def iter_segment_rows(root, name, deleted=frozenset()):
+    """Stream (term, filename)-sorted rows of one segment, skipping tombstoned documents."""
+    for path in postings_files(root, name):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if row and row[1] not in deleted:
+                    yield row
+
+def iter_live_rows(root, manifest=None):
+    """k-way merge of every live segment into one (term, filename)-sorted stream."""
+    manifest = manifest or load_manifest(root)
+    streams = [iter_segment_rows(root, s["name"], read_tombstones(root, s["name"])) for s in manifest["segments"]]
+    return heapq.merge(*streams, key=lambda row: (row[0], row[1]))
+
+
+# --- SEGMENT LIFECYCLE ---
+
+def _apply_deletes(root, manifest, filenames, skip=()):
+    """Tombstone filenames in every live segment that still holds them; returns how many were deleted."""
+    deleted = 0
+    for seg in manifest["segments"]:
+        if seg["name"] in skip:
+            continue
+        doc_lens = read_doc_table(root, seg["name"])
+        tombstones = read_tombstones(root, seg["name"])
+        hits = {fn for fn in filenames if fn in doc_lens and fn not in tombstones}
+        if not hits:
+            continue
+        tombstones |= hits
+        write_tombstones(root, seg["name"], tombstones)
+        seg["deleted"] += len(hits)
+        seg["deleted_length"] += sum(doc_lens[fn] for fn in hits)
+        deleted += len(hits)
+    return deleted
+
+def commit_segment(root, name, docs, total_length, postings=0, terms=0, level=0):
+    """Publish a fully written segment. Older copies of its documents become tombstones (updates)."""
+    stats = {
+        "name": name, "docs": docs, "total_length": total_length,
+        "postings": postings, "terms": terms, "level": level,
+        "deleted": 0, "deleted_length": 0, "created": time.time(),
+    }
+    write_atomic(os.path.join(root, name, "segment.json"), json.dumps(stats, indent=2))
+    filenames = set(read_doc_table(root, name))
+    with locked(root):
+        manifest = load_manifest(root)
+        replaced = _apply_deletes(root, manifest, filenames)
+        manifest["segments"].append(stats)
+        save_manifest(root, manifest)
+    return replaced
+
+def delete_documents(root, filenames):
+    with locked(root):
+        manifest = load_manifest(root)
+        deleted = _apply_deletes(root, manifest, set(filenames))
+        save_manifest(root, manifest)
+    return deleted
+
+
+# --- TIERED MERGE POLICY ---
+
+class TieredMergePolicy:
+    """
+    Group segments into size tiers (powers of segments_per_tier times floor_docs)
+    and merge the smallest segments of any tier holding at least segments_per_tier of them.
+    Segments whose tombstone ratio exceeds max_deleted_ratio are rewritten on their own.
+    """
+
+    def __init__(self, segments_per_tier=4, floor_docs=1000, max_merged_docs=5_000_000, max_deleted_ratio=0.3):
+        self.segments_per_tier = segments_per_tier
+        self.floor_docs = floor_docs
+        self.max_merged_docs = max_merged_docs
+        self.max_deleted_ratio = max_deleted_ratio
+
+    def tier(self, seg):
+        live = max(seg["docs"] - seg["deleted"], 1)
+        return max(0, int(math.log(live / self.floor_docs, self.segments_per_tier))) if live > self.floor_docs else 0
+
+    def find_merges(self, segments):
+        merges, used = [], set()
+        tiers = {}
+        for seg in segments:
+            tiers.setdefault(self.tier(seg), []).append(seg)
+        for level in sorted(tiers):
+            candidates = sorted(tiers[level], key=lambda s: s["docs"] - s["deleted"])
+            while len(candidates) >= self.segments_per_tier:
+                group, candidates = candidates[:self.segments_per_tier], candidates[self.segments_per_tier:]
+                if sum(s["docs"] - s["deleted"] for s in group) > self.max_merged_docs:
+                    break
+                merges.append([s["name"] for s in group])
+                used.update(s["name"] for s in group)
+        for seg in segments:
+            if seg["name"] not in used and seg["docs"] and seg["deleted"] / seg["docs"] > self.max_deleted_ratio:
+                merges.append([seg["name"]])
+        return merges
+
+
+def merge_segments(root, names):
+    """Rewrite the given segments as one new segment without their tombstoned documents."""
+    manifest = load_manifest(root)
+    by_name = {s["name"]: s for s in manifest["segments"]}
+    if any(n not in by_name for n in names):
+        raise ValueError(f"Not all segments are live: {names}")
+
+    headers = {tuple(read_header(root, n) or ()) for n in names}
+    headers.discard(())
+    if len(headers) > 1:
+        raise ValueError(f"Segments {names} have different postings columns: {headers}")
+    header = list(headers.pop()) if headers else ["term", "filename", "tf", "doc_len"]
+    stemming = segment_stemming(root, names)
+
+    snapshot = {n: read_tombstones(root, n) for n in names}
+    target = allocate_segment(root)
+    os.makedirs(os.path.join(root, target, "postings"))
+    os.makedirs(os.path.join(root, target, "docs"))
+
+    postings, dfs, last_term = 0, [], None
+    streams = [iter_segment_rows(root, n, snapshot[n]) for n in names]
+    with open(os.path.join(root, target, "postings", "part-00000.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in heapq.merge(*streams, key=lambda row: (row[0], row[1])):
+            writer.writerow(row)
+            postings += 1
+            if row[0] != last_term:
+                dfs.append(0)
+                last_term = row[0]
+            dfs[-1] += 1
+    terms = len(dfs)
+
+    doc_lens = {}
+    for n in names:
+        live = read_doc_table(root, n)
+        for fn in snapshot[n]:
+            live.pop(fn, None)
+        doc_lens.update(live)
+    with open(os.path.join(root, target, "docs", "part-00000.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "doc_len"])
+        writer.writerows(sorted(doc_lens.items()))
+
+    stats = {
+        "name": target, "docs": len(doc_lens), "total_length": sum(doc_lens.values()),
+        "postings": postings, "terms": terms,
+        "level": max(by_name[n]["level"] for n in names) + 1,
+        "deleted": 0, "deleted_length": 0, "created": time.time(),
+    }
+    write_atomic(os.path.join(root, target, "segment.json"), json.dumps(stats, indent=2))
+    index_stats.write_stats(os.path.join(root, target, "stats.json"), index_stats.build_stats(
+        stats["docs"], stats["total_length"], unique_terms=terms, postings=postings,
+        histogram=index_stats.df_histogram(dfs), stemming=stemming))
+
+    with locked(root):
+        manifest = load_manifest(root)
+        # Deletes that raced with the merge still apply to the merged copy of those docs
+        late = set()
+        for n in names:
+            late |= read_tombstones(root, n) - snapshot[n]
+        late &= set(doc_lens)
+        if late:
+            write_tombstones(root, target, late)
+            stats["deleted"] = len(late)
+            stats["deleted_length"] = sum(doc_lens[fn] for fn in late)
+        manifest["segments"] = [s for s in manifest["segments"] if s["name"] not in names] + [stats]
+        save_manifest(root, manifest)
+
+    for n in names:
+        shutil.rmtree(os.path.join(root, n), ignore_errors=True)
+        if os.path.exists(os.path.join(root, f"{n}.del")):
+            os.remove(os.path.join(root, f"{n}.del"))
+    return stats
+
+def compact(root, policy):
+    merged = []
+    for names in policy.find_merges(load_manifest(root)["segments"]):
+        stats = merge_segments(root, names)
+        print(f"🔀 Merged {len(names)} segment(s) {names} -> {stats['name']} ({stats['docs']} docs)")
+        merged.append(stats)
+    return merged
+
+
+# --- EXPORT ---
+
+def export_csv(root, output_path):
+    """
+    Write the live index in the single-file layout produced by inverted_index.py
+    (term, filename, tf, df, doc_len, tfidf), with df and tfidf computed from global stats.
+    Rows are streamed one term at a time, so memory is bounded by the longest postings list.
+    """
+    manifest = load_manifest(root)
+    N = manifest["N"]
+    rows_written = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["term", "filename", "tf", "df", "doc_len", "tfidf"])
+        term, group = None, []
+
+        def flush():
+            df = len(group)
+            for row in group:
+                tf = int(row[2])
+                writer.writerow([row[0], row[1], tf, df, row[3], tf * (N / df)])
+            return df
+
+        for row in iter_live_rows(root, manifest):
+            if row[0] != term and group:
+                rows_written += flush()
+                group = []
+            term = row[0]
+            group.append(row)
+        if group:
+            rows_written += flush()
+    return rows_written
+
+
+def write_global_stats(root, output):
+    """
+    Exact stats of the live index: <output>_stats.json and <output>_doc_lengths.csv.
+    N/total_length come from the manifest; df is counted in one streaming pass over the live postings.
+    """
+    manifest = load_manifest(root)
+    dfs, postings, term, df = [], 0, None, 0
+    for row in iter_live_rows(root, manifest):
+        if row[0] != term:
+            if term is not None:
+                dfs.append(df)
+            term, df = row[0], 0
+        df += 1
+        postings += 1
+    if term is not None:
+        dfs.append(df)
+
+    stats = index_stats.build_stats(manifest["N"], manifest["total_length"], unique_terms=len(dfs),
+                                    postings=postings, histogram=index_stats.df_histogram(dfs),
+                                    stemming=segment_stemming(root, [s["name"] for s in manifest["segments"]]))
+    index_stats.write_stats(f"{output}_stats.json", stats)
+
+    with open(f"{output}_doc_lengths.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "doc_len"])
+        for seg in manifest["segments"]:
+            deleted = read_tombstones(root, seg["name"])
+            writer.writerows(sorted((fn, dl) for fn, dl in read_doc_table(root, seg["name"]).items()
+                                    if fn not in deleted))
+    return stats
+
+
+# --- CLI ---
+
+def print_status(root):
+    manifest = load_manifest(root)
+    print(f"📦 Index root: {root} (generation {manifest['generation']})")
+    print(f"📄 Live documents (N): {manifest['N']}")
+    print(f"📏 Average document length (avgdl): {manifest['avgdl']:.2f}")
+    for seg in manifest["segments"]:
+        print(f"   • {seg['name']}: {seg['docs']} docs, {seg['deleted']} deleted, "
+              f"{seg['postings']} postings, level {seg['level']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage a segmented inverted index')
+    parser.add_argument('--root', required=True, help='Segmented index root directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('status', help='Show segments and global statistics')
+
+    delete = sub.add_parser('delete', help='Tombstone documents by filename')
+    delete.add_argument('filenames', nargs='+', help='Document filenames (e.g. <hash>.txt)')
+
+    comp = sub.add_parser('compact', help='Run the tiered merge policy')
+    comp.add_argument('--segments-per-tier', type=int, default=4)
+    comp.add_argument('--floor-docs', type=int, default=1000)
+    comp.add_argument('--max-deleted-ratio', type=float, default=0.3)
+    comp.add_argument('--watch', type=int, default=0, help='Keep compacting every N seconds (background mode)')
+
+    export = sub.add_parser('export', help='Write the live index as one CSV for insertIndex.py')
+    export.add_argument('--output', required=True, help='Output CSV path')
+
+    stats = sub.add_parser('stats', help='Write exact global stats for metaDataInsert.py')
+    stats.add_argument('--output', required=True, help='Output prefix (<prefix>_stats.json, <prefix>_doc_lengths.csv)')
+
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        print_status(args.root)
+    elif args.command == 'delete':
+        deleted = delete_documents(args.root, args.filenames)
+        print(f"🪦 Tombstoned {deleted} document(s)")
+    elif args.command == 'compact':
+        policy = TieredMergePolicy(args.segments_per_tier, args.floor_docs, max_deleted_ratio=args.max_deleted_ratio)
+        while True:
+            compact(args.root, policy)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    elif args.command == 'export':
+        rows = export_csv(args.root, args.output)
+        print(f"✅ Exported {rows} postings to {args.output}")
+    elif args.command == 'stats':
+        stats = write_global_stats(args.root, args.output)
+        print(f"📊 Stats written to {args.output}_stats.json (N={stats['N']}, avgdl={stats['avgdl']:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os, sys, csv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import segments
+
+
+def add_segment(root, docs):
+    """Write and commit one segment of {filename: {term: tf}} as the indexer's --segment-root mode does."""
+    name = segments.allocate_segment(root)
+    os.makedirs(os.path.join(root, name, "postings"))
+    os.makedirs(os.path.join(root, name, "docs"))
+    doc_lens = {fn: sum(tfs.values()) for fn, tfs in docs.items()}
+    rows = sorted((term, fn, tf, doc_lens[fn]) for fn, tfs in docs.items() for term, tf in tfs.items())
+    with open(os.path.join(root, name, "postings", "part-00000.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["term", "filename", "tf", "doc_len"])
+        writer.writerows(rows)
+    with open(os.path.join(root, name, "docs", "part-00000.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "doc_len"])
+        writer.writerows(sorted(doc_lens.items()))
+    segments.commit_segment(root, name, len(docs), sum(doc_lens.values()), len(rows), len({r[0] for r in rows}))
+    return name
+
+
+def live(root):
+    """{(term, filename): tf} of the live index."""
+    return {(row[0], row[1]): int(row[2]) for row in segments.iter_live_rows(root)}
+
+
+def test_updates_and_deletes_hide_old_postings(tmp_path):
+    root = str(tmp_path)
+    add_segment(root, {"a.txt": {"war": 2, "world": 1}, "b.txt": {"messi": 3}})
+    # b.txt is re-indexed in a newer segment: the old copy becomes a tombstone
+    add_segment(root, {"b.txt": {"messi": 1, "goal": 2}, "c.txt": {"war": 1}})
+    assert live(root) == {("war", "a.txt"): 2, ("world", "a.txt"): 1, ("messi", "b.txt"): 1,
+                          ("goal", "b.txt"): 2, ("war", "c.txt"): 1}
+    manifest = segments.load_manifest(root)
+    assert (manifest["N"], manifest["total_length"]) == (3, 7)
+
+    assert segments.delete_documents(root, ["a.txt", "unknown.txt"]) == 1
+    assert {fn for _, fn in live(root)} == {"b.txt", "c.txt"}
+    manifest = segments.load_manifest(root)
+    assert (manifest["N"], manifest["total_length"], manifest["avgdl"]) == (2, 4, 2.0)
+
+
+def test_merge_keeps_exactly_the_live_documents(tmp_path):
+    root = str(tmp_path)
+    first = add_segment(root, {"a.txt": {"war": 2}, "b.txt": {"messi": 3, "war": 1}})
+    second = add_segment(root, {"b.txt": {"goal": 1}, "c.txt": {"cup": 4}})
+    segments.delete_documents(root, ["c.txt"])
+    before, stats = live(root), segments.load_manifest(root)
+
+    merged = segments.merge_segments(root, [first, second])
+    manifest = segments.load_manifest(root)
+    assert [s["name"] for s in manifest["segments"]] == [merged["name"]]
+    assert live(root) == before
+    assert (merged["docs"], merged["deleted"]) == (2, 0)
+    assert (manifest["N"], manifest["total_length"]) == (stats["N"], stats["total_length"])
+    for name in (first, second):
+        assert not os.path.exists(os.path.join(root, name))
+        assert not os.path.exists(os.path.join(root, f"{name}.del"))
+
+
+def test_export_counts_df_over_live_documents(tmp_path):
+    root = str(tmp_path)
+    add_segment(root, {"a.txt": {"war": 2}, "b.txt": {"war": 1}})
+    add_segment(root, {"c.txt": {"war": 3}})
+    segments.delete_documents(root, ["b.txt"])
+    output = str(tmp_path / "index.csv")
+    assert segments.export_csv(root, output) == 2
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["filename"], r["df"]) for r in rows] == [("a.txt", "2"), ("c.txt", "2")]
@@ -0,0 +1,26 @@
+const { Binary } = require('mongodb');
+const { decodeChunk } = require('../services/mongoService');
+
+function packUInt32(values) {
+    const buf = Buffer.alloc(values.length * 4);
+    values.forEach((v, i) => buf.writeUInt32LE(v, i * 4));
+    return new Binary(buf);
+}
+
+test('decodeChunk unpacks md5 doc ids, tfs and doc lengths', () => {
+    const ids = ['cfcd208495d565ef66e7dff9f98764da', 'c4ca4238a0b923820dcc509a6f75849b'];
+    const chunk = {
+        word: 'messi',
+        chunk: 0,
+        df: 2,
+        docIds: new Binary(Buffer.from(ids.join(''), 'hex')),
+        tfs: packUInt32([3, 7]),
+        docLens: packUInt32([120, 4500]),
+    };
+
+    const decoded = decodeChunk(chunk);
+
+    expect(decoded.docIds).toEqual(ids);
+    expect(Array.from(decoded.tfs)).toEqual([3, 7]);
+    expect(Array.from(decoded.docLens)).toEqual([120, 4500]);
+});
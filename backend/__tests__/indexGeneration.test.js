@@ -0,0 +1,43 @@
+const { ActiveGeneration } = require('../services/indexGeneration');
+const { QueryCache } = require('../services/cacheService');
+
+// indexGenerations holds the {_id: 'active'} pointer; every other collection returns meta
+function fakeDb(pointer, meta = { indexVersion: 'v1' }) {
+    return {
+        collection: (name) => ({ findOne: async () => (name === 'indexGenerations' ? pointer.value : meta) }),
+    };
+}
+
+test('ActiveGeneration maps collection names to the active generation', async () => {
+    const pointer = { value: null };
+    const active = new ActiveGeneration();
+
+    await active.refresh(fakeDb(pointer));
+    expect(active.snapshot().name('invertedIndex')).toBe('invertedIndex');
+
+    pointer.value = { _id: 'active', generation: 'g2' };
+    const before = active.snapshot();
+    await active.refresh(fakeDb(pointer));
+    expect(active.snapshot().name('invertedIndex')).toBe('invertedIndex__g2');
+    expect(before.name('wikipedia')).toBe('wikipedia'); // a snapshot taken earlier keeps its generation
+});
+
+test('QueryCache invalidates when the active generation is switched', async () => {
+    const pointer = { value: { _id: 'active', generation: 'g1' } };
+    const db = fakeDb(pointer);
+    const cache = new QueryCache({ enabled: true, versionTtlMs: 0, generation: new ActiveGeneration() });
+    const compute = jest.fn(async () => new Map([['d1', 2], ['d2', 1]]));
+    const cleared = [];
+    cache.onInvalidate((version) => cleared.push(version));
+
+    await cache.topDocuments(db, ['war'], 'bm25', 2, compute);
+    expect((await cache.topDocuments(db, ['war'], 'bm25', 2, compute)).hit).toBe(true);
+
+    pointer.value = { _id: 'active', generation: 'g2' };
+    expect((await cache.topDocuments(db, ['war'], 'bm25', 2, compute)).hit).toBe(false);
+    expect(cleared).toEqual(['generation:g2']);
+
+    pointer.value = { _id: 'active', generation: 'g1' }; // rollback
+    await cache.topDocuments(db, ['war'], 'bm25', 2, compute);
+    expect(cache.stats().invalidations).toBe(2);
+});
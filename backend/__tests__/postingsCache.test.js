@@ -0,0 +1,75 @@
+const { PostingsCache, FrequencySketch, entryBytes, warmPostingsCache } = require('../services/postingsCache');
+
+function postings(n) {
+    return {
+        df: n,
+        docIds: Array.from({ length: n }, (_, i) => String(i).padStart(32, '0')),
+        tfs: new Uint32Array(n),
+        docLens: new Uint32Array(n),
+    };
+}
+
+test('FrequencySketch estimates grow with requests', () => {
+    const sketch = new FrequencySketch(1024);
+    for (let i = 0; i < 5; i++) sketch.increment('messi');
+    sketch.increment('tagore');
+    expect(sketch.estimate('messi')).toBeGreaterThanOrEqual(5);
+    expect(sketch.estimate('messi')).toBeGreaterThan(sketch.estimate('tagore'));
+});
+
+test('evicts by bytes and only admits terms more popular than the victim', () => {
+    const cache = new PostingsCache({ maxBytes: entryBytes(postings(10)) * 2, sketchWidth: 1024 });
+    for (const term of ['war', 'war', 'war', 'world', 'world']) cache.get(term);
+    expect(cache.set('war', postings(10))).toBe(true);
+    expect(cache.set('world', postings(10))).toBe(true);
+
+    // requested once: not worth evicting 'war' (the LRU victim)
+    cache.get('rare');
+    expect(cache.set('rare', postings(10))).toBe(false);
+    expect(cache.get('war')).toBeDefined();
+
+    // now 'world' is the LRU victim and 'hot' is requested more often
+    for (let i = 0; i < 4; i++) cache.get('hot');
+    expect(cache.set('hot', postings(10))).toBe(true);
+    expect(cache.get('world')).toBeUndefined();
+    expect(cache.stats().bytes).toBeLessThanOrEqual(cache.maxBytes);
+});
+
+test('a rejected update of a cached term keeps its old entry', () => {
+    const cache = new PostingsCache({ maxBytes: entryBytes(postings(10)) * 2, sketchWidth: 1024 });
+    for (const term of ['war', 'war', 'war', 'world', 'world']) cache.get(term);
+    cache.set('war', postings(10));
+    cache.set('world', postings(10));
+    const bytes = cache.stats().bytes;
+
+    // a same-size update fits in the old entry's bytes
+    expect(cache.set('war', postings(10))).toBe(true);
+    // a larger one would have to evict 'war', which is requested more often than 'world'
+    expect(cache.set('world', postings(15))).toBe(false);
+    expect(cache.get('world').docIds.length).toBe(10);
+    expect(cache.get('war')).toBeDefined();
+    expect(cache.stats().bytes).toBe(bytes);
+});
+
+test('rejects a single postings list larger than the whole cache', () => {
+    const cache = new PostingsCache({ maxBytes: entryBytes(postings(5)) });
+    expect(cache.set('huge', postings(100))).toBe(false);
+    expect(cache.stats().entries).toBe(0);
+});
+
+test('warmPostingsCache loads the most frequent logged terms first', async () => {
+    const cache = new PostingsCache({ maxBytes: 1 << 20 });
+    const queries = ['messi goals', 'messi', 'tagore'];
+    const stem = async (q) => q.split(' ');
+    const requested = [];
+    const load = async (terms) => {
+        requested.push(...terms);
+        return new Map(terms.map(t => [t, postings(3)]));
+    };
+
+    const loaded = await warmPostingsCache(cache, queries, stem, load, { maxTerms: 2 });
+
+    expect(loaded).toBe(2);
+    expect(requested[0]).toBe('messi');
+    expect(cache.get('messi')).toBeDefined();
+});
@@ -0,0 +1,59 @@
+const { LRUCache, QueryCache, resultKey } = require('../services/cacheService');
+
+function fakeDb(meta) {
+    return { collection: () => ({ findOne: async () => meta }) };
+}
+
+test('resultKey ignores term order and repeats but not the ranking method', () => {
+    expect(resultKey(['messi', 'argentina'], 'bm25', 50)).toBe(resultKey(['argentina', 'messi', 'messi'], 'bm25', 50));
+    expect(resultKey(['messi'], 'bm25', 50)).not.toBe(resultKey(['messi'], 'tfidf', 50));
+});
+
+test('LRUCache evicts least recently used entries by bytes and expires by TTL', () => {
+    let now = 0;
+    const cache = new LRUCache({ name: 't', maxBytes: 20, ttlMs: 100, now: () => now });
+    cache.set('a', 'x', 10);
+    cache.set('b', 'y', 10);
+    cache.get('a');           // a becomes most recent
+    cache.set('c', 'z', 10);  // evicts b
+    expect(cache.get('b')).toBeUndefined();
+    expect(cache.get('a')).toBe('x');
+    expect(cache.stats().bytes).toBe(20);
+
+    now = 150;
+    expect(cache.get('a')).toBeUndefined();
+    expect(cache.stats().entries).toBe(1);
+});
+
+test('QueryCache serves repeated term sets and invalidates on a new index version', async () => {
+    let now = 0;
+    const meta = { indexVersion: 'v1' };
+    const db = fakeDb(meta);
+    const cache = new QueryCache({ enabled: true, versionTtlMs: 0, now: () => now });
+    const compute = jest.fn(async () => new Map([['d1', 3], ['d2', 2], ['d3', 1]]));
+
+    const first = await cache.topDocuments(db, ['war', 'world'], 'bm25', 2, compute);
+    const second = await cache.topDocuments(db, ['world', 'war'], 'bm25', 2, compute);
+    expect(first.hit).toBe(false);
+    expect(second.hit).toBe(true);
+    expect([...second.docToScore.keys()]).toEqual(['d1', 'd2']);
+    expect(compute).toHaveBeenCalledTimes(1);
+
+    meta.indexVersion = 'v2';
+    const third = await cache.topDocuments(db, ['war', 'world'], 'bm25', 2, compute);
+    expect(third.hit).toBe(false);
+    expect(cache.stats().invalidations).toBe(1);
+});
+
+test('QueryCache fetches only uncached result records and keeps score order', async () => {
+    const cache = new QueryCache({ enabled: true });
+    const fetch = jest.fn(async (missing) => [[...missing.keys()].map(id => ({ file_id: id, docId: id, body: 'b' }))]);
+
+    await cache.resultDocuments(new Map([['d1', 2], ['d2', 1]]), fetch);
+    const [docs, chunked] = await cache.resultDocuments(new Map([['d3', 3], ['d1', 2]]), fetch);
+
+    expect(fetch).toHaveBeenCalledTimes(2);
+    expect([...fetch.mock.calls[1][0].keys()]).toEqual(['d3']);
+    expect(docs.map(d => d.file_id)).toEqual(['d3', 'd1']);
+    expect(chunked[0].chunkedBody).toBe('b');
+});
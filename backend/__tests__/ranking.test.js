@@ -0,0 +1,186 @@
+const { rankTermAtATime, rankConjunctive, postingsEntry, BLOCK_SIZE } = require('../services/rankingService');
+
+// Deterministic pseudo-random numbers (mulberry32)
+function random(seed) {
+    return () => {
+        seed = (seed + 0x6D2B79F5) | 0;
+        let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+const N = 2000;
+const AVGDL = 120;
+
+// Postings of `count` distinct docs out of N (or of `ids`); docs below `hot` get high tfs.
+// Built like fetchPostings does: the numeric order is not the docId order, so postingsEntry sorts them.
+function makeList(rand, count, hot = 0, ids = null) {
+    if (!ids) {
+        const picked = new Set();
+        while (picked.size < count) picked.add(Math.floor(rand() * N));
+        ids = [...picked].sort((a, b) => a - b);
+    }
+    const tfs = Uint32Array.from(ids, id => 1 + Math.floor(rand() * (id < hot ? 40 : 4)));
+    const docLens = Uint32Array.from(ids, () => 20 + Math.floor(rand() * 200));
+    return postingsEntry(ids.length, ids.map(id => `doc${id}`), tfs, docLens);
+}
+
+// Exhaustive accumulation over every posting, as getDocuments did before
+function bruteForce(postings, method) {
+    const scores = new Map();
+    for (const { df, docIds, tfs, docLens } of postings.values()) {
+        const idf = method === 'bm25' ? Math.log((N - df + 0.5) / (df + 0.5) + 1) : Math.log(N / df);
+        docIds.forEach((id, j) => {
+            const tf = tfs[j];
+            const score = method === 'bm25'
+                ? idf * ((tf * 2.5) / (tf + 1.5 * (1 - 0.75 + 0.75 * (docLens[j] / AVGDL))))
+                : tf * idf;
+            scores.set(id, (scores.get(id) || 0) + score);
+        });
+    }
+    return [...scores].sort((a, b) => b[1] - a[1]);
+}
+
+function sameTopK(got, expected, k) {
+    const scores = [...got.values()];
+    expect(got.size).toBe(Math.min(k, expected.length));
+    scores.forEach((score, i) => expect(Math.abs(score - expected[i][1]) < 1e-9).toBe(true));
+    // every returned doc has its exact score
+    const exact = new Map(expected);
+    for (const [id, score] of got) expect(Math.abs(exact.get(id) - score) < 1e-9).toBe(true);
+}
+
+describe('rankTermAtATime', () => {
+    test('returns the exact top-k of the exhaustive ranking', () => {
+        const rand = random(7);
+        for (let q = 0; q < 30; q++) {
+            const postings = new Map();
+            const terms = 1 + Math.floor(rand() * 5);
+            for (let t = 0; t < terms; t++) postings.set(`w${t}`, makeList(rand, 5 + Math.floor(rand() * 1500), 50));
+            for (const method of ['tfidf', 'bm25']) {
+                for (const k of [1, 10, 50]) {
+                    const stats = {};
+                    const got = rankTermAtATime(postings, { N, avgdl: AVGDL, method, topK: k }, stats);
+                    sameTopK(got, bruteForce(postings, method), k);
+                    expect(stats.visited).toBe(stats.total);
+                    expect(stats.scored).toBeLessThanOrEqual(stats.visited);
+                }
+            }
+        }
+    });
+
+    test('stops admitting candidates from common terms once rare terms fill the top-k', () => {
+        const rand = random(11);
+        const postings = new Map([
+            ['rare', makeList(rand, 60, N)],
+            ['common', makeList(rand, 1800)],
+            ['stopword', makeList(rand, 1950)],
+        ]);
+        const stats = {};
+        const got = rankTermAtATime(postings, { N, avgdl: AVGDL, method: 'bm25', topK: 10 }, stats);
+        sameTopK(got, bruteForce(postings, 'bm25'), 10);
+        expect(stats.prunedAt).toBe(1);
+        expect(stats.total - stats.scored).toBeGreaterThan(3000);
+    });
+
+    test('handles queries with fewer matches than k', () => {
+        const postings = new Map([['only', { df: 2, docIds: ['a', 'b'], tfs: Uint32Array.of(3, 1), docLens: Uint32Array.of(100, 100) }]]);
+        const stats = {};
+        const got = rankTermAtATime(postings, { N, avgdl: AVGDL, method: 'tfidf', topK: 50 }, stats);
+        expect([...got.keys()]).toEqual(['a', 'b']);
+        expect(stats).toEqual({ total: 2, visited: 2, scored: 2, skipped: 0, prunedAt: null });
+    });
+});
+
+describe('rankConjunctive', () => {
+    // Exhaustive ranking restricted to the documents holding every term
+    function bruteForceAll(postings, method) {
+        const sets = [...postings.values()].map(({ docIds }) => new Set(docIds));
+        return bruteForce(postings, method).filter(([id]) => sets.every(set => set.has(id)));
+    }
+
+    test('returns the exact top-k of the documents holding every term', () => {
+        const rand = random(13);
+        for (let q = 0; q < 30; q++) {
+            const postings = new Map();
+            const terms = 1 + Math.floor(rand() * 4);
+            for (let t = 0; t < terms; t++) postings.set(`w${t}`, makeList(rand, 50 + Math.floor(rand() * 1500), 50));
+            for (const method of ['tfidf', 'bm25']) {
+                for (const k of [1, 10, 50]) {
+                    const stats = {};
+                    const got = rankConjunctive(postings, [...postings.keys()], { N, avgdl: AVGDL, method, topK: k }, stats);
+                    sameTopK(got, bruteForceAll(postings, method), k);
+                    expect(stats.visited + stats.skipped).toBe(stats.total);
+                    expect(stats.scored).toBeLessThanOrEqual(stats.visited);
+                }
+            }
+        }
+    });
+
+    test('visits only the postings the shortest list leads the other cursors to', () => {
+        const rand = random(17);
+        const postings = new Map([
+            ['rare', makeList(rand, 40)],
+            ['common', makeList(rand, 1800)],
+            ['stopword', makeList(rand, 1950)],
+        ]);
+        const stats = {};
+        const got = rankConjunctive(postings, ['stopword', 'rare', 'common'], { N, avgdl: AVGDL, method: 'bm25', topK: 10 }, stats);
+        sameTopK(got, bruteForceAll(postings, 'bm25'), 10);
+        expect(stats.total).toBe(40 + 1800 + 1950);
+        // each step lands the lead on one posting and every other cursor on at most one
+        expect(stats.visited).toBeLessThanOrEqual(3 * (40 + 1));
+        expect(stats.skipped).toBe(stats.total - stats.visited);
+    });
+
+    test('skips blocks whose maxima cannot reach the k-th best score', () => {
+        const rand = random(23);
+        // four-digit ids sort as numbers: the high-tf documents fill the first block
+        const ids = Array.from({ length: 1500 }, (_, i) => 1000 + i);
+        // the same documents in both lists: only the block maxima can avoid visiting all of them
+        const postings = new Map([['a', makeList(rand, 0, 1040, ids)], ['b', makeList(rand, 0, 1040, ids)]]);
+        for (const method of ['tfidf', 'bm25']) {
+            const stats = {};
+            const got = rankConjunctive(postings, ['a', 'b'], { N, avgdl: AVGDL, method, topK: 5 }, stats);
+            sameTopK(got, bruteForceAll(postings, method), 5);
+            expect(stats.visited).toBeLessThan(stats.total / 2);
+            expect(stats.skipped).toBeGreaterThan(4 * BLOCK_SIZE);
+        }
+    });
+
+    test('ranks OR groups: a document needs one word of each group and scores every word it holds', () => {
+        const rand = random(29);
+        for (let q = 0; q < 20; q++) {
+            const postings = new Map();
+            for (let t = 0; t < 5; t++) postings.set(`w${t}`, makeList(rand, 20 + Math.floor(rand() * 1200), 50));
+            const groups = [['w0', 'w1'], ['w2'], ['w3', 'w4', 'w1']];
+            const holders = groups.map(g => new Set(g.flatMap(w => postings.get(w).docIds)));
+            for (const method of ['tfidf', 'bm25']) {
+                const expected = bruteForce(postings, method).filter(([id]) => holders.every(set => set.has(id)));
+                const stats = {};
+                sameTopK(rankConjunctive(postings, groups, { N, avgdl: AVGDL, method, topK: 10 }, stats), expected, 10);
+                expect(stats.visited + stats.skipped).toBe(stats.total);
+            }
+        }
+    });
+
+    test('leaves the (cached) postings entries untouched', () => {
+        const rand = random(19);
+        const postings = new Map([['a', makeList(rand, 300)], ['b', makeList(rand, 900)]]);
+        const keys = [...postings.values()].map(entry => Object.keys(entry).sort());
+        for (const method of ['tfidf', 'bm25']) {
+            rankConjunctive(postings, ['a', 'b'], { N, avgdl: AVGDL, method, topK: 10 });
+            rankTermAtATime(postings, { N, avgdl: AVGDL, method, topK: 10 });
+        }
+        expect([...postings.values()].map(entry => Object.keys(entry).sort())).toEqual(keys);
+    });
+
+    test('matches nothing when a query word has no postings', () => {
+        const postings = new Map([['only', { df: 2, docIds: ['a', 'b'], tfs: Uint32Array.of(3, 1), docLens: Uint32Array.of(100, 100) }]]);
+        const stats = {};
+        const got = rankConjunctive(postings, ['only', 'unknown'], { N, avgdl: AVGDL, method: 'tfidf', topK: 50 }, stats);
+        expect(got.size).toBe(0);
+        expect(stats).toEqual({ total: 0, visited: 0, scored: 0, skipped: 0, prunedAt: null });
+    });
+});
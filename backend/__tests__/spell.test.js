@@ -0,0 +1,106 @@
+const { Speller, deletes, editDistance } = require('../services/spellService');
+const { rankConjunctive, postingsEntry } = require('../services/rankingService');
+
+// Front-codes sorted keys like search_engine/codec.py (write_front_coded)
+function frontCode(keys, block) {
+    const parts = [];
+    const offsets = [];
+    let size = 0;
+    let previous = Buffer.alloc(0);
+    keys.forEach((key, i) => {
+        let shared = 0;
+        if (i % block === 0) offsets.push(size);
+        else while (shared < Math.min(key.length, previous.length) && key[shared] === previous[shared]) shared++;
+        const part = Buffer.concat([Buffer.from([shared, key.length - shared]), key.subarray(shared)]);
+        parts.push(part);
+        size += part.length;
+        previous = key;
+    });
+    offsets.push(size);
+    return [Buffer.concat(parts), Buffer.from(new Uint32Array(offsets).buffer)];
+}
+
+const u32 = (values) => Buffer.from(new Uint32Array(values).buffer);
+const byBytes = (a, b) => Buffer.compare(a, b);
+
+// Same layout as search_engine/spell.py (write_spelling)
+function makeSpeller(termDfs, options, maxEdits = 2, prefixLength = 7, minDf = 2) {
+    const terms = Object.keys(termDfs).map(t => Buffer.from(t)).sort(byBytes);
+    const variants = new Map();
+    terms.forEach((term, t) => {
+        const text = term.toString();
+        if (termDfs[text] < minDf || !/^[a-z]+$/i.test(text)) return;
+        for (const variant of deletes(text, maxEdits, prefixLength)) {
+            if (!variants.has(variant)) variants.set(variant, []);
+            variants.get(variant).push(t);
+        }
+    });
+    const keys = [...variants.keys()].map(v => Buffer.from(v)).sort(byBytes);
+    const offsets = [0];
+    const ids = [];
+    keys.forEach(key => {
+        ids.push(...variants.get(key.toString()));
+        offsets.push(ids.length);
+    });
+    const [termData, termBlocks] = frontCode(terms, 4);
+    const [deleteData, deleteBlocks] = frontCode(keys, 4);
+    return new Speller({
+        meta: { format: 1, terms: terms.length, deletes: keys.length, max_edits: maxEdits,
+                prefix_length: prefixLength, min_df: minDf, block: 4 },
+        terms: termData, termBlocks,
+        dfs: u32(terms.map(t => termDfs[t.toString()])),
+        deletes: deleteData, deleteBlocks,
+        deleteOffsets: u32(offsets), deleteTerms: u32(ids),
+    }, options);
+}
+
+const DICTIONARY = { barcelona: 900, messi: 400, messier: 3, mess: 50, world: 5000, word: 2000, cup: 3000, 'lionel messi': 300 };
+
+describe('spellService', () => {
+    test('editDistance counts a transposition as one edit and stops at the limit', () => {
+        expect(editDistance('barcelna', 'barcelona', 2)).toBe(1);
+        expect(editDistance('wrold', 'world', 2)).toBe(1);
+        expect(editDistance('abc', 'xyzw', 2)).toBe(3);
+    });
+
+    test('finds neighbours through the deletion index, nearest and most frequent first', () => {
+        const speller = makeSpeller(DICTIONARY);
+        expect(speller.df('messi')).toBe(400);
+        expect(speller.df('mesi')).toBe(0);
+        const found = speller.candidates('mesi').map(c => c.term);
+        expect(found.slice(0, 2)).toEqual(['messi', 'mess']);
+        expect(found).not.toContain('lionel messi');
+    });
+
+    test('expands unknown terms to the closest frequent neighbours only', () => {
+        const speller = makeSpeller(DICTIONARY, { maxExpansions: 2 });
+        const { terms, corrections } = speller.expand(['lionel', 'mesi', 'barcelna', 'cup']);
+        expect(corrections).toEqual({ mesi: ['messi', 'mess'], barcelna: ['barcelona'] });
+        expect(terms).toEqual(['messi', 'mess', 'barcelona', 'cup']);
+    });
+
+    test('an all-words query with a misspelled word needs only one of its expansions', () => {
+        const speller = makeSpeller(DICTIONARY, { maxExpansions: 2 });
+        const { terms, groups } = speller.expand(['mesi', 'cup']);
+        expect(groups).toEqual([['mesi', 'messi', 'mess'], ['cup']]);
+        const entry = (ids) => postingsEntry(ids.length, ids, Uint32Array.from(ids, () => 2), Uint32Array.from(ids, () => 100));
+        const postings = new Map([['messi', entry(['d1', 'd3'])], ['mess', entry(['d2'])], ['cup', entry(['d1', 'd2', 'd4'])]]);
+        const params = { N: 10, avgdl: 100, method: 'bm25', topK: 10 };
+        // as separate words, every expansion would be required: no document has them all
+        expect(rankConjunctive(postings, terms, params).size).toBe(0);
+        expect([...rankConjunctive(postings, groups, params).keys()].sort()).toEqual(['d1', 'd2']);
+        expect(rankConjunctive(postings, [['zzzz'], ['cup']], params).size).toBe(0);
+    });
+
+    test('leaves known, short and non-alphabetic terms alone', () => {
+        const speller = makeSpeller(DICTIONARY);
+        expect(speller.expand(['messier', 'cu', 'wrld2'])).toEqual({
+            terms: ['messier'], groups: [['messier'], ['cu'], ['wrld2']], corrections: {},
+        });
+    });
+
+    test('bounds the expansions by count and by the postings they add', () => {
+        expect(makeSpeller(DICTIONARY, { maxExpansions: 1 }).expand(['mesi']).corrections).toEqual({ mesi: ['messi'] });
+        expect(makeSpeller(DICTIONARY, { maxPostings: 420 }).expand(['mesi']).corrections).toEqual({ mesi: ['messi'] });
+    });
+});
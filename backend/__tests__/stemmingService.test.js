@@ -1,4 +1,7 @@
 const { stemQuery } = require('../services/stemmingService');
+const { tokenizerPool } = require('../services/tokenizerPool');
+
+afterAll(() => tokenizerPool.close());
 
 test('stemQuery returns NER-aware, stemmed tokens', async () => {
   const tokens = await stemQuery('Barack Obama visited New York');
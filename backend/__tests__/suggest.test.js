@@ -0,0 +1,62 @@
+const { Suggester, normalizePrefix } = require('../services/suggestService');
+
+// Front-codes sorted keys like search_engine/codec.py (write_front_coded)
+function frontCode(keys, block) {
+    const parts = [];
+    const offsets = [];
+    let size = 0;
+    let previous = Buffer.alloc(0);
+    keys.forEach((text, i) => {
+        const key = Buffer.from(text);
+        let shared = 0;
+        if (i % block === 0) offsets.push(size);
+        else while (shared < Math.min(key.length, previous.length) && key[shared] === previous[shared]) shared++;
+        const part = Buffer.concat([Buffer.from([shared, key.length - shared]), key.subarray(shared)]);
+        parts.push(part);
+        size += part.length;
+        previous = key;
+    });
+    offsets.push(size);
+    return [Buffer.concat(parts), Buffer.from(new Uint32Array(offsets).buffer)];
+}
+
+const u32 = (values) => Buffer.from(new Uint32Array(values).buffer);
+
+function makeSuggester() {
+    const keys = ['barcelona', 'battle', 'battle of the bulge', 'lionel messi', 'messi', 'messier'];
+    const labels = ['barcelona', 'battle', 'Battle of the Bulge', 'Lionel Messi', 'messi', 'messier'];
+    const weights = [40, 25, 30, 50, 60, 5];
+    const [keyData, keyBlocks] = frontCode(keys, 4);
+    // 'b' is a "popular" prefix with a precomputed top-2: barcelona (40), battle of the bulge (30)
+    const [prefixData, prefixBlocks] = frontCode(['b'], 4);
+    const labelBytes = labels.map(l => Buffer.from(l));
+    const labelOffsets = [0];
+    labelBytes.forEach(l => labelOffsets.push(labelOffsets[labelOffsets.length - 1] + l.length));
+    return new Suggester({
+        meta: { format: 1, count: keys.length, block: 4, k: 2, threshold: 2, prefixes: 1 },
+        keys: keyData, keyBlocks,
+        prefixes: prefixData, prefixBlocks,
+        weights: u32(weights),
+        labels: Buffer.concat(labelBytes), labelOffsets: u32(labelOffsets),
+        top: u32([0, 2]),
+    });
+}
+
+test('normalizePrefix matches the indexer-side normalization', () => {
+    expect(normalizePrefix('  Battle  of-the ')).toBe('battle of the ');
+    expect(normalizePrefix('MESS')).toBe('mess');
+    expect(normalizePrefix('  ')).toBe('');
+});
+
+test('Suggester answers popular prefixes from the precomputed top-k', () => {
+    const suggestions = makeSuggester().suggest('B');
+    expect(suggestions.map(s => s.text)).toEqual(['barcelona', 'Battle of the Bulge']);
+});
+
+test('Suggester scans the key range of other prefixes, best weight first, across blocks', () => {
+    const suggester = makeSuggester();
+    expect(suggester.suggest('mess').map(s => s.text)).toEqual(['messi', 'messier']);
+    expect(suggester.suggest('battle ').map(s => s.text)).toEqual(['Battle of the Bulge']);
+    expect(suggester.suggest('lio', 1)).toEqual([{ text: 'Lionel Messi', weight: 50 }]);
+    expect(suggester.suggest('zz')).toEqual([]);
+});
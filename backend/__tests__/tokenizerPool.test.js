@@ -0,0 +1,54 @@
+const { TokenizerPool, cleanQuery } = require('../services/tokenizerPool');
+
+// Stand-in worker speaking the tokenizerWorker.py protocol: tokens are the words of the query
+// (marked when the request asks for no stemming)
+const FAKE_WORKER = `
+const rl = require('readline').createInterface({ input: process.stdin });
+console.log(JSON.stringify({ ready: true }));
+rl.on('line', (line) => {
+    const { id, query, stemming } = JSON.parse(line);
+    if (query === 'crash') process.exit(1);
+    const tokens = query.split(' ').map(word => (stemming ? word : \`\${word}*\`));
+    console.log(JSON.stringify({ id, tokens, pid: process.pid }));
+});
+`;
+
+function fakePool(options = {}) {
+    return new TokenizerPool({ size: 2, command: process.execPath, args: ['-e', FAKE_WORKER], ...options });
+}
+
+test('cleanQuery lowercases and strips punctuation like clean_text', () => {
+    expect(cleanQuery('  Lionel Messi! ')).toBe('lionel messi');
+});
+
+test('tokenizes through long-lived workers and caches by cleaned query', async () => {
+    const pool = fakePool();
+    await pool.start();
+    const pids = pool.workers.map(w => w.proc.pid);
+
+    expect(await pool.tokenize('Lionel Messi')).toEqual(['lionel', 'messi']);
+    const results = await Promise.all(['a b', 'c d', 'e f'].map(q => pool.tokenize(q)));
+    expect(results).toEqual([['a', 'b'], ['c', 'd'], ['e', 'f']]);
+    expect(await pool.tokenize('lionel messi!')).toEqual(['lionel', 'messi']);
+    expect(pool.cache.stats().hits).toBe(1);
+    expect(pool.workers.map(w => w.proc.pid)).toEqual(pids);
+    pool.close();
+});
+
+test('passes the index stemming setting and caches per setting', async () => {
+    const pool = fakePool({ size: 1 });
+    await pool.start();
+    expect(await pool.tokenize('Running goals')).toEqual(['running', 'goals']);
+    expect(await pool.tokenize('Running goals', false)).toEqual(['running*', 'goals*']);
+    expect(await pool.tokenize('running goals', false)).toEqual(['running*', 'goals*']);
+    expect(pool.cache.stats().hits).toBe(1);
+    pool.close();
+});
+
+test('replaces a worker that crashes and rejects its pending request', async () => {
+    const pool = fakePool({ size: 1 });
+    await pool.start();
+    await expect(pool.tokenize('crash')).rejects.toThrow('exited');
+    expect(await pool.tokenize('still works')).toEqual(['still', 'works']);
+    pool.close();
+});
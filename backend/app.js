@@ -8,6 +8,8 @@ var cors = require('cors')
 var indexRouter = require('./routes/index');
 var usersRouter = require('./routes/users');
 var queryProcessorStemRouter = require('./routes/queryProcessor');
+var metricsRouter = require('./routes/metrics');
+var suggestRouter = require('./routes/suggest');
 
 var app = express();
 
@@ -25,6 +27,8 @@ app.use(cors());
 app.use('/', indexRouter);
 app.use('/users', usersRouter);
 app.use('/query-stem', queryProcessorStemRouter);
+app.use('/metrics', metricsRouter);
+app.use('/suggest', suggestRouter);
 
 
 // catch 404 and forward to error handler
@@ -1,10 +1,17 @@
 // === controllers/queryController.js ===
 const { stemQuery } = require('../services/stemmingService');
-const { getDocuments, getResultDocuments } = require('../services/mongoService');
+const { getDocuments, getResultDocuments, indexStemming } = require('../services/mongoService');
 const { getImageFilenames } = require('../utils/fileUtils');
 const { parseHrtimeToSeconds } = require('../utils/helpers');
 const { getClient } = require('../services/mongoClient');
 const { startSpan, sysSnapshot } = require('../utils/profiler');
+const { queryCache } = require('../services/cacheService');
+const { getSpeller } = require('../services/spellService');
+
+const TOP_K = 50;
+// any: documents with at least one query word; all: with every word. Postings in Mongo carry no
+// positions, so phrase queries are answered as all (the Python server checks word order).
+const MATCHES = ['any', 'all', 'phrase'];
 
 require('dotenv').config();
 
@@ -17,12 +24,19 @@ exports.processQuery = async (req, res) => {
     const endValidate = startSpan('validate_input', measures);
     let query = (req.query.query || '').trim();
     const scoringType = (req.query.optionName || 'tfidf').toLowerCase();
+    const match = (req.query.match || 'any').toLowerCase();
 
     if (!query || query.length === 0) {
     endValidate();
     endTotal();
     return res.status(400).json({ success: false, result: [], error: 'Empty query' });
     }
+    if (!MATCHES.includes(match)) {
+    endValidate();
+    endTotal();
+    return res.status(400).json({ success: false, result: [], error: `Unknown match mode: ${match}` });
+    }
+    const conjunctive = match !== 'any';
     endValidate();
 
     // pooled Mongo client (already connected)
@@ -31,18 +45,41 @@ exports.processQuery = async (req, res) => {
     endConnectToDB();
 
     let fullbodyDocsList = [], chunkedBodyDocsList = [];
+    let cacheHit = false;
+    let corrections = {};
+    const postings = {}; // filled by getDocuments on a results-cache miss
 
     try {
     const endStem = startSpan('stem_query', measures);
-    const stemmedWords = await stemQuery(query);
+    // tokenized like the served index: stemmed only if it was built with stemming
+    let stemmedWords = await stemQuery(query, { stemming: await indexStemming(client) });
     endStem();
 
+    // misspelled / unknown terms are searched as their closest frequent neighbours
+    // (all-words queries: a word matches through any of its expansions, which are not required themselves)
+    const speller = getSpeller();
+    if (speller) {
+        const endExpand = startSpan('expand_terms', measures);
+        let groups;
+        ({ terms: stemmedWords, groups, corrections } = speller.expand(stemmedWords));
+        if (conjunctive) stemmedWords = groups;
+        endExpand();
+    }
+
+    // top-k ids come from the results cache when the same term set was ranked before (in the same mode)
     const endGetDocs = startSpan('get_documents', measures);
-    const docToScoreMapSorted = await getDocuments(client, stemmedWords, scoringType);
+    const { docToScore, hit } = await queryCache.topDocuments(
+        client.db('ir'), stemmedWords, conjunctive ? `${scoringType}:all` : scoringType, TOP_K,
+        () => getDocuments(client, stemmedWords, scoringType, TOP_K, postings, conjunctive ? 'all' : 'any')
+    );
+    cacheHit = hit;
     endGetDocs();
 
+    // only records missing from the records cache are fetched from 'wikipedia'
     const endFetchResults = startSpan('fetch_results', measures);
-    [fullbodyDocsList, chunkedBodyDocsList] = await getResultDocuments(client, docToScoreMapSorted);
+    [fullbodyDocsList, chunkedBodyDocsList] = await queryCache.resultDocuments(
+        docToScore, (missing) => getResultDocuments(client, missing, TOP_K)
+    );
     endFetchResults();
 
     const endGetImages = startSpan('get_image_filenames', measures);
@@ -55,7 +92,7 @@ exports.processQuery = async (req, res) => {
         imageResult: imageFileNames,
         textResult: chunkedBodyDocsList,
         searchTime: parseHrtimeToSeconds(process.hrtime(startTime)),
-        profile: { measures, sysSnapshot: sysSnapshot() },
+        profile: { measures, sysSnapshot: sysSnapshot(), cacheHit, corrections, postings },
     });
     } catch (err) {
         console.error(err);
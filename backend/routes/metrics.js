@@ -0,0 +1,12 @@
+// === routes/metrics.js ===
+const express = require('express');
+const router = express.Router();
+const { queryCache, metricsText } = require('../services/cacheService');
+const { postingsCache } = require('../services/postingsCache');
+
+// Prometheus scrape endpoint for the query caches
+router.get('/', (req, res) => {
+    res.type('text/plain; version=0.0.4').send(metricsText(queryCache, [postingsCache.stats()]));
+});
+
+module.exports = router;
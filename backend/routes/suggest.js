@@ -0,0 +1,19 @@
+// === routes/suggest.js ===
+const express = require('express');
+const router = express.Router();
+const { getSuggester } = require('../services/suggestService');
+
+// Typeahead: GET /suggest?q=<typed prefix>&k=<k>
+router.get('/', (req, res) => {
+    const started = process.hrtime.bigint();
+    const suggester = getSuggester();
+    if (!suggester) {
+        return res.status(404).json({ suggestions: [], error: 'Suggestions are not configured (SUGGEST_INDEX)' });
+    }
+    const k = parseInt(req.query.k, 10) || 10;
+    const suggestions = suggester.suggest(req.query.q || '', k);
+    const tookUs = Number(process.hrtime.bigint() - started) / 1000;
+    res.json({ suggestions, took_us: Math.round(tookUs * 10) / 10 });
+});
+
+module.exports = router;
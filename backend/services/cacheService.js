@@ -0,0 +1,280 @@
+// === services/cacheService.js ===
+
+// Two-level query cache:
+// - results: normalized (method, k, stemmed term set) -> top-k [docId, score] pairs
+// - records: docId -> result record (the fields getResultDocuments projects)
+// Both are in-process LRU + TTL caches bounded by entries and bytes, optionally backed by a
+// shared Redis tier (REDIS_URL, needs the `redis` package). Entries are tied to the index
+// version: the active index generation (services/indexGeneration.js), or metaData.indexVersion
+// written by mongodb_scripts/metaDataInsert.py for unversioned collections. When it changes, the
+// local caches are cleared and Redis keys move to a new namespace.
+
+const { activeGeneration } = require('./indexGeneration');
+
+const envInt = (name, fallback) => {
+    const value = parseInt(process.env[name], 10);
+    return Number.isFinite(value) ? value : fallback;
+};
+
+const estimateBytes = (value) => Buffer.byteLength(JSON.stringify(value));
+
+class LRUCache {
+    constructor({ name, maxEntries = Infinity, maxBytes = Infinity, ttlMs = 0, now = Date.now }) {
+        this.name = name;
+        this.maxEntries = maxEntries;
+        this.maxBytes = maxBytes;
+        this.ttlMs = ttlMs;
+        this.now = now;
+        this.map = new Map(); // insertion order = recency order (oldest first)
+        this.bytes = 0;
+        this.hits = 0;
+        this.misses = 0;
+        this.evictions = 0;
+    }
+
+    get(key) {
+        const entry = this.map.get(key);
+        if (entry && (!entry.expires || entry.expires > this.now())) {
+            this.map.delete(key);
+            this.map.set(key, entry);
+            this.hits++;
+            return entry.value;
+        }
+        if (entry) this._remove(key, entry);
+        this.misses++;
+        return undefined;
+    }
+
+    set(key, value, bytes = estimateBytes(value)) {
+        if (bytes > this.maxBytes) return;
+        const old = this.map.get(key);
+        if (old) this._remove(key, old);
+        this.map.set(key, { value, bytes, expires: this.ttlMs ? this.now() + this.ttlMs : 0 });
+        this.bytes += bytes;
+        while (this.map.size > this.maxEntries || this.bytes > this.maxBytes) {
+            const [oldestKey, oldest] = this.map.entries().next().value;
+            this._remove(oldestKey, oldest);
+            this.evictions++;
+        }
+    }
+
+    clear() {
+        this.map.clear();
+        this.bytes = 0;
+    }
+
+    stats() {
+        const lookups = this.hits + this.misses;
+        return {
+            name: this.name,
+            entries: this.map.size,
+            bytes: this.bytes,
+            hits: this.hits,
+            misses: this.misses,
+            evictions: this.evictions,
+            hitRate: lookups ? this.hits / lookups : 0,
+        };
+    }
+
+    _remove(key, entry) {
+        this.map.delete(key);
+        this.bytes -= entry.bytes;
+    }
+}
+
+// Shared tier. Every call degrades to a miss / no-op when Redis is unavailable.
+class RedisTier {
+    constructor(url, ttlMs) {
+        this.ttlSeconds = Math.max(1, Math.round(ttlMs / 1000));
+        this.client = null;
+        try {
+            const { createClient } = require('redis');
+            this.client = createClient({ url });
+            this.client.on('error', (err) => console.warn('[cache] redis error:', err.message));
+            this.ready = this.client.connect().catch((err) => {
+                console.warn('[cache] redis unavailable, using local cache only:', err.message);
+                this.client = null;
+            });
+        } catch (err) {
+            console.warn('[cache] REDIS_URL is set but the redis package is not installed');
+        }
+    }
+
+    async get(key) {
+        if (!this.client) return undefined;
+        await this.ready;
+        try {
+            const raw = this.client && await this.client.get(key);
+            return raw ? JSON.parse(raw) : undefined;
+        } catch (err) {
+            return undefined;
+        }
+    }
+
+    async set(key, value) {
+        if (!this.client) return;
+        await this.ready;
+        try {
+            if (this.client) await this.client.set(key, JSON.stringify(value), { EX: this.ttlSeconds });
+        } catch (err) {
+            // best effort: the local tier already holds the value
+        }
+    }
+}
+
+// --- KEYS ---
+
+// Scoring is a sum over distinct terms, so term order and repeats don't change the result.
+// An all-words query may hold OR groups (arrays of terms): each is keyed as one sorted set.
+function resultKey(stemmedWords, method, topK) {
+    const keyOf = (word) => (Array.isArray(word) ? [...new Set(word)].sort().join('\u0002') : word);
+    const terms = [...new Set(stemmedWords.map(keyOf))].sort();
+    return `${method}|${topK}|${terms.join('\u0001')}`;
+}
+
+// --- QUERY CACHE ---
+
+class QueryCache {
+    constructor(options = {}) {
+        this.enabled = options.enabled ?? process.env.QUERY_CACHE !== 'off';
+        const now = options.now || Date.now;
+        this.results = new LRUCache({
+            name: 'results',
+            maxEntries: options.resultEntries ?? envInt('RESULT_CACHE_ENTRIES', 10000),
+            maxBytes: options.resultBytes ?? envInt('RESULT_CACHE_BYTES', 32 * 1024 * 1024),
+            ttlMs: options.resultTtlMs ?? envInt('RESULT_CACHE_TTL_MS', 10 * 60 * 1000),
+            now,
+        });
+        this.records = new LRUCache({
+            name: 'records',
+            maxBytes: options.recordBytes ?? envInt('RECORD_CACHE_BYTES', 64 * 1024 * 1024),
+            ttlMs: options.recordTtlMs ?? envInt('RECORD_CACHE_TTL_MS', 60 * 60 * 1000),
+            now,
+        });
+        const redisUrl = options.redisUrl ?? process.env.REDIS_URL;
+        this.shared = options.shared || (redisUrl ? new RedisTier(redisUrl, this.results.ttlMs) : null);
+        this.generation = options.generation || activeGeneration;
+        this.versionTtlMs = options.versionTtlMs ?? envInt('INDEX_VERSION_TTL_MS', 5000);
+        this.now = now;
+        this.version = null;
+        this.versionCheckedAt = -Infinity;
+        this.invalidations = 0;
+        this.listeners = [];
+    }
+
+    // callback() runs whenever a new index version is detected (e.g. to clear other caches)
+    onInvalidate(callback) {
+        this.listeners.push(callback);
+    }
+
+    // Current index version; clears the local tiers when a new index has been loaded
+    async checkVersion(db) {
+        if (this.now() - this.versionCheckedAt < this.versionTtlMs) return this.version;
+        this.versionCheckedAt = this.now();
+        const generation = await this.generation.refresh(db);
+        let version = generation && `generation:${generation}`;
+        if (!version) {
+            const meta = await db.collection('metaData').findOne({}, { projection: { _id: 0, indexVersion: 1 } });
+            version = String(meta?.indexVersion ?? 'unversioned');
+        }
+        if (this.version !== null && version !== this.version) {
+            this.results.clear();
+            this.records.clear();
+            this.invalidations++;
+            this.listeners.forEach(callback => callback(version));
+        }
+        this.version = version;
+        return version;
+    }
+
+    // Map<docId, score> of the top-k, from cache or from compute() (which returns the full sorted Map)
+    async topDocuments(db, stemmedWords, method, topK, compute) {
+        // checked even with caching off: other caches (postings) hang off the version too
+        const version = await this.checkVersion(db);
+        if (!this.enabled) return { docToScore: await compute(), hit: false };
+        const key = resultKey(stemmedWords, method, topK);
+
+        let pairs = this.results.get(key);
+        if (pairs === undefined && this.shared) {
+            pairs = await this.shared.get(`results:${version}:${key}`);
+            if (pairs !== undefined) this.results.set(key, pairs);
+        }
+        if (pairs !== undefined) return { docToScore: new Map(pairs), hit: true };
+
+        const sorted = await compute();
+        pairs = [];
+        for (const entry of sorted) {
+            pairs.push(entry);
+            if (pairs.length === topK) break;
+        }
+        // computed over an index that was switched away from meanwhile: return it, but don't cache it
+        if (this.version !== version) return { docToScore: new Map(pairs), hit: false };
+        this.results.set(key, pairs);
+        if (this.shared) await this.shared.set(`results:${version}:${key}`, pairs);
+        return { docToScore: new Map(pairs), hit: false };
+    }
+
+    // [fullDocs, chunkedList] like getResultDocuments, fetching only records not already cached
+    async resultDocuments(docToScore, fetch) {
+        if (!this.enabled) return fetch(docToScore);
+        const found = new Map();
+        const missing = new Map();
+        for (const [docId, score] of docToScore) {
+            const record = this.records.get(docId);
+            if (record !== undefined) found.set(docId, record);
+            else missing.set(docId, score);
+        }
+        if (missing.size > 0) {
+            const [docs] = await fetch(missing);
+            for (const doc of docs) {
+                this.records.set(doc.file_id, doc);
+                found.set(doc.file_id, doc);
+            }
+        }
+
+        const docs = [...docToScore.keys()].filter((id) => found.has(id)).map((id) => found.get(id));
+        const chunkedDataList = docs.map(doc => ({
+            _id: doc._id,
+            docId: doc.docId,
+            chunkedBody: doc.body,
+            filename: doc.filename,
+            url: doc.url,
+        }));
+        return [docs, chunkedDataList];
+    }
+
+    stats() {
+        return {
+            version: this.version,
+            invalidations: this.invalidations,
+            caches: [this.results.stats(), this.records.stats()],
+        };
+    }
+}
+
+// Prometheus text exposition of the cache counters; extra: stats() of other caches (e.g. postings)
+function metricsText(cache, extra = []) {
+    const { invalidations } = cache.stats();
+    const caches = [...cache.stats().caches, ...extra];
+    const lines = [
+        '# TYPE search_cache_hits_total counter',
+        ...caches.map(c => `search_cache_hits_total{cache="${c.name}"} ${c.hits}`),
+        '# TYPE search_cache_misses_total counter',
+        ...caches.map(c => `search_cache_misses_total{cache="${c.name}"} ${c.misses}`),
+        '# TYPE search_cache_evictions_total counter',
+        ...caches.map(c => `search_cache_evictions_total{cache="${c.name}"} ${c.evictions}`),
+        '# TYPE search_cache_hit_ratio gauge',
+        ...caches.map(c => `search_cache_hit_ratio{cache="${c.name}"} ${c.hitRate.toFixed(4)}`),
+        '# TYPE search_cache_bytes gauge',
+        ...caches.map(c => `search_cache_bytes{cache="${c.name}"} ${c.bytes}`),
+        '# TYPE search_cache_entries gauge',
+        ...caches.map(c => `search_cache_entries{cache="${c.name}"} ${c.entries}`),
+        '# TYPE search_cache_invalidations_total counter',
+        `search_cache_invalidations_total ${invalidations}`,
+    ];
+    return lines.join('\n') + '\n';
+}
+
+const queryCache = new QueryCache();
+
+module.exports = { LRUCache, QueryCache, RedisTier, resultKey, metricsText, queryCache };
@@ -0,0 +1,35 @@
+// === services/indexGeneration.js ===
+
+// Active index generation (mongodb_scripts/indexGenerations.py).
+// A rebuild is loaded into suffixed collections (invertedIndex__<generation>, wikipedia__<generation>, ...)
+// and made live by switching the {_id: 'active'} document of indexGenerations. The pointer is re-read
+// by QueryCache.checkVersion (every INDEX_VERSION_TTL_MS), which clears the caches on a switch, so a
+// running backend moves to the new generation without a restart. Without a pointer the unversioned
+// collections are used, as before.
+
+const GENERATIONS = 'indexGenerations';
+const SEPARATOR = '__';
+
+class ActiveGeneration {
+    constructor() {
+        this.generation = null;
+    }
+
+    // Re-reads the pointer; returns the active generation id (null: unversioned collections)
+    async refresh(db) {
+        const pointer = await db.collection(GENERATIONS).findOne({ _id: 'active' }, { projection: { generation: 1 } });
+        this.generation = pointer?.generation ?? null;
+        return this.generation;
+    }
+
+    // Collection names of the active generation. Callers take one snapshot per request, so a switch
+    // in the middle of a query never mixes the postings of one generation with the stats of another.
+    snapshot() {
+        const generation = this.generation;
+        return { generation, name: (base) => (generation ? `${base}${SEPARATOR}${generation}` : base) };
+    }
+}
+
+const activeGeneration = new ActiveGeneration();
+
+module.exports = { ActiveGeneration, activeGeneration };
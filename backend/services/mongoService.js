@@ -1,60 +1,147 @@
 // === services/mongoService.js ===
 const fs = require('fs');
+const { postingsCache, readQueryLog, warmPostingsCache } = require('./postingsCache');
+const { queryCache } = require('./cacheService');
+const { activeGeneration } = require('./indexGeneration');
+const { rankTermAtATime, rankConjunctive, postingsEntry } = require('./rankingService');
 
 // === services/mongoService.js ===
 
 // services/mongoService.js
 
-async function getDocuments(client, stemmedWords, rankingMethod = 'tfidf') {
-    const k1 = 1.5;
-    const b = 0.75;
+// Postings layout read at query time:
+// - 'legacy':  invertedIndex, one document per term with a docIdList array of objects
+// - 'chunked': invertedIndexChunks, one document per (word, chunk) with packed BinData columns
+//              (written by mongodb_scripts/insertIndex.py --layout chunked)
+const INDEX_LAYOUT = (process.env.INDEX_LAYOUT || 'legacy').toLowerCase();
+const DOC_ID_BYTES = 16; // docIds are md5 file ids, packed as raw 16-byte digests
+
+// decodeChunk turns one chunk document into compact columns
+// { docIds: string[], tfs: Uint32Array, docLens: Uint32Array }.
+function decodeChunk(chunk) {
+    const ids = chunk.docIds.buffer;
+    const tfBytes = chunk.tfs.buffer;
+    const lenBytes = chunk.docLens.buffer;
+    const count = ids.length / DOC_ID_BYTES;
+
+    const docIds = new Array(count);
+    const tfs = new Uint32Array(count);
+    const docLens = new Uint32Array(count);
+    for (let i = 0; i < count; i++) {
+        docIds[i] = ids.toString('hex', i * DOC_ID_BYTES, (i + 1) * DOC_ID_BYTES);
+        tfs[i] = tfBytes.readUInt32LE(i * 4);
+        docLens[i] = lenBytes.readUInt32LE(i * 4);
+    }
+    return { docIds, tfs, docLens };
+}
 
-    const db = client.db('ir');
+// A new index version makes every cached postings list stale
+queryCache.onInvalidate(() => postingsCache.clear());
+
+// fetchPostings returns Map<word, { df, docIds, tfs, docLens, blocks }> (postingsEntry) for the query terms.
+// Terms in the postings cache are served from memory; the rest are read from MongoDB and offered to it.
+// gen: collection names of one index generation (activeGeneration.snapshot()).
+async function fetchPostings(db, stemmedWords, gen = activeGeneration.snapshot()) {
+    const postings = new Map();
+    const missing = [];
+    for (const word of new Set(stemmedWords)) {
+        const cached = postingsCache.get(word);
+        if (cached !== undefined) postings.set(word, cached);
+        else missing.push(word);
+    }
+    if (missing.length > 0) {
+        const read = await readPostings(db, missing, gen);
+        // the cache belongs to the active generation; a read of a generation switched away from is not kept
+        const current = activeGeneration.snapshot().generation === gen.generation;
+        for (const [word, entry] of read) {
+            if (current) postingsCache.set(word, entry);
+            postings.set(word, entry);
+        }
+    }
+    return postings;
+}
 
-    // fetch meta + postings in parallel
-    const [stats, indexEntries] = await Promise.all([
-        db.collection('metaData').findOne({}, { projection: { _id: 0, N: 1, avgdl: 1 } }),
-        db.collection('invertedIndex')
+// readPostings reads the columns the scorer uses straight from MongoDB, sorted by docId.
+async function readPostings(db, stemmedWords, gen = activeGeneration.snapshot()) {
+    const postings = new Map();
+
+    if (INDEX_LAYOUT === 'chunked') {
+        const chunks = await db.collection(gen.name('invertedIndexChunks'))
             .find(
                 { word: { $in: stemmedWords } },
-                { projection: { _id: 0, 'word': 1, 'docIdList.docId': 1, 'docIdList.tf': 1, 'docIdList.doc_len': 1 } }
+                { projection: { _id: 0, word: 1, chunk: 1, df: 1, docIds: 1, tfs: 1, docLens: 1 } }
             )
-            .toArray(),
-    ]);
+            .toArray();
+
+        // chunks hold consecutive runs of the term-sorted input: in chunk order, the docIds stay sorted
+        chunks.sort((a, b) => a.chunk - b.chunk);
+        const parts = new Map();
+        for (const chunk of chunks) {
+            if (!parts.has(chunk.word)) parts.set(chunk.word, { df: chunk.df, decoded: [] });
+            parts.get(chunk.word).decoded.push(decodeChunk(chunk));
+        }
+        for (const [word, { df, decoded }] of parts) {
+            const { docIds, tfs, docLens } = decoded.length === 1 ? decoded[0] : concatColumns(decoded);
+            postings.set(word, postingsEntry(df, docIds, tfs, docLens));
+        }
+        return postings;
+    }
 
-    const N = stats.N;
-    const avgdl = stats.avgdl;
-
-    const scores = Object.create(null);
-
-    for (let i = 0; i < indexEntries.length; i++) {
-        const posting = indexEntries[i].docIdList;
-        const df = posting.length;
-
-        if (rankingMethod === 'bm25') {
-            const idf = Math.log((N - df + 0.5) / (df + 0.5) + 1);
-            for (let j = 0; j < posting.length; j++) {
-                const { docId, tf, doc_len: dl } = posting[j];
-                const numerator = tf * (k1 + 1);
-                const denominator = tf + k1 * (1 - b + b * (dl / avgdl));
-                scores[docId] = (scores[docId] || 0) + idf * (numerator / denominator);
-            }
-        } else {
-            const idf = Math.log(N / df);
-            for (let j = 0; j < posting.length; j++) {
-                const { docId, tf } = posting[j];
-                scores[docId] = (scores[docId] || 0) + tf * idf;
-            }
+    const entries = await db.collection(gen.name('invertedIndex'))
+        .find(
+            { word: { $in: stemmedWords } },
+            { projection: { _id: 0, 'word': 1, 'docIdList.docId': 1, 'docIdList.tf': 1, 'docIdList.doc_len': 1 } }
+        )
+        .toArray();
+
+    for (const entry of entries) {
+        const list = entry.docIdList;
+        const tfs = new Uint32Array(list.length);
+        const docLens = new Uint32Array(list.length);
+        const docIds = new Array(list.length);
+        for (let j = 0; j < list.length; j++) {
+            docIds[j] = list[j].docId;
+            tfs[j] = list[j].tf;
+            docLens[j] = list[j].doc_len;
         }
+        postings.set(entry.word, postingsEntry(list.length, docIds, tfs, docLens));
     }
+    return postings;
+}
 
-        const docToScoreMapSorted = new Map(
-        Object.entries(scores).sort((a, b) => b[1] - a[1])
-    );
+function concatColumns(decoded) {
+    const total = decoded.reduce((sum, d) => sum + d.tfs.length, 0);
+    const docIds = [];
+    const tfs = new Uint32Array(total);
+    const docLens = new Uint32Array(total);
+    let offset = 0;
+    for (const d of decoded) {
+        for (const id of d.docIds) docIds.push(id);
+        tfs.set(d.tfs, offset);
+        docLens.set(d.docLens, offset);
+        offset += d.tfs.length;
+    }
+    return { docIds, tfs, docLens };
+}
 
-    // Only return what you use
-    return docToScoreMapSorted;
+// getDocuments returns Map<file_id, score> of the topK best documents, best first.
+// stats (optional) receives the postings total / visited / scored / skipped by the ranking.
+// match: 'any' ranks documents holding any of the words, 'all' only those holding every word
+// (with 'all', a word may be an array of alternatives: a word and its spelling expansions).
+async function getDocuments(client, stemmedWords, rankingMethod = 'tfidf', topK = 50, stats = {}, match = 'any') {
+    const db = client.db('ir');
+    const gen = activeGeneration.snapshot();
 
+    // fetch meta + postings in parallel
+    const [meta, postingsByWord] = await Promise.all([
+        db.collection(gen.name('metaData')).findOne({}, { projection: { _id: 0, N: 1, avgdl: 1 } }),
+        fetchPostings(db, stemmedWords.flat(), gen),
+    ]);
+
+    const params = { N: meta.N, avgdl: meta.avgdl, method: rankingMethod, topK };
+    if (match === 'all') return rankConjunctive(postingsByWord, stemmedWords, params, stats);
+    // rarest terms first; common terms stop admitting new candidates once they can't reach the top-k
+    return rankTermAtATime(postingsByWord, params, stats);
 }
 
 // === services/mongoService.js ===
@@ -78,11 +165,11 @@ async function getResultDocuments(client, docToScoreMapSorted, topK = 50, bodySl
         body: 1,
         filename: 1,
         url: 1,
-        images: 1,
+        'images.image_id': 1, // getImageFilenames only reads the ids, not the stored paths
         file_id: 1,
     };
 
-    let cursor = client.db('ir').collection('wikipedia').find(
+    let cursor = client.db('ir').collection(activeGeneration.snapshot().name('wikipedia')).find(
         { file_id: { $in: topDocIds } },
         { projection }
     );
@@ -114,4 +201,29 @@ async function getResultDocuments(client, docToScoreMapSorted, topK = 50, bodySl
 }
 
 
-module.exports = { getDocuments, getResultDocuments};
+// Stemming setting of the served index (metaData.stemming, from the indexer's stats), read once
+// per index version. Indexes that don't record it were always queried with stemming.
+let servedStemming = { version: null, stemming: true };
+
+async function indexStemming(client) {
+    const db = client.db('ir');
+    const version = await queryCache.checkVersion(db);
+    if (servedStemming.version !== version) {
+        const meta = await db.collection(activeGeneration.snapshot().name('metaData'))
+            .findOne({}, { projection: { _id: 0, stemming: 1 } });
+        servedStemming = { version, stemming: meta?.stemming ?? true };
+    }
+    return servedStemming.stemming;
+}
+
+// warmPostings preloads the postings of the most frequent terms in a query log
+async function warmPostings(client, logPath, stem) {
+    const db = client.db('ir');
+    await queryCache.checkVersion(db); // resolves the active generation before anything is read
+    const queries = readQueryLog(logPath);
+    return warmPostingsCache(postingsCache, queries, stem, (terms) => readPostings(db, terms));
+}
+
+module.exports = {
+    getDocuments, getResultDocuments, fetchPostings, readPostings, warmPostings, decodeChunk, indexStemming,
+};
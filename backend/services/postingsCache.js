@@ -0,0 +1,209 @@
+// === services/postingsCache.js ===
+
+// In-process cache of decoded postings: term -> { df, docIds, tfs: Uint32Array, docLens: Uint32Array, blocks }
+// (the entries fetchPostings returns), so popular terms are never re-read from MongoDB.
+// - eviction is by estimated bytes (LRU order), not entry count: one common term can outweigh
+//   thousands of rare ones
+// - admission is TinyLFU-style: a count-min sketch tracks how often each term is requested, and a
+//   new term only displaces the LRU victim if it has been requested more often than the victim
+// - the cache can be warmed from a query log at startup (POSTINGS_WARM_LOG)
+
+const fs = require('fs');
+
+const envInt = (name, fallback) => {
+    const value = parseInt(process.env[name], 10);
+    return Number.isFinite(value) ? value : fallback;
+};
+
+// Approximate heap cost of one posting: a 32-char hex docId string plus two uint32 columns
+const BYTES_PER_POSTING = 64 + 8;
+// One block summary: a reference to its last docId string plus the two uint32 maxima
+const BYTES_PER_BLOCK = 8 + 8;
+const ENTRY_OVERHEAD = 200;
+
+function entryBytes(entry) {
+    const blocks = entry.blocks ? entry.blocks.last.length : 0;
+    return ENTRY_OVERHEAD + entry.docIds.length * BYTES_PER_POSTING + blocks * BYTES_PER_BLOCK;
+}
+
+// --- FREQUENCY SKETCH ---
+
+// Count-min sketch with 4 rows of small saturating counters. All counters are halved every
+// `sampleSize` increments, so the sketch follows recent popularity rather than all-time counts.
+class FrequencySketch {
+    constructor(width = 1 << 14, sampleSize = width * 10) {
+        this.width = width;
+        this.rows = [0, 1, 2, 3].map(() => new Uint8Array(width));
+        this.seeds = [0x9747b28c, 0x85ebca6b, 0xc2b2ae35, 0x27d4eb2f];
+        this.sampleSize = sampleSize;
+        this.additions = 0;
+    }
+
+    _index(key, row) {
+        // FNV-1a, seeded per row
+        let h = this.seeds[row] ^ 0x811c9dc5;
+        for (let i = 0; i < key.length; i++) {
+            h ^= key.charCodeAt(i);
+            h = Math.imul(h, 0x01000193);
+        }
+        return (h >>> 0) % this.width;
+    }
+
+    increment(key) {
+        for (let r = 0; r < this.rows.length; r++) {
+            const i = this._index(key, r);
+            if (this.rows[r][i] < 15) this.rows[r][i]++;
+        }
+        if (++this.additions >= this.sampleSize) this._age();
+    }
+
+    estimate(key) {
+        let min = Infinity;
+        for (let r = 0; r < this.rows.length; r++) {
+            min = Math.min(min, this.rows[r][this._index(key, r)]);
+        }
+        return min;
+    }
+
+    _age() {
+        for (const row of this.rows) {
+            for (let i = 0; i < row.length; i++) row[i] >>= 1;
+        }
+        this.additions = Math.floor(this.additions / 2);
+    }
+}
+
+// --- CACHE ---
+
+class PostingsCache {
+    constructor({ maxBytes = envInt('POSTINGS_CACHE_BYTES', 256 * 1024 * 1024), sketchWidth } = {}) {
+        this.maxBytes = maxBytes;
+        this.sketch = new FrequencySketch(sketchWidth);
+        this.map = new Map(); // term -> { entry, bytes }, oldest first
+        this.bytes = 0;
+        this.hits = 0;
+        this.misses = 0;
+        this.evictions = 0;
+        this.rejections = 0;
+    }
+
+    get(term) {
+        this.sketch.increment(term);
+        const slot = this.map.get(term);
+        if (slot === undefined) {
+            this.misses++;
+            return undefined;
+        }
+        this.map.delete(term);
+        this.map.set(term, slot);
+        this.hits++;
+        return slot.entry;
+    }
+
+    // Returns true if the entry was admitted
+    set(term, entry) {
+        const bytes = entryBytes(entry);
+        if (bytes > this.maxBytes) {
+            this.rejections++;
+            return false;
+        }
+        // An entry replacing this term's old one is admitted with the old entry's bytes credited
+        const old = this.map.get(term);
+
+        // Pick victims first, so a rejected candidate leaves the cache untouched (old entry included)
+        const victims = [];
+        let freed = old ? old.bytes : 0;
+        const frequency = this.sketch.estimate(term);
+        for (const [victim, slot] of this.map) {
+            if (this.bytes - freed + bytes <= this.maxBytes) break;
+            if (victim === term) continue;
+            if (this.sketch.estimate(victim) >= frequency) {
+                this.rejections++;
+                return false;
+            }
+            victims.push(victim);
+            freed += slot.bytes;
+        }
+        if (old) this._remove(term, old);
+        for (const victim of victims) {
+            this._remove(victim, this.map.get(victim));
+            this.evictions++;
+        }
+        this.map.set(term, { entry, bytes });
+        this.bytes += bytes;
+        return true;
+    }
+
+    clear() {
+        this.map.clear();
+        this.bytes = 0;
+    }
+
+    stats() {
+        const lookups = this.hits + this.misses;
+        return {
+            name: 'postings',
+            entries: this.map.size,
+            bytes: this.bytes,
+            hits: this.hits,
+            misses: this.misses,
+            evictions: this.evictions,
+            rejections: this.rejections,
+            hitRate: lookups ? this.hits / lookups : 0,
+        };
+    }
+
+    _remove(term, slot) {
+        this.map.delete(term);
+        this.bytes -= slot.bytes;
+    }
+}
+
+// --- WARM-UP ---
+
+// Queries from a log: one query per line, or JSON lines with a "query" field
+function readQueryLog(path) {
+    return fs.readFileSync(path, 'utf8')
+        .split('\n')
+        .map(line => line.trim())
+        .filter(Boolean)
+        .map(line => {
+            if (!line.startsWith('{')) return line;
+            try {
+                return JSON.parse(line).query || '';
+            } catch (err) {
+                return '';
+            }
+        })
+        .filter(Boolean);
+}
+
+// Stem the logged queries, then load the most frequent terms (most popular first) into the cache.
+// loadPostings(terms) -> Map<term, entry> reads them from MongoDB.
+async function warmPostingsCache(cache, queries, stem, loadPostings, { maxTerms = 5000, batchSize = 100 } = {}) {
+    const counts = new Map();
+    for (const query of queries) {
+        for (const term of new Set(await stem(query))) {
+            counts.set(term, (counts.get(term) || 0) + 1);
+            cache.sketch.increment(term);
+        }
+    }
+    const terms = [...counts.entries()]
+        .sort((a, b) => b[1] - a[1])
+        .slice(0, maxTerms)
+        .map(([term]) => term);
+
+    let loaded = 0;
+    for (let i = 0; i < terms.length; i += batchSize) {
+        const postings = await loadPostings(terms.slice(i, i + batchSize));
+        for (const [term, entry] of postings) {
+            if (cache.set(term, entry)) loaded++;
+        }
+        if (cache.bytes >= cache.maxBytes) break;
+    }
+    return loaded;
+}
+
+const postingsCache = new PostingsCache();
+
+module.exports = { FrequencySketch, PostingsCache, entryBytes, readQueryLog, warmPostingsCache, postingsCache };
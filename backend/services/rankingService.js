@@ -0,0 +1,396 @@
+// === services/rankingService.js ===
+
+// Term-at-a-time top-k ranking with quit/continue pruning, over the postings getDocuments reads.
+// Terms are scored rarest first (decreasing IDF). Before each term, the contributions still to come
+// are bounded by the sum of the remaining terms' maximum contributions; once that bound cannot lift a
+// document with no score yet above the current k-th best score, no new accumulators are created
+// ("continue"): the remaining lists only update documents that can still make the top-k, and
+// accumulators that cannot are dropped. Scores of the returned top-k are exact.
+//
+// Conjunctive (match=all) queries are evaluated document-at-a-time instead (rankConjunctive): cursors
+// over the docId-sorted lists gallop to the shortest list's documents and skip blocks on block maxima.
+
+const K1 = 1.5;
+const B = 0.75;
+// bounds are summed in a different order than the scores: pad them so rounding never makes one unsafe
+const BOUND_SLACK = 1e-9;
+
+// Largest per-posting factor of a list (tf for TF-IDF, the BM25 tf part). Computed per request:
+// entries are shared through the postings cache, whose byte budget only counts the columns.
+function maxFactor(entry, method, avgdl) {
+    let max = 0;
+    for (let j = 0; j < entry.tfs.length; j++) {
+        const tf = entry.tfs[j];
+        const factor = method === 'bm25' ? (tf * (K1 + 1)) / (tf + K1 * (1 - B + B * (entry.docLens[j] / avgdl))) : tf;
+        if (factor > max) max = factor;
+    }
+    return max;
+}
+
+function termIdf(method, N, df) {
+    return method === 'bm25' ? Math.log((N - df + 0.5) / (df + 0.5) + 1) : Math.log(N / df);
+}
+
+function contribution(method, idf, tf, docLen, avgdl) {
+    return method === 'bm25' ? idf * ((tf * (K1 + 1)) / (tf + K1 * (1 - B + B * (docLen / avgdl)))) : tf * idf;
+}
+
+// Min-heap of the k best [docId, score] pairs
+class TopK {
+    constructor(k) {
+        this.k = k;
+        this.heap = [];
+    }
+
+    get threshold() {
+        return this.heap.length === this.k ? this.heap[0][1] : -Infinity;
+    }
+
+    push(docId, score) {
+        const heap = this.heap;
+        if (heap.length < this.k) {
+            heap.push([docId, score]);
+            let i = heap.length - 1;
+            while (i > 0) {
+                const parent = (i - 1) >> 1;
+                if (heap[parent][1] <= heap[i][1]) break;
+                [heap[parent], heap[i]] = [heap[i], heap[parent]];
+                i = parent;
+            }
+        } else if (score > heap[0][1]) {
+            heap[0] = [docId, score];
+            let i = 0;
+            for (;;) {
+                const l = 2 * i + 1;
+                const r = l + 1;
+                let m = i;
+                if (l < heap.length && heap[l][1] < heap[m][1]) m = l;
+                if (r < heap.length && heap[r][1] < heap[m][1]) m = r;
+                if (m === i) break;
+                [heap[m], heap[i]] = [heap[i], heap[m]];
+                i = m;
+            }
+        }
+    }
+
+    sorted() {
+        return this.heap.slice().sort((a, b) => b[1] - a[1]);
+    }
+}
+
+// k-th best score of the accumulators (-Infinity while there are fewer than k)
+function kthScore(acc, k) {
+    if (acc.size < k) return -Infinity;
+    const top = new TopK(k);
+    for (const [docId, score] of acc) top.push(docId, score);
+    return top.threshold;
+}
+
+// postingsByWord: Map<word, { df, docIds, tfs, docLens }> (fetchPostings).
+// Returns Map<docId, score> of the top-k, best first; stats (optional) gets
+// { total, visited, scored, skipped, prunedAt }: postings in the lists, read, scored and never read
+// (every posting is read term-at-a-time), and prunedAt, the number of terms scored before new
+// candidates stopped being admitted (null if they never did).
+function rankTermAtATime(postingsByWord, { N, avgdl, method = 'tfidf', topK = 50 }, stats = {}) {
+    const terms = [];
+    for (const entry of postingsByWord.values()) {
+        if (!entry.docIds.length) continue;
+        const idf = termIdf(method, N, entry.df);
+        terms.push({ entry, idf, bound: idf * maxFactor(entry, method, avgdl) });
+    }
+    terms.sort((a, b) => b.idf - a.idf);
+
+    // remaining[i]: most that terms i.. can add to any document
+    const remaining = new Array(terms.length + 1).fill(0);
+    for (let i = terms.length - 1; i >= 0; i--) remaining[i] = remaining[i + 1] + Math.max(terms[i].bound, 0) * (1 + BOUND_SLACK);
+
+    const acc = new Map();
+    let admitting = true;
+    let scored = 0;
+    let total = 0;
+    let prunedAt = null;
+    let processed = 0; // most any document can have so far: the k-th best score is below it
+
+    for (let i = 0; i < terms.length; i++) {
+        const { entry, idf } = terms[i];
+        total += entry.docIds.length;
+
+        if (acc.size >= topK && remaining[i] <= processed) {
+            const threshold = kthScore(acc, topK);
+            if (admitting && remaining[i] <= threshold) {
+                admitting = false;
+                prunedAt = i;
+            }
+            if (!admitting) {
+                // documents that cannot reach the k-th best score any more
+                for (const [docId, score] of acc) if (score + remaining[i] < threshold) acc.delete(docId);
+            }
+        }
+
+        const { docIds, tfs, docLens } = entry;
+        for (let j = 0; j < docIds.length; j++) {
+            const current = acc.get(docIds[j]);
+            if (current === undefined && !admitting) continue;
+            acc.set(docIds[j], (current || 0) + contribution(method, idf, tfs[j], docLens[j], avgdl));
+            scored++;
+        }
+        processed += Math.max(terms[i].bound, 0);
+    }
+
+    const top = new TopK(topK);
+    for (const [docId, score] of acc) top.push(docId, score);
+    Object.assign(stats, { total, visited: total, scored, skipped: 0, prunedAt });
+    return new Map(top.sorted());
+}
+
+// --- CONJUNCTIVE (DAAT) ---
+
+// Postings entries keep their docIds sorted, with one block summary per BLOCK_SIZE postings:
+// the block's last docId (a skip pointer) and its largest tf / smallest doc length. Any BM25
+// contribution in the block is at most the one of (max tf, min length), so the bound needs no avgdl.
+const BLOCK_SIZE = 64;
+
+const compareIds = (a, b) => (a < b ? -1 : a > b ? 1 : 0);
+
+// postingsEntry builds the entry fetchPostings returns (and the postings cache keeps) from columns
+// in any order: sorted by docId once here, never modified afterwards.
+function postingsEntry(df, docIds, tfs, docLens) {
+    let sorted = true;
+    for (let j = 1; j < docIds.length && sorted; j++) sorted = docIds[j - 1] <= docIds[j];
+    if (!sorted) {
+        const order = Array.from(docIds.keys()).sort((a, b) => compareIds(docIds[a], docIds[b]));
+        docIds = order.map((j) => docIds[j]);
+        tfs = Uint32Array.from(order, (j) => tfs[j]);
+        docLens = Uint32Array.from(order, (j) => docLens[j]);
+    }
+    const count = Math.ceil(docIds.length / BLOCK_SIZE);
+    const blocks = { last: new Array(count), maxTf: new Uint32Array(count), minLen: new Uint32Array(count) };
+    for (let b = 0; b < count; b++) {
+        const end = Math.min((b + 1) * BLOCK_SIZE, docIds.length);
+        let maxTf = 0;
+        let minLen = 0xffffffff;
+        for (let j = b * BLOCK_SIZE; j < end; j++) {
+            if (tfs[j] > maxTf) maxTf = tfs[j];
+            if (docLens[j] < minLen) minLen = docLens[j];
+        }
+        blocks.last[b] = docIds[end - 1];
+        blocks.maxTf[b] = maxTf;
+        blocks.minLen[b] = minLen;
+    }
+    return { df, docIds, tfs, docLens, blocks };
+}
+
+// First index >= from of a sorted array whose value is >= target (> target if after), or its length.
+// Galloping: doubling steps from `from`, then a binary search in the last step.
+function gallop(values, target, from, after = false) {
+    const before = after ? (v) => v <= target : (v) => v < target;
+    if (from >= values.length || !before(values[from])) return from;
+    let lo = from; // values[lo] is before target
+    let step = 1;
+    let hi = lo + step;
+    while (hi < values.length && before(values[hi])) {
+        lo = hi;
+        step *= 2;
+        hi = lo + step;
+    }
+    hi = Math.min(hi, values.length);
+    while (lo + 1 < hi) {
+        const mid = (lo + hi) >> 1;
+        if (before(values[mid])) lo = mid;
+        else hi = mid;
+    }
+    return hi;
+}
+
+// Cursor over one sorted postings entry. stats.visited counts the postings it stops on.
+class Cursor {
+    constructor(word, entry, method, idf, avgdl, stats) {
+        this.word = word;
+        this.entry = entry;
+        this.method = method;
+        this.idf = idf;
+        this.avgdl = avgdl;
+        this.stats = stats;
+        this.pos = 0;
+        this.block = 0;
+        stats.visited++;
+    }
+
+    get length() {
+        return this.entry.docIds.length;
+    }
+
+    get doc() {
+        return this.pos < this.entry.docIds.length ? this.entry.docIds[this.pos] : null;
+    }
+
+    // the cursors positioned on docId (this one or none)
+    at(docId) {
+        return this.doc === docId ? [this] : [];
+    }
+
+    score() {
+        this.stats.scored++;
+        const { tfs, docLens } = this.entry;
+        return contribution(this.method, this.idf, tfs[this.pos], docLens[this.pos], this.avgdl);
+    }
+
+    next() {
+        this.pos++;
+        if (this.pos < this.length) this.stats.visited++;
+    }
+
+    // Advance to the first docId >= target (> target if after)
+    seek(target, after = false) {
+        const pos = gallop(this.entry.docIds, target, this.pos, after);
+        if (pos === this.pos) return;
+        this.pos = pos;
+        if (pos < this.length) this.stats.visited++;
+    }
+
+    // Block that would hold docId (targets only grow, so the search starts at the last one found)
+    blockFor(docId) {
+        this.block = gallop(this.entry.blocks.last, docId, this.block);
+        return this.block;
+    }
+
+    blockMax(docId) {
+        const { blocks } = this.entry;
+        const b = this.blockFor(docId);
+        if (b >= blocks.last.length) return 0;
+        return contribution(this.method, this.idf, blocks.maxTf[b], blocks.minLen[b], this.avgdl);
+    }
+
+    blockLast(docId) {
+        const { blocks } = this.entry;
+        const b = this.blockFor(docId);
+        return b < blocks.last.length ? blocks.last[b] : null;
+    }
+}
+
+// Cursor over the union of an OR group's lists (a word and its spelling expansions)
+class UnionCursor {
+    constructor(cursors) {
+        this.cursors = cursors;
+        this.settle();
+    }
+
+    get length() {
+        return this.cursors.reduce((sum, c) => sum + c.length, 0);
+    }
+
+    at(docId) {
+        return this.cursors.filter((c) => c.doc === docId);
+    }
+
+    next() {
+        const doc = this.doc;
+        for (const c of this.cursors) if (c.doc === doc) c.next();
+        this.settle();
+    }
+
+    seek(target, after = false) {
+        for (const c of this.cursors) c.seek(target, after);
+        this.settle();
+    }
+
+    blockMax(docId) {
+        return this.cursors.reduce((sum, c) => sum + c.blockMax(docId), 0);
+    }
+
+    // up to the first block end, every list stays in its current block
+    blockLast(docId) {
+        let last = null;
+        for (const c of this.cursors) {
+            const blockLast = c.blockLast(docId);
+            if (blockLast !== null && (last === null || blockLast < last)) last = blockLast;
+        }
+        return last;
+    }
+
+    settle() {
+        this.doc = null;
+        for (const c of this.cursors) if (c.doc !== null && (this.doc === null || c.doc < this.doc)) this.doc = c.doc;
+    }
+}
+
+// Top-k of the documents holding every one of stemmedWords (empty if any has no postings), same
+// return value as rankTermAtATime. Document-at-a-time intersection, like search_engine/topk.py
+// _conjunctive: the shortest list leads and the others are only probed at its docIds with galloping
+// seeks. Once the top-k is full, blocks whose summed maxima cannot beat the k-th best score are
+// skipped whole. A word may be an array of alternatives (an OR group): its cursor walks their union.
+// stats gets { total, visited, scored, skipped, prunedAt: null }.
+function rankConjunctive(postingsByWord, stemmedWords, { N, avgdl, method = 'tfidf', topK = 50 }, stats = {}) {
+    const counts = { total: 0, visited: 0, scored: 0 };
+    const groups = new Map(); // a word, or an array of alternatives (OR group) of which a document needs one
+    for (const word of stemmedWords) {
+        const group = [...new Set(Array.isArray(word) ? word : [word])];
+        groups.set(group.slice().sort().join('\u0001'), group);
+    }
+    const cursors = [];
+    for (const group of groups.values()) {
+        const members = [];
+        for (const word of group) {
+            const entry = postingsByWord.get(word);
+            if (!entry || !entry.docIds.length) continue;
+            members.push(new Cursor(word, entry, method, termIdf(method, N, entry.df), avgdl, counts));
+            counts.total += entry.docIds.length;
+        }
+        if (!members.length) {
+            Object.assign(stats, { total: 0, visited: 0, scored: 0, skipped: 0, prunedAt: null });
+            return new Map();
+        }
+        cursors.push(members.length === 1 ? members[0] : new UnionCursor(members));
+    }
+    cursors.sort((a, b) => a.length - b.length);
+    const [lead, ...others] = cursors;
+
+    const top = new TopK(topK);
+    while (lead.doc !== null) {
+        const doc = lead.doc;
+        const threshold = top.threshold;
+        if (threshold !== -Infinity) {
+            let bound = 0;
+            for (const c of cursors) bound += c.blockMax(doc);
+            if (bound * (1 + BOUND_SLACK) <= threshold) {
+                // no docId up to the end of the shallowest current block can make it: jump past it
+                let last = null;
+                for (const c of cursors) {
+                    const blockLast = c.blockLast(doc);
+                    if (blockLast === null) return finish(top, counts, stats);
+                    if (last === null || blockLast < last) last = blockLast;
+                }
+                lead.seek(last, true);
+                continue;
+            }
+        }
+        let matched = true;
+        for (const c of others) {
+            c.seek(doc);
+            if (c.doc === null) return finish(top, counts, stats);
+            if (c.doc !== doc) {
+                // c holds nothing from doc to c.doc: resume the lead there
+                lead.seek(c.doc);
+                matched = false;
+                break;
+            }
+        }
+        if (matched) {
+            // a word in several OR groups (a shared expansion) is scored once
+            const held = new Map();
+            for (const group of cursors) for (const c of group.at(doc)) held.set(c.word, c);
+            let score = 0;
+            for (const c of held.values()) score += c.score();
+            top.push(doc, score);
+            lead.next();
+        }
+    }
+    return finish(top, counts, stats);
+}
+
+function finish(top, counts, stats) {
+    Object.assign(stats, { ...counts, skipped: counts.total - counts.visited, prunedAt: null });
+    return new Map(top.sorted());
+}
+
+module.exports = { rankTermAtATime, rankConjunctive, postingsEntry, maxFactor, TopK, BLOCK_SIZE };
@@ -0,0 +1,174 @@
+// === services/spellService.js ===
+
+// Expansion of misspelled query terms with the SymSpell deletion index written by
+// `python -m search_engine.build --spell` (<index>/spell/, layout documented in search_engine/spell.py).
+// A term that is not in the dictionary (or has at most SPELL_EXPAND_BELOW_DF hits) is looked up
+// under its deletion variants; the closest, most frequent dictionary terms within SPELL_MAX_EDITS
+// edits are searched in its place. At most SPELL_MAX_EXPANSIONS terms per query term, and no more
+// than SPELL_MAX_POSTINGS postings added, so fuzzy matching cannot blow up the postings reads.
+
+const fs = require('fs');
+const path = require('path');
+const { FrontCoded, uint32s } = require('../utils/frontCoded');
+
+const envInt = (name, fallback) => {
+    const value = parseInt(process.env[name], 10);
+    return Number.isFinite(value) ? value : fallback;
+};
+
+// The word's prefix and every string made by deleting up to maxEdits characters from it
+function deletes(word, maxEdits, prefixLength) {
+    let level = new Set([word.slice(0, prefixLength)]);
+    const found = new Set(level);
+    for (let e = 0; e < maxEdits; e++) {
+        const next = new Set();
+        for (const w of level) {
+            if (w.length < 2) continue;
+            for (let i = 0; i < w.length; i++) {
+                const variant = w.slice(0, i) + w.slice(i + 1);
+                if (!found.has(variant)) next.add(variant);
+            }
+        }
+        next.forEach(v => found.add(v));
+        level = next;
+    }
+    return found;
+}
+
+// Optimal string alignment distance, or limit + 1 when it exceeds limit
+function editDistance(a, b, limit) {
+    if (Math.abs(a.length - b.length) > limit) return limit + 1;
+    let previous2 = null;
+    let previous = Array.from({ length: b.length + 1 }, (_, j) => j);
+    for (let i = 1; i <= a.length; i++) {
+        const current = [i];
+        let rowMin = i;
+        for (let j = 1; j <= b.length; j++) {
+            let d = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] === b[j - 1] ? 0 : 1));
+            if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) d = Math.min(d, previous2[j - 2] + 1);
+            current.push(d);
+            rowMin = Math.min(rowMin, d);
+        }
+        if (rowMin > limit) return limit + 1;
+        previous2 = previous;
+        previous = current;
+    }
+    return previous[b.length] <= limit ? previous[b.length] : limit + 1;
+}
+
+const isAlpha = (term) => /^[A-Za-z]+$/.test(term);
+
+class Speller {
+    // files: { meta, terms, termBlocks, dfs, deletes, deleteBlocks, deleteOffsets, deleteTerms } (Buffers)
+    constructor(files, options = {}) {
+        this.meta = files.meta;
+        this.terms = new FrontCoded(files.terms, uint32s(files.termBlocks), this.meta.block);
+        this.deletes = new FrontCoded(files.deletes, uint32s(files.deleteBlocks), this.meta.block);
+        this.dfs = uint32s(files.dfs);
+        this.deleteOffsets = uint32s(files.deleteOffsets);
+        this.deleteTerms = uint32s(files.deleteTerms);
+        this.maxEdits = Math.min(options.maxEdits ?? this.meta.max_edits, this.meta.max_edits);
+        this.maxExpansions = options.maxExpansions ?? 2;
+        this.lowDf = options.lowDf ?? 0;
+        this.maxPostings = options.maxPostings ?? 500000;
+    }
+
+    static open(indexDir, options) {
+        const dir = path.join(indexDir, 'spell');
+        const read = (name) => Buffer.from(fs.readFileSync(path.join(dir, name)));
+        const meta = JSON.parse(fs.readFileSync(path.join(dir, 'spell.json'), 'utf8'));
+        if (meta.format !== 1) throw new Error(`Unsupported spelling format ${meta.format} in ${dir}`);
+        return new Speller({
+            meta,
+            terms: read('terms.bin'),
+            termBlocks: read('term_blocks.bin'),
+            dfs: read('dfs.bin'),
+            deletes: read('deletes.bin'),
+            deleteBlocks: read('delete_blocks.bin'),
+            deleteOffsets: read('delete_offsets.bin'),
+            deleteTerms: read('delete_terms.bin'),
+        }, options);
+    }
+
+    df(term) {
+        const t = this.terms.indexOf(Buffer.from(term));
+        return t < 0 ? 0 : this.dfs[t];
+    }
+
+    term(t) {
+        return this.terms.decodeBlock(Math.floor(t / this.meta.block))[t % this.meta.block].toString('utf8');
+    }
+
+    // [{ term, distance, df }] within maxEdits, nearest and most frequent first
+    candidates(term) {
+        const ids = new Set();
+        for (const variant of deletes(term, this.maxEdits, this.meta.prefix_length)) {
+            const d = this.deletes.indexOf(Buffer.from(variant));
+            if (d < 0) continue;
+            for (let p = this.deleteOffsets[d]; p < this.deleteOffsets[d + 1]; p++) ids.add(this.deleteTerms[p]);
+        }
+        const found = [];
+        for (const t of ids) {
+            const candidate = this.term(t);
+            const distance = editDistance(term, candidate, this.maxEdits);
+            if (distance > 0 && distance <= this.maxEdits) found.push({ term: candidate, distance, df: this.dfs[t] });
+        }
+        return found.sort((a, b) => (a.distance - b.distance) || (b.df - a.df) || (a.term < b.term ? -1 : 1));
+    }
+
+    // { terms: rare/unknown terms expanded, groups, corrections: { term: [expansions] } }, where groups
+    // has one [term, ...expansions] per query term (even unknown ones), for AND queries
+    expand(terms) {
+        const expanded = [];
+        const groups = [];
+        const corrections = {};
+        for (const term of terms) {
+            const df = this.df(term);
+            if (df > 0) expanded.push(term);
+            const group = [term];
+            groups.push(group);
+            // short words have too many neighbours to guess from
+            if (df > this.lowDf || term.length <= this.maxEdits || !isAlpha(term)) continue;
+            const candidates = this.candidates(term);
+            const added = [];
+            let postings = 0;
+            for (const c of candidates) {
+                // only the closest neighbours: a farther one is rarely what was meant
+                if (c.distance > candidates[0].distance || added.length === this.maxExpansions
+                    || (added.length && postings + c.df > this.maxPostings)) break;
+                if (c.df <= df || terms.includes(c.term)) continue;
+                added.push(c.term);
+                postings += c.df;
+            }
+            if (added.length) {
+                corrections[term] = added;
+                expanded.push(...added);
+                group.push(...added);
+            }
+        }
+        return { terms: expanded, groups, corrections };
+    }
+}
+
+// Loaded on first use from SPELL_INDEX (a search_engine.build --spell output directory)
+let loaded;
+function getSpeller() {
+    if (loaded === undefined) {
+        loaded = null;
+        if (process.env.SPELL_INDEX && envInt('SPELL_MAX_EXPANSIONS', 2) > 0) {
+            try {
+                loaded = Speller.open(process.env.SPELL_INDEX, {
+                    maxEdits: envInt('SPELL_MAX_EDITS', 2),
+                    maxExpansions: envInt('SPELL_MAX_EXPANSIONS', 2),
+                    lowDf: envInt('SPELL_EXPAND_BELOW_DF', 0),
+                    maxPostings: envInt('SPELL_MAX_POSTINGS', 500000),
+                });
+            } catch (err) {
+                console.warn('[spell] could not load the spelling index:', err.message);
+            }
+        }
+    }
+    return loaded;
+}
+
+module.exports = { Speller, deletes, editDistance, getSpeller };
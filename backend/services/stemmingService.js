@@ -1,18 +1,36 @@
-const natural = require('natural');
+// Query tokenization. By default queries go to the persistent Python tokenizer pool
+// (services/tokenizerPool.js), which tokenizes with the indexer's own module
+// (search_engine/tokenizer.py): NER-aware tokens, Porter-stemmed when the index was built
+// with stemming (pass the index's setting, metaData.stemming). TOKENIZER=natural, or a pool
+// that cannot start, falls back to the `natural` tokenizer (+ Porter stemmer; no entity tokens).
+const { tokenizerPool } = require('./tokenizerPool');
 
-// Tokenizer + Porter stemmer (fast & common in IR systems)
-const tokenizer = new natural.WordTokenizer();
-const stemmer = natural.PorterStemmer;
+let natural = null;
+let poolFailed = process.env.TOKENIZER === 'natural';
 
 // Basic normalization: lowercase + strip punctuation (keeps numbers/letters/spaces)
 function normalize(text) {
   return text.replace(/[^A-Za-z0-9\s]/g, ' ').toLowerCase();
 }
 
-// Exported API identical to before (async + returns array of stems)
-exports.stemQuery = async (raw) => {
-  const tokens = tokenizer.tokenize(normalize(raw));
-  // If you want to drop tiny tokens: tokens = tokens.filter(t => t.length > 1);
-  return tokens.map(t => stemmer.stem(t));
-};
+function naturalStem(raw, stemming) {
+  if (!natural) natural = require('natural');
+  const tokens = new natural.WordTokenizer().tokenize(normalize(raw));
+  return stemming ? tokens.map(t => natural.PorterStemmer.stem(t)) : tokens;
+}
 
+// async, returns the query's index terms
+exports.stemQuery = async (raw, { stemming = true } = {}) => {
+  if (!poolFailed) {
+    try {
+      return await tokenizerPool.tokenize(raw, stemming);
+    } catch (err) {
+      if (tokenizerPool.workers.length === 0) {
+        // no worker could start (python/spaCy missing): stop trying
+        poolFailed = true;
+        console.warn('Tokenizer pool unavailable, falling back to natural:', err.message);
+      }
+    }
+  }
+  return naturalStem(raw, stemming);
+};
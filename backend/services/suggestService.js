@@ -0,0 +1,98 @@
+// === services/suggestService.js ===
+
+// Typeahead suggestions from the files written by `python -m search_engine.build --suggest`
+// (<index>/suggest/, layout documented in search_engine/suggest.py): a front-coded sorted array of
+// completions plus the precomputed top-k of every prefix that matches more than `threshold` keys.
+// The files are small and read into memory once, so a lookup is a binary search and at most
+// `threshold` key comparisons, without touching MongoDB or the search path.
+
+const fs = require('fs');
+const path = require('path');
+const { FrontCoded, uint32s } = require('../utils/frontCoded');
+
+const NO_KEY = 0xFFFFFFFF;
+
+// Same rule as normalize_prefix in search_engine/suggest.py
+function normalizePrefix(text) {
+    const words = String(text).replace(/[^A-Za-z0-9]+/g, ' ').toLowerCase().split(' ').filter(Boolean);
+    return words.join(' ') + (words.length && /\s$/.test(text) ? ' ' : '');
+}
+
+class Suggester {
+    // files: { meta, keys, keyBlocks, prefixes, prefixBlocks, weights, labels, labelOffsets, top } (Buffers)
+    constructor(files) {
+        this.meta = files.meta;
+        this.keys = new FrontCoded(files.keys, uint32s(files.keyBlocks), this.meta.block);
+        this.prefixes = new FrontCoded(files.prefixes, uint32s(files.prefixBlocks), this.meta.block);
+        this.weights = uint32s(files.weights);
+        this.labels = files.labels;
+        this.labelOffsets = uint32s(files.labelOffsets);
+        this.top = uint32s(files.top);
+    }
+
+    static open(indexDir) {
+        const dir = path.join(indexDir, 'suggest');
+        // copied into fresh (aligned) buffers so they can be viewed as Uint32Arrays
+        const read = (name) => Buffer.from(fs.readFileSync(path.join(dir, name)));
+        const meta = JSON.parse(fs.readFileSync(path.join(dir, 'suggest.json'), 'utf8'));
+        if (meta.format !== 1) throw new Error(`Unsupported suggestion format ${meta.format} in ${dir}`);
+        return new Suggester({
+            meta,
+            keys: read('keys.bin'),
+            keyBlocks: read('key_blocks.bin'),
+            prefixes: read('prefixes.bin'),
+            prefixBlocks: read('prefix_blocks.bin'),
+            weights: read('weights.bin'),
+            labels: read('labels.bin'),
+            labelOffsets: read('label_offsets.bin'),
+            top: read('top.bin'),
+        });
+    }
+
+    label(i) {
+        return this.labels.toString('utf8', this.labelOffsets[i], this.labelOffsets[i + 1]);
+    }
+
+    // [{ text, weight }] best first for a typed prefix
+    suggest(text, k = this.meta.k) {
+        k = Math.min(k, this.meta.k);
+        const prefix = Buffer.from(normalizePrefix(text));
+        if (prefix.length === 0) return [];
+
+        const [j, candidates] = this.prefixes.lowerBound(prefix);
+        if (candidates.length && candidates[0].equals(prefix)) {
+            const ids = this.top.subarray(j * this.meta.k, j * this.meta.k + k);
+            return Array.from(ids).filter(i => i !== NO_KEY).map(i => ({ text: this.label(i), weight: this.weights[i] }));
+        }
+
+        // not a popular prefix: at most `threshold` keys start with it
+        let [i, keys] = this.keys.lowerBound(prefix);
+        const matches = [];
+        while (keys.length && keys[0].subarray(0, prefix.length).equals(prefix)) {
+            matches.push(i);
+            keys.shift();
+            i++;
+            if (!keys.length && i < this.meta.count) keys = this.keys.decodeBlock(Math.floor(i / this.meta.block));
+        }
+        matches.sort((a, b) => (this.weights[b] - this.weights[a]) || (a - b));
+        return matches.slice(0, k).map(m => ({ text: this.label(m), weight: this.weights[m] }));
+    }
+}
+
+// Loaded on first use from SUGGEST_INDEX (a search_engine.build --suggest output directory)
+let loaded;
+function getSuggester() {
+    if (loaded === undefined) {
+        loaded = null;
+        if (process.env.SUGGEST_INDEX) {
+            try {
+                loaded = Suggester.open(process.env.SUGGEST_INDEX);
+            } catch (err) {
+                console.warn('[suggest] could not load suggestions:', err.message);
+            }
+        }
+    }
+    return loaded;
+}
+
+module.exports = { Suggester, normalizePrefix, getSuggester };
@@ -0,0 +1,136 @@
+// === services/tokenizerPool.js ===
+
+// Pool of long-lived tokenizer processes (utils/tokenizerWorker.py) that keep spaCy loaded, so
+// queries are tokenized exactly like the indexer without paying the model load per query.
+// Protocol: one JSON object per line each way ({id, query, stemming} -> {id, tokens} | {id, error}).
+// Requests go to the worker with the fewest in flight; results are cached by cleaned query
+// (and stemming setting).
+
+const path = require('path');
+const readline = require('readline');
+const { spawn } = require('child_process');
+const { LRUCache } = require('./cacheService');
+
+const envInt = (name, fallback) => {
+    const value = parseInt(process.env[name], 10);
+    return Number.isFinite(value) ? value : fallback;
+};
+
+// Same cleaning as clean_text in the indexer; also the cache key
+function cleanQuery(query) {
+    return query.toLowerCase().replace(/[^a-z0-9\s]/g, '').trim();
+}
+
+class TokenizerPool {
+    constructor({
+        size = envInt('TOKENIZER_WORKERS', 2),
+        command = process.env.TOKENIZER_PYTHON || 'python3',
+        args = [path.join(__dirname, '..', 'utils', 'tokenizerWorker.py')],
+        timeoutMs = envInt('TOKENIZER_TIMEOUT_MS', 2000),
+        cacheEntries = envInt('TOKENIZER_CACHE_ENTRIES', 10000),
+    } = {}) {
+        this.size = size;
+        this.command = command;
+        this.args = args;
+        this.timeoutMs = timeoutMs;
+        this.cache = new LRUCache({ name: 'tokens', maxEntries: cacheEntries });
+        this.workers = [];
+        this.nextId = 1;
+        this.closed = false;
+    }
+
+    start() {
+        while (this.workers.length < this.size) this.workers.push(this._spawn());
+        return Promise.all(this.workers.map(w => w.ready));
+    }
+
+    // stemming: whether the index was built with stemming (metaData.stemming)
+    async tokenize(query, stemming = true) {
+        const cleaned = cleanQuery(query);
+        const key = stemming ? cleaned : `unstemmed:${cleaned}`; // cleaned queries have no ':'
+        const cached = this.cache.get(key);
+        if (cached !== undefined) return cached;
+
+        if (this.workers.length === 0) this.start().catch(() => {});
+        const worker = this.workers.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+        const tokens = await this._request(worker, cleaned, stemming);
+        this.cache.set(key, tokens);
+        return tokens;
+    }
+
+    close() {
+        this.closed = true;
+        for (const worker of this.workers) worker.proc.kill();
+        this.workers = [];
+    }
+
+    _spawn() {
+        const proc = spawn(this.command, this.args, {
+            cwd: path.dirname(this.args[0] || __dirname),
+            stdio: ['pipe', 'pipe', 'inherit'],
+        });
+        const worker = { proc, pending: new Map(), started: false };
+        worker.ready = new Promise((resolve, reject) => {
+            worker.onReady = () => {
+                worker.started = true;
+                resolve();
+            };
+            worker.onFailed = reject;
+        });
+        worker.ready.catch(() => {}); // surfaced through the requests waiting on it
+        proc.stdin.on('error', () => {}); // a dead worker is handled by 'exit'
+
+        readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+            let message;
+            try {
+                message = JSON.parse(line);
+            } catch (err) {
+                return;
+            }
+            if (message.ready) return worker.onReady();
+            const request = worker.pending.get(message.id);
+            if (!request) return;
+            worker.pending.delete(message.id);
+            clearTimeout(request.timer);
+            if (message.error) request.reject(new Error(message.error));
+            else request.resolve(message.tokens);
+        });
+
+        const fail = (err) => {
+            worker.onFailed(err);
+            for (const request of worker.pending.values()) {
+                clearTimeout(request.timer);
+                request.reject(err);
+            }
+            worker.pending.clear();
+            // replace a worker that crashed after starting; one that never started (no python,
+            // no spaCy model) would only fail again
+            const i = this.workers.indexOf(worker);
+            if (i !== -1) {
+                this.workers.splice(i, 1);
+                if (!this.closed && worker.started) this.workers.push(this._spawn());
+            }
+        };
+        proc.on('error', fail);
+        proc.on('exit', (code) => fail(new Error(`tokenizer worker exited with code ${code}`)));
+        return worker;
+    }
+
+    // The timeout starts once the worker has loaded its model
+    async _request(worker, query, stemming) {
+        await worker.ready;
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                worker.pending.delete(id);
+                reject(new Error(`tokenizer timed out after ${this.timeoutMs}ms`));
+            }, this.timeoutMs);
+            worker.pending.set(id, { resolve, reject, timer });
+            worker.proc.stdin.write(JSON.stringify({ id, query, stemming }) + '\n');
+        });
+    }
+}
+
+const tokenizerPool = new TokenizerPool();
+
+module.exports = { TokenizerPool, cleanQuery, tokenizerPool };
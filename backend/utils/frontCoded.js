@@ -0,0 +1,73 @@
+// === utils/frontCoded.js ===
+
+// Readers for the files written by search_engine/codec.py: varints and front-coded sorted string
+// tables (blocks of varint(shared prefix) varint(suffix length) suffix, uint32 block offsets).
+
+function readVarint(buf, pos) {
+    let value = 0;
+    let shift = 0;
+    for (;;) {
+        const byte = buf[pos++];
+        value += (byte & 0x7F) * 2 ** shift;
+        if (!(byte & 0x80)) return [value, pos];
+        shift += 7;
+    }
+}
+
+const uint32s = (buf) => new Uint32Array(buf.buffer, buf.byteOffset, buf.length / 4);
+
+// Sorted byte strings of a front-coded file
+class FrontCoded {
+    constructor(data, blockOffsets, block) {
+        this.data = data;
+        this.offsets = blockOffsets;
+        this.block = block;
+    }
+
+    head(b) {
+        const [, pos] = readVarint(this.data, this.offsets[b]);
+        const [n, start] = readVarint(this.data, pos);
+        return this.data.subarray(start, start + n);
+    }
+
+    decodeBlock(b) {
+        const keys = [];
+        let key = Buffer.alloc(0);
+        let pos = this.offsets[b];
+        while (pos < this.offsets[b + 1]) {
+            let shared, n;
+            [shared, pos] = readVarint(this.data, pos);
+            [n, pos] = readVarint(this.data, pos);
+            key = Buffer.concat([key.subarray(0, shared), this.data.subarray(pos, pos + n)]);
+            keys.push(key);
+            pos += n;
+        }
+        return keys;
+    }
+
+    // [index of the first string >= key, strings from there to the end of its block]
+    lowerBound(key) {
+        const blocks = this.offsets.length - 1;
+        if (blocks < 1) return [0, []];
+        let lo = 0;
+        let hi = blocks - 1;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (Buffer.compare(this.head(mid), key) <= 0) lo = mid;
+            else hi = mid - 1;
+        }
+        const keys = this.decodeBlock(lo);
+        let i = 0;
+        while (i < keys.length && Buffer.compare(keys[i], key) < 0) i++;
+        if (i === keys.length && lo + 1 < blocks) return [(lo + 1) * this.block, this.decodeBlock(lo + 1)];
+        return [lo * this.block + i, keys.slice(i)];
+    }
+
+    // position of key, or -1
+    indexOf(key) {
+        const [i, keys] = this.lowerBound(key);
+        return keys.length && keys[0].equals(key) ? i : -1;
+    }
+}
+
+module.exports = { FrontCoded, readVarint, uint32s };
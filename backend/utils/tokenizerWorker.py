@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Long-lived query tokenizer for services/tokenizerPool.js.
+
+Loads spaCy once, then answers newline-delimited JSON requests on stdin:
+    {"id": 1, "query": "Lionel Messi goals", "stemming": true}
+        ->  {"id": 1, "tokens": ["lionel messi", "lionel", "messi", "goal"]}
+Tokens come from search_engine/tokenizer.py, the module the indexer tokenizes with;
+"stemming" is the index's setting (metaData.stemming, default true).
+"""
+import os, sys, json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from search_engine.tokenizer import clean_text, extract_meaningful_tokens, load_model
+
+
+def main():
+    load_model(required=True)  # a worker without spaCy exits, and the pool falls back
+    out = sys.stdout
+    out.write(json.dumps({"ready": True}) + "\n")
+    out.flush()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        try:
+            tokens = extract_meaningful_tokens(clean_text(request.get("query", "")),
+                                               request.get("stemming", True))
+            response = {"id": request.get("id"), "tokens": tokens}
+        except Exception as e:
+            response = {"id": request.get("id"), "error": str(e)}
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+if __name__ == "__main__":
+    main()
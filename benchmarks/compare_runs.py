@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import json, argparse
+
+# Side-by-side comparison of load_test.py summaries (<output>.json). The first run is the
+# baseline; other runs show the change against it. Exits non-zero with --fail-above when any
+# latency percentile regressed by more than the given percentage (for CI).
+
+METRICS = [("qps", ("qps",)),
+           ("p50_ms", ("latency_ms", "p50")),
+           ("p95_ms", ("latency_ms", "p95")),
+           ("p99_ms", ("latency_ms", "p99"))]
+STAGES = ["stem_query", "get_documents", "fetch_results"]
+
+
+def lookup(summary, path):
+    value = summary
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+def change(base, value):
+    if base in (None, 0) or value is None:
+        return None
+    return round((value - base) / base * 100, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare load_test.py runs')
+    parser.add_argument('runs', nargs='+', help='Summary JSON files; the first one is the baseline')
+    parser.add_argument('--fail-above', type=float, default=None,
+                        help='Exit 1 if a latency percentile regressed by more than this percent')
+    args = parser.parse_args()
+
+    summaries = []
+    for path in args.runs:
+        with open(path, "r", encoding="utf-8") as f:
+            summaries.append(json.load(f))
+
+    metrics = METRICS + [(f"{s}_p95_ms", ("stages_ms", s, "p95")) for s in STAGES]
+    names = [s.get("label") or s.get("commit") or path for s, path in zip(summaries, args.runs)]
+    print(f"{'metric':<24}" + "".join(f"{name[:22]:>24}" for name in names))
+
+    regressions = []
+    for metric, path in metrics:
+        base = lookup(summaries[0], path)
+        cells = [f"{base if base is not None else '-':>24}"]
+        for name, summary in zip(names[1:], summaries[1:]):
+            value = lookup(summary, path)
+            delta = change(base, value)
+            cells.append(f"{f'{value} ({delta:+}%)' if delta is not None else str(value):>24}")
+            if (args.fail_above is not None and delta is not None and metric.endswith("_ms")
+                    and delta > args.fail_above):
+                regressions.append(f"{metric} {delta:+}% in {name}")
+        print(f"{metric:<24}" + "".join(cells))
+
+    if regressions:
+        print("❌ Regressions: " + ", ".join(regressions))
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import os, sys, csv, json, math, time, argparse, statistics, functools
+
+# Ranking quality and speed of the Python evaluators on a judged query set.
+# Every run ("<method>:<algorithm>") is scored for NDCG@10, MRR and recall@50 together with
+# per-query latency and postings scored. The exhaustive run of each method is the reference:
+# a faster variant (WAND, BMW, MaxScore, NumPy) fails the check when its metrics move by more
+# than --max-delta, so pruning/caching changes are shown not to change results. Evaluators add
+# contributions in different orders, so scores are compared with a float tolerance: documents whose
+# scores tie within it may swap places without counting as a change.
+#
+# With no --index, the bundled corpus (data/corpus, data/queries.tsv, data/qrels.txt) is indexed
+# in-process with the query tokenizer, so the whole harness works offline.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from search_engine import InvertedIndex, MmapIndex, TopKEvaluator
+from search_engine.scoring import K1, B
+
+DEFAULT_RUNS = ",".join(f"{m}:{a}" for m in ("tfidf", "bm25") for a in ("exhaustive", "wand", "bmw", "maxscore", "numpy"))
+METRICS = ("ndcg@10", "mrr", "recall@50")
+# relative; loose enough for the NumPy run, which scores in float32
+SCORE_TOLERANCE = 1e-6
+
+
+# --- INPUT ---
+
+def read_queries(path):
+    """qid<TAB>query per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip()]
+
+def read_qrels(path):
+    """TREC qrels: qid 0 file_id relevance."""
+    qrels = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                qid, _, file_id, rel = line.split()
+                qrels.setdefault(qid, {})[file_id] = int(rel)
+    return qrels
+
+def load_index(path, tokenize):
+    if path is None:
+        return InvertedIndex.from_documents(os.path.join(HERE, "data", "corpus", "*.txt"), tokenize)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return MmapIndex(path)
+    return InvertedIndex.from_csv(path)
+
+
+# --- METRICS ---
+
+def ndcg(ranked, rels, k=10):
+    dcg = sum((2 ** rels.get(doc, 0) - 1) / math.log2(i + 2) for i, doc in enumerate(ranked[:k]))
+    ideal = sorted(rels.values(), reverse=True)[:k]
+    idcg = sum((2 ** rel - 1) / math.log2(i + 2) for i, rel in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+def reciprocal_rank(ranked, rels):
+    for i, doc in enumerate(ranked):
+        if rels.get(doc, 0) > 0:
+            return 1.0 / (i + 1)
+    return 0.0
+
+def recall(ranked, rels, k=50):
+    relevant = {doc for doc, rel in rels.items() if rel > 0}
+    return len(relevant.intersection(ranked[:k])) / len(relevant) if relevant else 0.0
+
+
+# --- RUNS ---
+
+def make_searcher(index, method, algorithm, k1, b):
+    """search(terms, k, stats) -> [(doc, score)], filling stats with the postings scored."""
+    if algorithm == "numpy":
+        from search_engine.vectorized import VectorScorer
+        return VectorScorer(index, method, k1, b).search
+    evaluator = TopKEvaluator(index, method, k1=k1, b=b)
+    return lambda terms, k, stats: evaluator.search(terms, k, algorithm, stats)
+
+def run(index, queries, qrels, method, algorithm, k1, b, repeat):
+    search = make_searcher(index, method, algorithm, k1, b)
+    rows = []
+    for qid, terms in queries:
+        timings, stats = [], {}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = search(terms, 50, stats)
+            timings.append((time.perf_counter() - started) * 1000)
+        ranked = [index.file_id(doc) for doc, _ in results]
+        rels = qrels.get(qid, {})
+        rows.append({
+            "run": f"{method}:{algorithm}", "qid": qid,
+            "ndcg@10": ndcg(ranked, rels), "mrr": reciprocal_rank(ranked, rels), "recall@50": recall(ranked, rels),
+            "latency_ms": round(statistics.median(timings), 4),
+            "postings_scored": stats.get("postings_scored", ""),
+            "top10": " ".join(ranked[:10]),
+            "scores": [score for _, score in results],
+        })
+    return rows
+
+def summarize(rows):
+    summary = {metric: round(statistics.mean(r[metric] for r in rows), 4) for metric in METRICS}
+    latencies = sorted(r["latency_ms"] for r in rows)
+    summary["latency_p50_ms"] = round(statistics.median(latencies), 4)
+    summary["latency_p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    scored = [r["postings_scored"] for r in rows if r["postings_scored"] != ""]
+    summary["postings_scored"] = sum(scored) if scored else None
+    return summary
+
+def same_ranking(row, reference):
+    """Same ranked scores up to SCORE_TOLERANCE: any document that differs only swapped with a tie."""
+    return len(row["scores"]) == len(reference["scores"]) and all(
+        math.isclose(a, b, rel_tol=SCORE_TOLERANCE, abs_tol=1e-9)
+        for a, b in zip(row["scores"], reference["scores"]))
+
+def compare(summaries, rows_by_run, max_delta):
+    """Differences of each run against its method's exhaustive run; returns the failures."""
+    failures = []
+    for name, summary in summaries.items():
+        method, algorithm = name.split(":")
+        reference = f"{method}:exhaustive"
+        if algorithm == "exhaustive" or reference not in summaries:
+            continue
+        pairs = list(zip(rows_by_run[name], rows_by_run[reference]))
+        changed = [(a, b) for a, b in pairs if not same_ranking(a, b)]
+        # queries that only swapped tied documents count as unchanged
+        deltas = {m: round(sum(a[m] - b[m] for a, b in changed) / len(pairs), 4) for m in METRICS}
+        summary["delta"] = deltas
+        summary["queries_with_changed_top10"] = sum(a["top10"] != b["top10"] for a, b in changed)
+        summary["queries_with_tie_swaps"] = sum(a["top10"] != b["top10"] for a, b in pairs) - \
+            summary["queries_with_changed_top10"]
+        for metric, delta in deltas.items():
+            if abs(delta) > max_delta:
+                failures.append(f"{name} {metric} {delta:+}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate ranking quality and speed of the search_engine evaluators')
+    parser.add_argument('--index', default=None,
+                        help='Term-sorted index CSV (or parts glob) or search_engine.build directory (default: bundled corpus)')
+    parser.add_argument('--queries', default=os.path.join(HERE, "data", "queries.tsv"), help='qid<TAB>query file')
+    parser.add_argument('--qrels', default=os.path.join(HERE, "data", "qrels.txt"), help='TREC qrels file')
+    parser.add_argument('--runs', default=DEFAULT_RUNS,
+                        help='Comma-separated <method>:<algorithm> (algorithm: exhaustive, wand, bmw, maxscore, numpy)')
+    parser.add_argument('--k1', type=float, default=K1, help='BM25 k1')
+    parser.add_argument('--b', type=float, default=B, help='BM25 b')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per query (median is reported)')
+    parser.add_argument('--max-delta', type=float, default=0.0,
+                        help='Allowed change of any mean metric against the exhaustive run')
+    parser.add_argument('--tokenizer', default='engine', choices=['engine', 'split'],
+                        help='engine: search_engine.tokenizer (as the indexer); split: lowercase whitespace split')
+    parser.add_argument('--output', default=None, help='Write <output>.json (summary) and <output>.csv (per query)')
+    args = parser.parse_args()
+
+    if args.tokenizer == "engine":
+        from search_engine.tokenizer import stem_query as tokenize
+    else:
+        tokenize = lambda text: text.lower().split()
+
+    started = time.perf_counter()
+    index = load_index(args.index, tokenize)
+    print(f"📚 Index: {index.N} documents, {len(index.postings)} terms ({time.perf_counter() - started:.2f}s)")
+    if args.tokenizer == "engine" and not getattr(index, "stemming", True):
+        tokenize = functools.partial(tokenize, use_stemming=False)   # built without --use-stemming
+    queries = [(qid, tokenize(text)) for qid, text in read_queries(args.queries)]
+    qrels = read_qrels(args.qrels)
+    if not queries:
+        raise SystemExit(f"❌ No queries in {args.queries}")
+
+    rows_by_run, summaries = {}, {}
+    for name in args.runs.split(","):
+        method, algorithm = name.split(":")
+        try:
+            rows_by_run[name] = run(index, queries, qrels, method, algorithm, args.k1, args.b, args.repeat)
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        summaries[name] = summarize(rows_by_run[name])
+    failures = compare(summaries, rows_by_run, args.max_delta)
+
+    print(f"{'run':<20}{'ndcg@10':>9}{'mrr':>8}{'recall@50':>11}{'p50 ms':>10}{'p95 ms':>10}{'postings':>10}  delta")
+    for name, s in summaries.items():
+        delta = " ".join(f"{m}={d:+}" for m, d in s.get("delta", {}).items() if d) or ("-" if "delta" in s else "")
+        print(f"{name:<20}{s['ndcg@10']:>9}{s['mrr']:>8}{s['recall@50']:>11}"
+              f"{s['latency_p50_ms']:>10}{s['latency_p95_ms']:>10}{s['postings_scored'] or '-':>10}  {delta}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(f"{args.output}.json", "w", encoding="utf-8") as f:
+            json.dump({"index": args.index or "bundled", "k1": args.k1, "b": args.b, "queries": len(queries),
+                       "runs": summaries}, f, indent=2)
+        with open(f"{args.output}.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["run", "qid", *METRICS, "latency_ms", "postings_scored", "top10"],
+                                    extrasaction="ignore")
+            writer.writeheader()
+            for rows in rows_by_run.values():
+                writer.writerows(rows)
+        print(f"📁 Results written to {args.output}.json / {args.output}.csv")
+
+    if failures:
+        print("❌ Results changed beyond --max-delta: " + ", ".join(failures))
+        raise SystemExit(1)
+    print("✅ All variants match their exhaustive reference")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os, json, random, hashlib, argparse
+
+# Synthetic crawl in the crawler's storage format, for benchmarks:
+#   <output>/<md5(url)>.txt          "Title: <title> - Wikipedia" + paragraphs
+#   <output>/images/<md5>-<n>.jpg    placeholder images
+#   --vocabulary (vocabulary.json next to <output>)   words by Zipf rank and entity names, for make_query_log.py
+#   (kept out of <output>, since the indexer reads every file in it)
+#
+# Word frequencies follow a Zipf distribution, and some sentences mention capitalized
+# "Firstname Lastname" / place names, so the spaCy NER path of the indexer has entities to find.
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "sen", "dar", "el", "qui", "bran", "tor",
+             "na", "phi", "gus", "mel", "ost", "ri", "zan", "ce", "hol", "dun", "ae", "pra"]
+PLACES = ["Vienna", "Lisbon", "Kyoto", "Nairobi", "Oslo", "Lima", "Cairo", "Toronto", "Madrid", "Dublin"]
+FIRST_NAMES = ["Maria", "James", "Anika", "Rafael", "Sofia", "Kenji", "Amara", "Lucas", "Ingrid", "Omar"]
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda w: (len(w), w))
+
+def zipf_weights(n, s):
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+def make_sentence(rng, vocab, weights, entities):
+    words = rng.choices(vocab, weights, k=rng.randint(6, 18))
+    if entities and rng.random() < 0.3:
+        words.insert(rng.randint(0, len(words)), rng.choice(entities))
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + "."
+
+def write_document(path, title, paragraphs):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Title: {title} - Wikipedia\n")
+        f.write("\n\n".join(paragraphs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic crawl for benchmarks')
+    parser.add_argument('--output', required=True, help='Storage directory to write')
+    parser.add_argument('--docs', type=int, default=10_000, help='Number of documents')
+    parser.add_argument('--vocab', type=int, default=50_000, help='Vocabulary size')
+    parser.add_argument('--zipf', type=float, default=1.07, help='Zipf exponent of word frequencies')
+    parser.add_argument('--entities', type=int, default=500, help='Number of distinct person names')
+    parser.add_argument('--sentences', type=int, default=40, help='Mean sentences per document')
+    parser.add_argument('--max-images', type=int, default=3, help='Max placeholder images per document')
+    parser.add_argument('--vocabulary', default=None,
+                        help='Where to write the vocabulary (default: vocabulary.json next to --output)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    vocabulary_path = args.vocabulary or os.path.join(os.path.dirname(os.path.abspath(args.output)), "vocabulary.json")
+
+    rng = random.Random(args.seed)
+    os.makedirs(os.path.join(args.output, "images"), exist_ok=True)
+
+    vocab = make_vocabulary(args.vocab, rng)
+    weights = zipf_weights(len(vocab), args.zipf)
+    people = sorted({f"{rng.choice(FIRST_NAMES)} {vocab[rng.randrange(len(vocab))].capitalize()}"
+                     for _ in range(args.entities)})
+    entities = people + PLACES
+
+    for i in range(args.docs):
+        subject = rng.choice(entities) if rng.random() < 0.5 else vocab[rng.randrange(min(len(vocab), 5000))]
+        title = f"{subject.title()} {i}"
+        url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+        file_id = hashlib.md5(url.encode()).hexdigest()
+        n_sentences = max(3, int(rng.expovariate(1 / args.sentences)))
+        sentences = [make_sentence(rng, vocab, weights, entities) for _ in range(n_sentences)]
+        paragraphs = [" ".join(sentences[j:j + 5]) for j in range(0, len(sentences), 5)]
+        write_document(os.path.join(args.output, f"{file_id}.txt"), title, paragraphs)
+        for n in range(rng.randint(0, args.max_images)):
+            with open(os.path.join(args.output, "images", f"{file_id}-{n}.jpg"), "wb") as f:
+                f.write(b"\xff\xd8\xff\xd9")  # empty JPEG
+        if (i + 1) % 1000 == 0:
+            print(f"📄 {i + 1}/{args.docs} documents")
+
+    with open(vocabulary_path, "w", encoding="utf-8") as f:
+        json.dump({"zipf": args.zipf, "words": vocab, "entities": entities}, f)
+    print(f"✅ Wrote {args.docs} documents to {args.output} (vocabulary: {vocabulary_path})")
+
+if __name__ == "__main__":
+    main()
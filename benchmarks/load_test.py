@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+import os, csv, json, time, random, argparse, threading, subprocess
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from concurrent.futures import ThreadPoolExecutor
+
+# Replays a query log against /query-stem (the Express backend or search_engine/server.py)
+# and reports latency percentiles, QPS and the per-stage times from each response's
+# profile.measures.
+#   closed loop: --concurrency clients, each sends its next query when the previous one returns
+#   open loop:   Poisson arrivals at --rate queries/s; latency is measured from the scheduled
+#                send time, so queueing behind a slow server is counted (no coordinated omission)
+
+STAGES = ["stem_query", "get_documents", "fetch_results"]
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return round(values[low] + (values[high] - values[low]) * (rank - low), 3)
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def send(base_url, entry, timeout, scheduled=None):
+    """One request; returns a result row. `scheduled` is the open-loop send time (perf_counter)."""
+    started = time.perf_counter()
+    params = urlencode({"query": entry["query"], "optionName": entry.get("optionName", "tfidf")})
+    row = {"query": entry["query"], "method": entry.get("optionName", "tfidf"), "status": 0, "cache_hit": ""}
+    try:
+        with urlopen(f"{base_url}/query-stem?{params}", timeout=timeout) as response:
+            body = json.loads(response.read())
+            row["status"] = response.status
+    except HTTPError as e:
+        body, row["status"] = {}, e.code
+    except (OSError, ValueError) as e:
+        body, row["status"], row["error"] = {}, 0, str(e)
+    finished = time.perf_counter()
+    row["latency_ms"] = round((finished - (scheduled if scheduled is not None else started)) * 1000, 3)
+    row["service_ms"] = round((finished - started) * 1000, 3)
+    profile = body.get("profile") or {}
+    measures = {m["name"]: m["duration_ms"] for m in profile.get("measures", [])}
+    for stage in STAGES:
+        row[stage] = measures.get(stage, "")
+    if "cacheHit" in profile:
+        row["cache_hit"] = int(bool(profile["cacheHit"]))
+    return row
+
+
+def run_closed(base_url, queries, concurrency, count, timeout):
+    rows, lock = [], threading.Lock()
+    cursor = iter(range(count))
+
+    def client():
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                return
+            row = send(base_url, queries[i % len(queries)], timeout)
+            with lock:
+                rows.append(row)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return rows
+
+def run_open(base_url, queries, rate, count, timeout, max_in_flight, seed):
+    rng = random.Random(seed)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        futures = []
+        scheduled = time.perf_counter()
+        for i in range(count):
+            scheduled += rng.expovariate(rate)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, base_url, queries[i % len(queries)], timeout, scheduled))
+        return [f.result() for f in futures]
+
+
+def summarize(rows, elapsed):
+    ok = [r for r in rows if r["status"] == 200]
+    latencies = [r["latency_ms"] for r in ok]
+    summary = {
+        "requests": len(rows),
+        "errors": len(rows) - len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "latency_ms": {f"p{p}": percentile(latencies, p) for p in (50, 95, 99)},
+        "stages_ms": {},
+    }
+    summary["latency_ms"]["mean"] = round(sum(latencies) / len(latencies), 3) if latencies else None
+    summary["latency_ms"]["max"] = max(latencies) if latencies else None
+    for stage in STAGES:
+        values = [r[stage] for r in ok if r[stage] != ""]
+        summary["stages_ms"][stage] = {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+    hits = [r["cache_hit"] for r in ok if r["cache_hit"] != ""]
+    if hits:
+        summary["cache_hit_ratio"] = round(sum(hits) / len(hits), 4)
+    return summary
+
+def write_results(prefix, rows, summary):
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    fields = ["query", "method", "status", "latency_ms", "service_ms", *STAGES, "cache_hit", "error"]
+    with open(f"{prefix}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+def print_summary(summary):
+    lat = summary["latency_ms"]
+    print(f"✅ {summary['requests']} requests, {summary['errors']} errors, {summary['qps']} QPS")
+    print(f"   latency ms  p50={lat['p50']}  p95={lat['p95']}  p99={lat['p99']}  max={lat['max']}")
+    for stage, p in summary["stages_ms"].items():
+        print(f"   {stage:<14} p50={p['p50']}  p95={p['p95']}  p99={p['p99']}")
+    if "cache_hit_ratio" in summary:
+        print(f"   cache hit ratio {summary['cache_hit_ratio']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a query log against the search backend')
+    parser.add_argument('--url', default='http://127.0.0.1:3001', help='Backend base URL')
+    parser.add_argument('--log', required=True, help='Query log (.jsonl) from make_query_log.py')
+    parser.add_argument('--mode', default='closed', choices=['closed', 'open'])
+    parser.add_argument('--concurrency', type=int, default=8, help='Clients in closed-loop mode')
+    parser.add_argument('--rate', type=float, default=50.0, help='Arrival rate (queries/s) in open-loop mode')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='Open-loop request threads')
+    parser.add_argument('--requests', type=int, default=None, help='Requests to send (default: the whole log)')
+    parser.add_argument('--warmup', type=int, default=0, help='Requests sent first and not measured')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--label', default=None, help='Run label stored in the summary (e.g. the release)')
+    parser.add_argument('--output', default=None, help='Write <output>.csv (per request) and <output>.json (summary)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    queries = load_queries(args.log)
+    count = args.requests or len(queries)
+
+    if args.warmup:
+        print(f"🔥 Warming up with {args.warmup} requests")
+        run_closed(base_url, queries, args.concurrency, args.warmup, args.timeout)
+        queries = queries[args.warmup:] + queries[:args.warmup]
+
+    print(f"🚀 {args.mode}-loop run: {count} requests against {base_url}")
+    started = time.perf_counter()
+    if args.mode == "closed":
+        rows = run_closed(base_url, queries, args.concurrency, count, args.timeout)
+    else:
+        rows = run_open(base_url, queries, args.rate, count, args.timeout, args.max_in_flight, args.seed)
+    summary = summarize(rows, time.perf_counter() - started)
+    summary.update({
+        "label": args.label,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "concurrency": args.concurrency if args.mode == "closed" else None,
+        "rate": args.rate if args.mode == "open" else None,
+        "url": base_url,
+        "log": args.log,
+    })
+    print_summary(summary)
+    if args.output:
+        write_results(args.output, rows, summary)
+        print(f"📁 Results written to {args.output}.csv / {args.output}.json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import json, random, argparse
+
+# Replayable query log (JSON lines: {"query": ..., "optionName": ...}) for load_test.py and
+# the backend's POSTINGS_WARM_LOG. Query terms are drawn with the corpus' Zipf word weights,
+# and the log itself samples a pool of distinct queries with a second Zipf distribution,
+# so a few head queries repeat a lot (as real traffic does) and the tail is long.
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a Zipfian query log from a generated corpus')
+    parser.add_argument('--vocabulary', required=True, help='vocabulary.json written by generate_corpus.py')
+    parser.add_argument('--output', required=True, help='Query log (.jsonl)')
+    parser.add_argument('--queries', type=int, default=10_000, help='Log length')
+    parser.add_argument('--distinct', type=int, default=2_000, help='Distinct queries in the pool')
+    parser.add_argument('--query-zipf', type=float, default=1.0, help='Zipf exponent of query popularity')
+    parser.add_argument('--max-terms', type=int, default=4, help='Max words per query')
+    parser.add_argument('--entity-share', type=float, default=0.2, help='Share of queries naming an entity')
+    parser.add_argument('--methods', default='tfidf,bm25', help='Ranking methods to alternate')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(args.vocabulary, "r", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    words, entities = vocabulary["words"], vocabulary["entities"]
+    word_weights = [1.0 / (rank ** vocabulary["zipf"]) for rank in range(1, len(words) + 1)]
+
+    pool = set()
+    while len(pool) < args.distinct:
+        terms = rng.choices(words, word_weights, k=rng.randint(1, args.max_terms))
+        if rng.random() < args.entity_share:
+            terms[0] = rng.choice(entities)
+        pool.add(" ".join(terms))
+    pool = sorted(pool)
+    rng.shuffle(pool)
+
+    methods = args.methods.split(",")
+    query_weights = [1.0 / (rank ** args.query_zipf) for rank in range(1, len(pool) + 1)]
+    with open(args.output, "w", encoding="utf-8") as f:
+        for query in rng.choices(pool, query_weights, k=args.queries):
+            f.write(json.dumps({"query": query, "optionName": rng.choice(methods)}) + "\n")
+    print(f"✅ Wrote {args.queries} queries ({len(pool)} distinct) to {args.output}")
+
+if __name__ == "__main__":
+    main()
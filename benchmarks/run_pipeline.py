@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os, sys, json, time, shlex, argparse, subprocess
+from datetime import datetime, timezone
+
+# Builds and loads an index for a (generated) crawl with the repo's own scripts and times
+# each stage:
+#   index    spark-submit Indexer/inverted_index.py   (csv parts, stats, doc lengths)
+#   merge    Indexer/merge_index_files.py             (term-sorted inverted_index.csv)
+#   mongo    insertIndex.py, insertScript.py, metaDataInsert.py   (skipped with --skip-mongo)
+#   mmap     python -m search_engine.build            (index + records for search_engine/server.py)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_stage(name, command, cwd, timings):
+    print(f"⏳ {name}: {' '.join(shlex.quote(c) for c in command)}")
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd)
+    elapsed = round(time.perf_counter() - started, 3)
+    timings.append({"stage": name, "seconds": elapsed, "returncode": result.returncode})
+    if result.returncode != 0:
+        raise SystemExit(f"❌ {name} failed with exit code {result.returncode}")
+    print(f"✅ {name} took {elapsed}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and load a benchmark index, timing each stage')
+    parser.add_argument('--storage', required=True, help='Crawl storage directory (e.g. from generate_corpus.py)')
+    parser.add_argument('--workdir', required=True, help='Directory for index output')
+    parser.add_argument('--spark-submit', default='spark-submit', help='spark-submit command')
+    parser.add_argument('--uri', default=os.environ.get("MONGODB_URI", "mongodb://127.0.0.1:27017"),
+                        help='MongoDB connection string')
+    parser.add_argument('--db', default='ir', help='Database name')
+    parser.add_argument('--skip-mongo', action='store_true', help='Only build the files (index + mmap index)')
+    parser.add_argument('--skip-mmap', action='store_true', help='Do not build the search_engine index')
+    parser.add_argument('--positions', action='store_true', help='Index token positions')
+    parser.add_argument('--output', default=None, help='Write stage timings to this JSON file')
+    args = parser.parse_args()
+
+    storage = os.path.abspath(args.storage)
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    index_output = os.path.join(workdir, "index_output")
+    merged = os.path.join(workdir, "inverted_index.csv")
+    indexer = os.path.join(ROOT, "Indexer")
+    loaders = os.path.join(ROOT, "mongodb_scripts")
+    mongo = ["--uri", args.uri, "--db", args.db]
+    timings = []
+
+    index_cmd = [*shlex.split(args.spark_submit), "inverted_index.py", storage, "--output", index_output,
+                 "--format", "csv", "--use-stemming", "--keep-parts"]
+    if args.positions:
+        index_cmd.append("--positions")
+    run_stage("index", index_cmd, indexer, timings)
+    run_stage("merge", [sys.executable, "merge_index_files.py", os.path.join(index_output, "*.csv"),
+                        "--output", merged], indexer, timings)
+
+    if not args.skip_mongo:
+        run_stage("mongo_index", [sys.executable, "insertIndex.py", merged, *mongo], loaders, timings)
+        run_stage("mongo_pages", [sys.executable, "insertScript.py", "--storage", storage, *mongo], loaders, timings)
+        run_stage("mongo_meta", [sys.executable, "metaDataInsert.py", *mongo,
+                                 "--stats", f"{index_output}_stats.json",
+                                 "--doc-lengths", f"{index_output}_doc_lengths"], loaders, timings)
+    if not args.skip_mmap:
+        run_stage("mmap_build", [sys.executable, "-m", "search_engine.build", merged,
+                                 "--output", os.path.join(workdir, "engine_index"), "--storage", storage,
+                                 "--stats", f"{index_output}_stats.json"], ROOT, timings)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "storage": storage,
+        "documents": sum(1 for name in os.listdir(storage) if name.endswith(".txt")),
+        "stages": timings,
+        "total_seconds": round(sum(t["seconds"] for t in timings), 3),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Stage timings written to {args.output}")
+    print(f"✅ Pipeline finished in {report['total_seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -110,7 +110,8 @@ if [[ $(hostname -s) == ${master_node%%.*} || $(hostname) == ${master_node} ]];
         --conf spark.network.timeout=600s \
         --conf spark.executor.heartbeatInterval=60s \
         inverted_index.py $HOME/bigdata/Wiki_Search_Engine/crawler/storage/ \
-        --output index_output --format csv --use-stemming
+        --output index_output --format csv --use-stemming \
+        --keep-parts --show-stats
 
 
     echo "Stopping Spark cluster..."
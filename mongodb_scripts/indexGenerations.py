@@ -0,0 +1,211 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+
+from pymongo import MongoClient, ReturnDocument
+from pymongo.server_api import ServerApi
+
+# Versioned index generations, so a rebuild never touches the collections being served.
+#
+# The loaders write a generation into suffixed collections (insertScript.py / insertIndex.py /
+# metaDataInsert.py --generation G -> wikipedia__G, invertedIndex__G, metaData__G, ...).
+# Generations are recorded in "indexGenerations"; the document {_id: "active"} is the pointer the
+# backend reads (backend/services/indexGeneration.js). Switching is one update of that document,
+# so queries see either the old or the new generation, never a half-loaded one.
+#
+#   python indexGenerations.py create                      -> prints a new generation id
+#   python indexGenerations.py verify   <generation>
+#   python indexGenerations.py activate <generation>       (verifies first unless --force)
+#   python indexGenerations.py rollback                    -> back to the previously active generation
+#   python indexGenerations.py list
+#   python indexGenerations.py gc --keep 2                 -> drops the collections of older generations
+
+GENERATIONS = "indexGenerations"
+ACTIVE = "active"
+SEPARATOR = "__"
+
+
+def collection_name(base, generation=None):
+    """Collection of `base` in a generation; the unversioned name when generation is None."""
+    return f"{base}{SEPARATOR}{generation}" if generation else base
+
+def new_generation_id():
+    return datetime.now(timezone.utc).strftime("g%Y%m%dT%H%M%SZ")
+
+def register(db, generation, base):
+    """Record that `base` is (being) loaded into `generation`; called by the loaders."""
+    db[GENERATIONS].update_one(
+        {"_id": generation},
+        {"$setOnInsert": {"createdAt": datetime.now(timezone.utc), "status": "loading"},
+         "$addToSet": {"collections": base}},
+        upsert=True,
+    )
+
+def active_pointer(db):
+    return db[GENERATIONS].find_one({"_id": ACTIVE}) or {}
+
+
+def connect(uri):
+    client = MongoClient(uri, server_api=ServerApi('1'))
+    client.admin.command('ping')
+    return client
+
+
+# --- VERIFY ---
+
+def verify(db, generation, max_shrink):
+    """(stats, problems) of a loaded generation; problems is empty when it is safe to activate."""
+    record = db[GENERATIONS].find_one({"_id": generation})
+    if record is None:
+        return {}, [f"unknown generation '{generation}'"]
+    names = set(db.list_collection_names())
+    collections = set(record.get("collections", []))
+    problems = []
+
+    meta = db[collection_name("metaData", generation)].find_one({}) or {}
+    N, avgdl = meta.get("N", 0), meta.get("avgdl", 0)
+    stats = {"N": N, "avgdl": avgdl, "indexVersion": meta.get("indexVersion")}
+    if not meta:
+        problems.append("metaData is missing or empty")
+    elif N <= 0 or avgdl <= 0:
+        problems.append(f"metaData has N={N}, avgdl={avgdl}")
+
+    postings = [base for base in ("invertedIndex", "invertedIndexChunks") if base in collections]
+    if not postings:
+        problems.append("no invertedIndex / invertedIndexChunks loaded")
+    for base in postings:
+        name = collection_name(base, generation)
+        stats[base] = db[name].estimated_document_count() if name in names else 0
+        if stats[base] == 0:
+            problems.append(f"{name} is empty")
+        elif "word_1" not in {i["name"].split("_chunk")[0] for i in db[name].list_indexes()}:
+            problems.append(f"{name} has no word index (the load did not finish)")
+
+    name = collection_name("wikipedia", generation)
+    stats["wikipedia"] = db[name].estimated_document_count() if name in names else 0
+    if stats["wikipedia"] < N:
+        problems.append(f"{name} has {stats['wikipedia']} documents for N={N}")
+
+    if "docLengths" in collections:
+        stats["docLengths"] = db[collection_name("docLengths", generation)].estimated_document_count()
+        if stats["docLengths"] != N:
+            problems.append(f"docLengths has {stats['docLengths']} rows for N={N}")
+
+    # Guard against activating a truncated build: compare with the generation being served
+    current = active_pointer(db).get("generation")
+    if current and current != generation:
+        live = db[collection_name("metaData", current)].find_one({}) or {}
+        if live.get("N") and N < live["N"] * (1 - max_shrink):
+            problems.append(f"N={N} is more than {max_shrink:.0%} below the active generation's N={live['N']}")
+    return stats, problems
+
+
+# --- SWITCH ---
+
+def switch(db, generation, reason):
+    """Point the backend at `generation` in a single document update; returns the old pointer."""
+    now = datetime.now(timezone.utc)
+    old = db[GENERATIONS].find_one_and_update(
+        {"_id": ACTIVE},
+        [{"$set": {"previous": "$generation", "generation": generation, "switchedAt": now}}],
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    ) or {}
+    db[GENERATIONS].update_one({"_id": generation}, {"$set": {"status": "active", "activatedAt": now}})
+    if old.get("generation") and old["generation"] != generation:
+        db[GENERATIONS].update_one({"_id": old["generation"]}, {"$set": {"status": "retired", "retiredAt": now}})
+    print(f"🔁 Active generation: {old.get('generation') or '(unversioned collections)'} -> {generation} ({reason})")
+    return old
+
+def collect_garbage(db, keep, dry_run):
+    """Drop the collections of all but the `keep` newest inactive generations (never active or previous)."""
+    pointer = active_pointer(db)
+    protected = {pointer.get("generation"), pointer.get("previous")}
+    records = list(db[GENERATIONS].find({"_id": {"$ne": ACTIVE}}).sort("createdAt", -1))
+    candidates = [r for r in records if r["_id"] not in protected][keep:]
+    names = set(db.list_collection_names())
+    for record in candidates:
+        dropped = [collection_name(base, record["_id"]) for base in record.get("collections", [])]
+        dropped = [name for name in dropped if name in names]
+        if dry_run:
+            print(f"Would drop generation {record['_id']}: {', '.join(dropped) or 'no collections'}")
+            continue
+        for name in dropped:
+            db[name].drop()
+        db[GENERATIONS].delete_one({"_id": record["_id"]})
+        print(f"🗑️ Dropped generation {record['_id']} ({len(dropped)} collections)")
+    return len(candidates)
+
+
+# --- MAIN ---
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned index generations in MongoDB')
+    parser.add_argument('--uri', default=os.environ.get("MONGODB_URI", "mongodb://127.0.0.1:27017"),
+                        help='MongoDB connection string (default: $MONGODB_URI)')
+    parser.add_argument('--db', default='ir', help='Database name')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('create', help='Register a new generation and print its id')
+    for name in ('verify', 'activate'):
+        command = commands.add_parser(name, help=f'{name.capitalize()} a loaded generation')
+        command.add_argument('generation')
+        command.add_argument('--max-shrink', type=float, default=0.5,
+                             help='Fail when N drops by more than this fraction against the active generation')
+    commands.choices['activate'].add_argument('--force', action='store_true', help='Activate without verifying')
+    commands.add_parser('rollback', help='Re-activate the previously active generation')
+    commands.add_parser('list', help='Show generations and the active pointer')
+    gc = commands.add_parser('gc', help='Drop the collections of old generations')
+    gc.add_argument('--keep', type=int, default=1, help='Inactive generations to keep besides the previous one')
+    gc.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    client = connect(args.uri)
+    db = client[args.db]
+    db[GENERATIONS].create_index("createdAt")
+
+    if args.command == 'create':
+        generation = new_generation_id()
+        db[GENERATIONS].insert_one({"_id": generation, "createdAt": datetime.now(timezone.utc),
+                                    "status": "loading", "collections": []})
+        print(generation)
+
+    elif args.command in ('verify', 'activate'):
+        stats, problems = ({}, []) if getattr(args, 'force', False) else verify(db, args.generation, args.max_shrink)
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+        if problems:
+            print("❌ Generation " + args.generation + " failed verification:\n  - " + "\n  - ".join(problems))
+            client.close()
+            sys.exit(1)
+        if stats:
+            db[GENERATIONS].update_one({"_id": args.generation}, {"$set": {"stats": stats}})
+            print(f"✅ Generation {args.generation} verified")
+        if args.command == 'activate':
+            switch(db, args.generation, "forced" if args.force else "verified")
+
+    elif args.command == 'rollback':
+        previous = active_pointer(db).get("previous")
+        if not previous:
+            print("❌ No previous generation to roll back to")
+            client.close()
+            sys.exit(1)
+        switch(db, previous, "rollback")
+
+    elif args.command == 'list':
+        pointer = active_pointer(db)
+        print(f"Active: {pointer.get('generation') or '(unversioned collections)'}, "
+              f"previous: {pointer.get('previous') or '-'}")
+        for record in db[GENERATIONS].find({"_id": {"$ne": ACTIVE}}).sort("createdAt", -1):
+            stats = record.get("stats", {})
+            print(f"  {record['_id']:<22}{record.get('status', ''):<10}N={stats.get('N', '?'):<10}"
+                  f"{', '.join(record.get('collections', []))}")
+
+    elif args.command == 'gc':
+        dropped = collect_garbage(db, args.keep, args.dry_run)
+        print(f"{'Found' if args.dry_run else 'Collected'} {dropped} old generation(s)")
+
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -22,11 +22,13 @@ class App extends React.Component {
       searchTime: 0,
       hasSearched: false,
       optionName: "tfidf",
+      match: "any",
       currentPage: 1,
       resultsPerPage: 10,
       showModal: false,
       selectedImage: null,
-      currentImageIndex: 0
+      currentImageIndex: 0,
+      suggestions: []
     };
 
     this.resultsRef = React.createRef();
@@ -34,6 +36,24 @@ class App extends React.Component {
 
   setSearchQuery = (query) => {
     this.setState({ query });
+    this.fetchSuggestions(query);
+  }
+
+  // Typeahead from the backend's /suggest (a prefix lookup, not a search), debounced per keystroke
+  fetchSuggestions = (query) => {
+    clearTimeout(this.suggestTimer);
+    if (query.trim().length === 0) {
+      this.setState({ suggestions: [] });
+      return;
+    }
+    this.suggestTimer = setTimeout(() => {
+      const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:3001';
+      axios.get(`${API_BASE}/suggest`, { params: { q: query, k: 8 } })
+        .then((response) => {
+          if (this.state.query === query) this.setState({ suggestions: response.data.suggestions });
+        })
+        .catch(() => this.setState({ suggestions: [] }));
+    }, 80);
   }
 
   getStemSearchResults = () => {
@@ -56,6 +76,7 @@ class App extends React.Component {
     axios.get(`${API_BASE}/query-stem`, {
       params: {
         optionName: this.state.optionName,
+        match: this.state.match,
         searchType: this.state.searchType,
         query: query
       }
@@ -169,8 +190,14 @@ class App extends React.Component {
                     type="text"
                     className="form-control form-control-lg flex-grow-1"
                     placeholder="🔍 Search football or world war topics (i.e. Fifa World Cup or Battle of the Bulge)..."
+                    list="search-suggestions"
                     onChange={event => this.setSearchQuery(event.target.value)}
                   />
+                  <datalist id="search-suggestions">
+                    {this.state.suggestions.map(suggestion => (
+                      <option key={suggestion.text} value={suggestion.text} />
+                    ))}
+                  </datalist>
                   <select
                     className="form-select form-select-lg"
                     onChange={(e) => this.setState({ optionName: e.target.value })}
@@ -178,6 +205,14 @@ class App extends React.Component {
                     <option value="tfidf">TF-IDF</option>
                     <option value="bm25">BM25</option>
                   </select>
+                  <select
+                    className="form-select form-select-lg"
+                    onChange={(e) => this.setState({ match: e.target.value })}
+                  >
+                    <option value="any">Any words</option>
+                    <option value="all">All words</option>
+                    <option value="phrase">Exact phrase</option>
+                  </select>
                   <Button className="btn-lg" variant="primary" onClick={this.getStemSearchResults}>
                     {this.state.isLoading ? <ClipLoader size={18} color="#fff" /> : "Search"}
                   </Button>
@@ -0,0 +1,8 @@
+"""Query-side evaluators over the indexes written by Indexer/inverted_index.py."""
+
+from .index import InvertedIndex, PostingList
+from .mmap_index import MmapIndex, write_index
+from .scoring import Scorer
+from .positional import PositionalEvaluator
+from .topk import TopKEvaluator, ScoreBounds
+from .engine import SearchEngine
@@ -0,0 +1,79 @@
+"""
+Build the memory-mapped query index from the indexer's term-sorted CSV output:
+
+    python -m search_engine.build 'IndexData/inverted_index.csv' --output IndexData/engine [--storage crawler/storage]
+
+With --shards N, <output> gets N document-partitioned shards (shard-000, ...) for
+search_engine.coordinator, all scoring with the collection's N / avgdl / df.
+--suggest adds the typeahead suggestions (<output>/suggest, search_engine.suggest),
+--spell the deletion index for misspelled query terms (<output>/spell, search_engine.spell).
+--priors orders doc ids by a search_engine.pagerank prior and stores it (priors.bin).
+--stats (the indexer's <output>_stats.json) records its stemming setting in meta.json,
+so the query tokenizer stems exactly when the index does.
+"""
+
+import os, json, time, argparse
+
+from .mmap_index import write_index, write_shards, MmapIndex
+from .records import write_records
+from .suggest import build as build_suggestions
+from .spell import build as build_spelling
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a term-sorted index CSV into the memory-mapped layout')
+    parser.add_argument('inputs', nargs='+', help='Merged inverted_index.csv, or term-sorted part files in order')
+    parser.add_argument('--output', required=True, help='Index directory to write')
+    parser.add_argument('--storage', default=None, help='Crawl storage directory: also build the result-record store')
+    parser.add_argument('--images', default=None, help='Image directory (default: <storage>/images)')
+    parser.add_argument('--shards', type=int, default=None, help='Write this many document-partitioned shards')
+    parser.add_argument('--priors', default=None,
+                        help='Priors CSV from search_engine.pagerank: order doc ids by decreasing prior')
+    parser.add_argument('--stats', default=None,
+                        help="The indexer's <output>_stats.json: queries are stemmed as its \"stemming\" says")
+    parser.add_argument('--suggest', action='store_true',
+                        help='Also build the typeahead suggestions (<output>/suggest, needs --storage)')
+    parser.add_argument('--query-log', default=None, help='Query log whose counts boost suggested titles')
+    parser.add_argument('--spell', action='store_true',
+                        help='Also build the spelling-correction deletion index (<output>/spell)')
+    args = parser.parse_args()
+
+    started = time.time()
+    priors = None
+    if args.priors:
+        from .pagerank import read_priors      # needs numpy
+        priors = read_priors(args.priors)
+    stemming = None
+    if args.stats:
+        with open(args.stats, "r", encoding="utf-8") as f:
+            stemming = json.load(f).get("stemming")
+    if args.shards:
+        layout = write_shards(args.inputs, args.output, args.shards, priors, stemming)
+        outputs = [os.path.join(args.output, f"shard-{s:03d}") for s in range(args.shards)]
+        print(f"✅ Wrote {args.shards} shards to {args.output}: N={layout['N']}, "
+              f"docs per shard {layout['docs_per_shard']} ({time.time() - started:.1f}s)")
+    else:
+        meta = write_index(args.inputs, args.output, priors, stemming)
+        outputs = [args.output]
+        print(f"✅ Wrote {args.output}: N={meta['N']}, {meta['terms']} terms, {meta['postings']} postings "
+              f"({time.time() - started:.1f}s)")
+
+    if args.storage:
+        started = time.time()
+        missing = sum(write_records(MmapIndex(output), output, args.storage, args.images) for output in outputs)
+        print(f"✅ Wrote result records ({missing} pages missing from {args.storage}) in {time.time() - started:.1f}s")
+
+    if args.suggest:
+        started = time.time()
+        meta = build_suggestions(outputs, args.output, args.query_log)
+        print(f"✅ Wrote {meta['count']} suggestions ({meta['prefixes']} precomputed prefixes) "
+              f"in {time.time() - started:.1f}s")
+
+    if args.spell:
+        started = time.time()
+        meta = build_spelling(outputs, args.output)
+        print(f"✅ Wrote spelling index: {meta['terms']} terms, {meta['deletes']} delete variants "
+              f"in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
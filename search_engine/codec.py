@@ -0,0 +1,140 @@
+"""
+Varint (LEB128) codecs for the query-side readers.
+encode_positions mirrors Indexer/inverted_index.py, which writes the positions column.
+Front-coded string tables (suggestions, spelling) are stored with write_front_coded.
+"""
+
+import os, base64
+from array import array
+
+
+def encode_varints(values):
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data):
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def read_varint(data, pos):
+    """(value, position after it) of the varint at data[pos]."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_positions(positions):
+    """Sorted positions -> delta-encoded varint bytes."""
+    prev = 0
+    deltas = []
+    for pos in positions:
+        deltas.append(pos - prev)
+        prev = pos
+    return encode_varints(deltas)
+
+
+def decode_positions(data):
+    """Delta-encoded varint bytes -> sorted absolute positions."""
+    positions = []
+    pos = 0
+    for delta in decode_varints(data):
+        pos += delta
+        positions.append(pos)
+    return positions
+
+
+def positions_from_column(value):
+    """Positions as stored by the indexer: raw bytes (parquet) or base64 text (csv/json)."""
+    if value is None or value == "":
+        return b""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return base64.b64decode(value)
+
+
+# --- FRONT CODING ---
+
+def write_front_coded(path, blocks_path, keys, block=16):
+    """Sorted byte strings -> blocks of varint(shared prefix) varint(suffix length) suffix; uint32 block offsets."""
+    data, offsets, previous = bytearray(), array("I"), b""
+    for i, key in enumerate(keys):
+        if i % block == 0:
+            offsets.append(len(data))
+            shared = 0
+        else:
+            shared = len(os.path.commonprefix([previous, key]))
+        data += encode_varints([shared, len(key) - shared]) + key[shared:]
+        previous = key
+    offsets.append(len(data))
+    with open(path, "wb") as f:
+        f.write(data)
+    with open(blocks_path, "wb") as f:
+        offsets.tofile(f)
+
+
+class FrontCoded:
+    """Sorted byte strings of a front-coded file; lookups decode one block."""
+
+    def __init__(self, data, offsets, block):
+        self.data = data
+        self.offsets = offsets
+        self.block = block
+
+    def _head(self, b):
+        shared, pos = read_varint(self.data, self.offsets[b])
+        n, pos = read_varint(self.data, pos)
+        return bytes(self.data[pos:pos + n])
+
+    def decode_block(self, b):
+        keys, key, pos = [], b"", self.offsets[b]
+        while pos < self.offsets[b + 1]:
+            shared, pos = read_varint(self.data, pos)
+            n, pos = read_varint(self.data, pos)
+            key = key[:shared] + bytes(self.data[pos:pos + n])
+            keys.append(key)
+            pos += n
+        return keys
+
+    def lower_bound(self, key):
+        """(index of the first string >= key, [strings from there to the end of its block])."""
+        if len(self.offsets) < 2:
+            return 0, []
+        lo, hi = 0, len(self.offsets) - 2
+        while lo < hi:                        # last block whose head <= key
+            mid = (lo + hi + 1) // 2
+            if self._head(mid) <= key:
+                lo = mid
+            else:
+                hi = mid - 1
+        keys = self.decode_block(lo)
+        i = 0
+        while i < len(keys) and keys[i] < key:
+            i += 1
+        if i == len(keys) and lo + 2 < len(self.offsets):
+            return (lo + 1) * self.block, self.decode_block(lo + 1)
+        return lo * self.block + i, keys[i:]
+
+    def index_of(self, key):
+        """Position of `key`, or None."""
+        i, keys = self.lower_bound(key)
+        return i if keys and keys[0] == key else None
@@ -0,0 +1,221 @@
+"""
+Scatter-gather over document-partitioned shards (search_engine.build --shards N).
+
+The coordinator tokenizes a query once, sends the terms to every shard in
+parallel, waits up to a per-shard timeout and merges the per-shard top-k lists
+(each already sorted best first) with a heap. Shards score with the collection's
+N / avgdl / df, so the merged ranking equals the unsharded one. Shards that time
+out or fail are left out and reported; the response is then marked partial.
+
+Shards are either local worker processes, one per shard directory (one machine,
+one core each), or shard servers (python -m search_engine.server --index <shard>)
+reached over HTTP:
+
+    python -m search_engine.coordinator --shards IndexData/engine/shard-* --port 3001
+    python -m search_engine.coordinator --shard-urls http://node1:3101,http://node2:3101 --port 3001
+"""
+
+import os, glob, json, time, heapq, argparse, itertools, functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from .engine import Profile, METHODS, MATCHES
+
+
+# --- SHARDS ---
+
+_shard_engine = None
+
+def _open_shard(path, algorithm, prior_weight=0.0):
+    global _shard_engine
+    from .mmap_index import MmapIndex
+    from .records import RecordStore
+    from .engine import SearchEngine
+
+    if not RecordStore.exists(path):
+        raise FileNotFoundError(f"No record store in {path}: build the shards with --storage")
+    index = MmapIndex(path)
+    _shard_engine = SearchEngine(index, RecordStore(path, index), None, algorithm, prior_weight=prior_weight)
+
+def _search_shard(terms, method, k, match="any"):
+    ranked, stats = _shard_engine.rank(terms, method, k, match)
+    return {"hits": _shard_engine.records(ranked), "postings_scored": stats.get("postings_scored", 0)}
+
+
+def shard_stemming(paths):
+    """Stemming setting of the shards' index (meta.json, as MmapIndex reads it); they must agree."""
+    settings = set()
+    for path in paths:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            settings.add(json.load(f).get("stemming", True))
+    if len(settings) > 1:
+        raise SystemExit("Shards were indexed with and without stemming; rebuild them from one index")
+    return settings.pop() if settings else True
+
+
+class LocalShard:
+    """
+    A shard directory searched by its own worker process (the index is mapped there, not here).
+    A request that times out keeps its worker busy until it finishes; it is only dropped here.
+    """
+
+    def __init__(self, path, algorithm="bmw", workers=1, prior_weight=0.0):
+        self.name = path
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_open_shard,
+                                        initargs=(path, algorithm, prior_weight))
+
+    def submit(self, terms, method, k, timeout, match="any"):
+        return self.pool.submit(_search_shard, terms, method, k, match)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class HttpShard:
+    """A shard served by search_engine.server on another port or node."""
+
+    def __init__(self, url, pool):
+        self.name = url.rstrip("/")
+        self.pool = pool
+
+    def _get(self, terms, method, k, timeout, match="any"):
+        # phrase terms are (term, token offset) pairs: the offsets go along as pos.
+        # AND terms are OR groups (lists): each term goes along with its group number.
+        pairs, groups = [], []
+        for g, term in enumerate(terms):
+            for t in term if isinstance(term, list) else [term]:
+                pairs.append(t if isinstance(t, tuple) else (t, None))
+                groups.append(g)
+        params = urlencode([("term", t) for t, _ in pairs] + [("pos", p) for _, p in pairs if p is not None]
+                           + ([("group", g) for g in groups] if any(isinstance(t, list) for t in terms) else [])
+                           + [("optionName", method), ("k", k), ("match", match)])
+        with urlopen(f"{self.name}/shard?{params}", timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def submit(self, terms, method, k, timeout, match="any"):
+        return self.pool.submit(self._get, terms, method, k, timeout, match)
+
+    def close(self):
+        pass
+
+
+# --- COORDINATOR ---
+
+class Coordinator:
+    def __init__(self, shards, tokenize, timeout=1.0, suggester=None, speller=None):
+        self.shards = shards
+        self.suggester = suggester
+        self.speller = speller
+        self.tokenize = tokenize
+        self.timeout = timeout
+
+    def search(self, query, method="tfidf", k=50, profile=None, match="any"):
+        """Merged top-k result records; the per-shard outcome goes to profile.info['shards']."""
+        profile = profile or Profile()
+        if method not in METHODS:
+            raise ValueError(f"Unknown ranking method: {method}")
+        if match not in MATCHES:
+            raise ValueError(f"Unknown match mode: {match}")
+
+        with profile.span("stem_query"):
+            terms = self.tokenize(query, positions=True) if match == "phrase" else self.tokenize(query)
+        if self.speller is not None and match != "phrase":
+            with profile.span("expand_terms"):
+                # AND: a word matches through any of its expansions, which are not required themselves
+                terms, corrections = self.speller.expand(terms, grouped=match == "all")
+            if corrections:
+                profile.info["corrections"] = corrections
+        with profile.span("get_documents"):
+            started = time.perf_counter()
+            futures = {shard.submit(terms, method, k, self.timeout, match): shard for shard in self.shards}
+            done, not_done = wait(futures, timeout=self.timeout)
+            lists, report = [], {"total": len(self.shards), "ok": 0, "timed_out": [], "failed": [],
+                                 "postings_scored": 0}
+            for future in not_done:
+                future.cancel()
+                report["timed_out"].append(futures[future].name)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report["failed"].append({"shard": futures[future].name, "error": str(e)})
+                    continue
+                report["ok"] += 1
+                report["postings_scored"] += result["postings_scored"]
+                lists.append(result["hits"])
+            report["timed_out"].sort()
+            report["partial"] = report["ok"] < report["total"]
+            report["gather_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        with profile.span("fetch_results"):
+            # each list is best first (ties by filename, i.e. global doc id); merge lazily with a heap
+            merged = heapq.merge(*lists, key=lambda hit: (-hit["score"], hit["filename"]))
+            results = list(itertools.islice(merged, k))
+        profile.info["shards"] = report
+        return results
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def main():
+    from .server import make_handler
+    from .suggest import Suggester
+    from .spell import Speller
+    from .tokenizer import stem_query
+
+    parser = argparse.ArgumentParser(description='Serve /query-stem by scatter-gather over index shards')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--shards', nargs='+', help='Shard directories (glob patterns allowed), one worker process each')
+    source.add_argument('--shard-urls', help='Comma-separated base URLs of shard servers')
+    parser.add_argument('--algorithm', default='bmw', choices=['exhaustive', 'wand', 'bmw', 'maxscore', 'numpy'],
+                        help='Top-k evaluation strategy of local shards')
+    parser.add_argument('--workers-per-shard', type=int, default=1, help='Worker processes per local shard')
+    parser.add_argument('--timeout', type=float, default=1.0, help='Seconds to wait for each shard')
+    parser.add_argument('--max-in-flight', type=int, default=16, help='Concurrent requests per shard server')
+    parser.add_argument('--top-k', type=int, default=50, help='Results per query')
+    parser.add_argument('--prior-weight', type=float, default=1.0,
+                        help='Local shards: weight of the static prior (shards built with --priors)')
+    parser.add_argument('--suggest', default=None,
+                        help='search_engine.build --shards --suggest output directory, to answer /suggest')
+    parser.add_argument('--spell', default=None,
+                        help='search_engine.build --shards --spell output directory, to expand misspelled terms')
+    parser.add_argument('--stemming', default=None, choices=['on', 'off'],
+                        help='Stem query terms (default: as the local shards were indexed, on for --shard-urls)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    if args.shards:
+        paths = sorted(p for pattern in args.shards for p in (glob.glob(pattern) or [pattern]))
+        shards = [LocalShard(path, args.algorithm, args.workers_per_shard, args.prior_weight) for path in paths]
+        stemming = shard_stemming(paths)
+    else:
+        urls = [u for u in args.shard_urls.split(",") if u]
+        pool = ThreadPoolExecutor(max_workers=args.max_in_flight * len(urls))
+        shards = [HttpShard(url, pool) for url in urls]
+        stemming = True
+    if args.stemming:
+        stemming = args.stemming == "on"
+    suggester = Suggester(args.suggest) if args.suggest else None
+    speller = Speller(args.spell) if args.spell else None
+    tokenize = functools.partial(stem_query, use_stemming=stemming)
+    coordinator = Coordinator(shards, tokenize, args.timeout, suggester, speller)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(coordinator, args.top_k))
+    server.verbose = args.verbose
+    print(f"🚀 Coordinating {len(shards)} shards on http://{args.host}:{args.port}/query-stem "
+          f"(timeout {args.timeout}s per shard)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coordinator.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Result documents read straight from the crawl storage (<hash>.txt files and
+images/<hash>-<n>.jpg), so the query server can render results without MongoDB.
+Fields and snippet rule match mongodb_scripts/insertScript.py.
+"""
+
+import os, re
+from itertools import islice
+
+IMAGE_NAME = re.compile(r"^(?P<file_id>.+)-(?P<n>\d+)\.jpg$")
+
+
+def cut_the_article(body):
+    """First two sentences (up to the second '.') of the first 3 lines of the body."""
+    text = "".join(body[:3])
+    end = -1
+    for _ in range(2):
+        end = text.find(".", end + 1)
+        if end == -1:
+            return text.strip()
+    return text[:end + 1].strip()
+
+
+def scan_images(image_dir, max_images=10):
+    """file_id -> [image ids], ordered by image number, from a single directory scan."""
+    found = {}
+    if not os.path.isdir(image_dir):
+        return found
+    with os.scandir(image_dir) as entries:
+        for entry in entries:
+            match = IMAGE_NAME.match(entry.name)
+            if match and int(match["n"]) < max_images:
+                found.setdefault(match["file_id"], []).append(int(match["n"]))
+    return {file_id: [f"{file_id}-{i}" for i in range(len(numbers))] for file_id, numbers in found.items()}
+
+
+class CrawlStore:
+    """filename -> result record {docId, chunkedBody, filename, url, images}."""
+
+    def __init__(self, storage, image_dir=None, index=None):
+        self.storage = storage
+        self.index = index
+        self.images = scan_images(image_dir or os.path.join(storage, "images"))
+
+    def record(self, filename):
+        """None when the page is not in the storage (like a doc missing from the wikipedia collection)."""
+        try:
+            with open(os.path.join(self.storage, filename), "r", encoding="utf-8") as f:
+                lines = list(islice(f, 4))
+        except FileNotFoundError:
+            return None
+        title = lines[0].replace("Title: ", "").replace(" - Wikipedia", "").strip() if lines else ""
+        file_id = filename.split(".txt")[0]
+        return {
+            "docId": title,
+            "chunkedBody": cut_the_article(lines[1:]),
+            "filename": filename,
+            "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            "images": self.images.get(file_id, []),
+        }
+
+    def records(self, filenames):
+        return [self.record(name) for name in filenames]
+
+    def fetch(self, docs):
+        """Records of dense doc ids of the bound index."""
+        return self.records([self.index.filenames[doc] for doc in docs])
@@ -0,0 +1,125 @@
+"""
+In-process search: query string -> ranked result records, with the same
+per-stage profile spans queryController.processQuery reports.
+"""
+
+import time
+from contextlib import contextmanager
+
+from .topk import TopKEvaluator, ScoreBounds
+from .positional import PositionalEvaluator
+
+METHODS = ("tfidf", "bm25")
+# any: documents with at least one term (OR); all: with every term (AND); phrase: with the words in order
+MATCHES = ("any", "all", "phrase")
+
+
+class Profile:
+    """Collects {name, duration_ms} spans like startSpan in backend/utils/profiler.js."""
+
+    def __init__(self):
+        self.measures = []
+        self.info = {}      # extra per-request details returned next to the measures
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.measures.append({"name": name, "duration_ms": round((time.perf_counter() - started) * 1000, 2)})
+
+
+class SearchEngine:
+    def __init__(self, index, store, tokenize, algorithm="bmw", bounds=None, suggester=None, speller=None,
+                 prior_weight=0.0):
+        """
+        index: InvertedIndex or MmapIndex; store: result records by doc id (RecordStore or CrawlStore);
+        tokenize: query string -> terms (with positions=True, (term, token offset) pairs); bounds: optional {method: ScoreBounds} from the indexer.
+        Missing bounds are derived per term on first use and kept. suggester: optional Suggester;
+        speller: optional Speller, expanding unknown query terms (reported in profile.info['corrections']).
+        prior_weight: weight of the index's static priors (search_engine.pagerank) in every score.
+        """
+        self.index = index
+        self.suggester = suggester
+        self.speller = speller
+        self.store = store
+        self.tokenize = tokenize
+        self.algorithm = algorithm
+        self.prior_weight = prior_weight
+        bounds = bounds or {}
+        if algorithm == "numpy":
+            from .vectorized import VectorScorer
+            self.evaluators = {m: VectorScorer(index, m, prior_weight=prior_weight) for m in METHODS}
+            # AND queries still need cursors; their bounds are derived on first use
+            self.conjunctive = {m: TopKEvaluator(index, m, ScoreBounds(m, {}), prior_weight=prior_weight)
+                                for m in METHODS}
+        else:
+            self.evaluators = {m: TopKEvaluator(index, m, bounds.get(m) or ScoreBounds(m, {}), prior_weight=prior_weight)
+                               for m in METHODS}
+            self.conjunctive = self.evaluators
+        self.positional = {}
+
+    def search(self, query, method="tfidf", k=50, profile=None, match="any"):
+        """
+        Top-k result records (best first), each with its score. match: one of MATCHES.
+        The ranking stats of this query go to profile.info['postings'].
+        """
+        profile = profile or Profile()
+        if method not in self.evaluators:
+            raise ValueError(f"Unknown ranking method: {method}")
+        if match not in MATCHES:
+            raise ValueError(f"Unknown match mode: {match}")
+
+        with profile.span("stem_query"):
+            # a phrase is matched on its words' offsets in the query, stop words included
+            terms = self.tokenize(query, positions=True) if match == "phrase" else self.tokenize(query)
+        if self.speller is not None and match != "phrase":
+            with profile.span("expand_terms"):
+                # AND: a word matches through any of its expansions, which are not required themselves
+                terms, corrections = self.speller.expand(terms, grouped=match == "all")
+            if corrections:
+                profile.info["corrections"] = corrections
+        with profile.span("get_documents"):
+            ranked, profile.info["postings"] = self.rank(terms, method, k, match)
+        with profile.span("fetch_results"):
+            return self.records(ranked)
+
+    def rank(self, terms, method="tfidf", k=50, match="any"):
+        """
+        (top-k [(doc, score)], stats of the evaluator) for already tokenized terms; the stats are
+        this call's own, so one engine can serve concurrent requests.
+        With match="all", a term may be a list of alternatives (TopKEvaluator OR groups).
+        """
+        if method not in self.evaluators:
+            raise ValueError(f"Unknown ranking method: {method}")
+        stats = {}
+        if match == "all":
+            ranked = self.conjunctive[method].search(terms, k, "and", stats)
+        elif match == "phrase":
+            words = [t[0] if isinstance(t, tuple) else t for t in terms]
+            if any(p is not None and len(p) and not p.has_positions for p in map(self.index.get, words)):
+                raise ValueError("Phrase queries need an index built with --positions")
+            evaluator = self.positional.get(method)
+            if evaluator is None:
+                evaluator = self.positional[method] = PositionalEvaluator(self.index, method,
+                                                                          prior_weight=self.prior_weight)
+            ranked = evaluator.search(terms, k, phrase=True, stats=stats)
+        elif match == "any":
+            evaluator = self.evaluators[method]
+            ranked = evaluator.search(terms, k, stats=stats) if self.algorithm == "numpy" \
+                else evaluator.search(terms, k, self.algorithm, stats)
+        else:
+            raise ValueError(f"Unknown match mode: {match}")
+        return ranked, stats
+
+    def records(self, ranked):
+        """Result records of ranked [(doc, score)]; docs missing from the store are dropped."""
+        records = self.store.fetch([doc for doc, _ in ranked])
+        results = []
+        for record, (doc, score) in zip(records, ranked):
+            if record is not None:
+                record["_id"] = self.index.file_id(doc)
+                record["score"] = score
+                results.append(record)
+        return results
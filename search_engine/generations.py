@@ -0,0 +1,199 @@
+"""
+Versioned generations of the memory-mapped index, switched atomically:
+
+    <root>/generations/<id>/    one search_engine.build output (a single index or shards)
+    <root>/current              symlink to the active generation
+    <root>/generations.json     active / previous generation and the switch history
+
+    python -m search_engine.build IndexData/inverted_index.csv --storage crawler/storage \\
+        --output $(python -m search_engine.generations new --root IndexData/engine)
+    python -m search_engine.generations activate <id> --root IndexData/engine
+    python -m search_engine.server --index IndexData/engine/current --workers 4 --watch 5
+
+activate verifies the build, then replaces the symlink with rename(2), so a reader
+resolves either the old or the new generation. The server's --watch sees the
+resolved path change and forks workers over the new index before retiring the old
+ones. gc never removes the active or previous generation, and workers still
+serving a removed one keep their mappings until they exit.
+"""
+
+import os, sys, glob, json, shutil, argparse
+from datetime import datetime, timezone
+
+from .mmap_index import MmapIndex
+from .records import RecordStore
+
+
+def _state_path(root):
+    return os.path.join(root, "generations.json")
+
+def read_state(root):
+    try:
+        with open(_state_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active": None, "previous": None, "history": []}
+
+def _write_state(root, state):
+    tmp = _state_path(root) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, _state_path(root))
+
+def generation_path(root, generation):
+    return os.path.join(root, "generations", generation)
+
+def list_generations(root):
+    return sorted(os.listdir(os.path.join(root, "generations"))) if os.path.isdir(os.path.join(root, "generations")) else []
+
+
+# --- VERIFY ---
+
+def _index_dirs(path):
+    """The index directories of a generation: itself, or its shards."""
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return [path]
+    return sorted(glob.glob(os.path.join(path, "shard-*")))
+
+def _check_index(path):
+    """Problems with one index directory: file sizes against meta.json, term order, record store."""
+    try:
+        index = MmapIndex(path)
+    except (OSError, ValueError, KeyError) as e:
+        return [f"{path}: cannot open ({e})"]
+    meta, problems = index.meta, []
+    expected = {"term_offsets.bin": (meta["terms"] + 1) * 8, "doc_ids.bin": meta["postings"] * 4,
+                "tfs.bin": meta["postings"] * 4, "doc_lens.bin": meta["N"] * 4}
+    if meta.get("doc_order") == "prior":
+        expected["priors.bin"] = meta["N"] * 4
+    for name, size in expected.items():
+        actual = os.path.getsize(os.path.join(path, name))
+        if actual != size:
+            problems.append(f"{path}/{name} is {actual} bytes, meta.json implies {size}")
+    if len(index.terms) != meta["terms"] or len(index.filenames) != meta["N"]:
+        problems.append(f"{path}: {len(index.terms)} terms / {len(index.filenames)} documents, "
+                        f"meta.json says {meta['terms']} / {meta['N']}")
+    if any(a >= b for a, b in zip(index.terms, index.terms[1:])):
+        problems.append(f"{path}/terms.txt is not strictly sorted")
+    if meta["N"] > 0 and RecordStore.exists(path) and \
+            os.path.getsize(os.path.join(path, "record_offsets.bin")) != (meta["N"] + 1) * 8:
+        problems.append(f"{path}: record store does not cover all {meta['N']} documents")
+    return problems
+
+def collection_size(path):
+    dirs = _index_dirs(path)
+    if not dirs:
+        return 0
+    with open(os.path.join(dirs[0], "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta.get("collection", meta)["N"]
+
+def verify(root, generation, max_shrink=0.5):
+    """Problems that should stop `generation` from being activated (empty when it is fine)."""
+    path = generation_path(root, generation)
+    dirs = _index_dirs(path)
+    if not dirs:
+        return [f"{path} holds no index (no meta.json or shard-* directories)"]
+    problems = [p for d in dirs for p in _check_index(d)]
+    if problems:
+        return problems
+    N = collection_size(path)
+    if N == 0:
+        problems.append(f"{path} indexes no documents")
+    active = read_state(root)["active"]
+    if active and active != generation and os.path.isdir(generation_path(root, active)):
+        live = collection_size(generation_path(root, active))
+        if N < live * (1 - max_shrink):
+            problems.append(f"N={N} is more than {max_shrink:.0%} below the active generation's N={live}")
+        if RecordStore.exists(_index_dirs(generation_path(root, active))[0]) and not RecordStore.exists(dirs[0]):
+            problems.append("the active generation has a record store and this one has none (build with --storage)")
+    return problems
+
+
+# --- SWITCH ---
+
+def switch(root, generation, reason):
+    """Point <root>/current at `generation` atomically and record the switch."""
+    link = os.path.join(root, "current")
+    tmp = f"{link}.{os.getpid()}.tmp"
+    os.symlink(os.path.join("generations", generation), tmp)
+    os.replace(tmp, link)
+
+    state = read_state(root)
+    if state["active"] != generation:
+        state["previous"] = state["active"]
+    state["active"] = generation
+    state["history"] = (state["history"] + [{"generation": generation, "reason": reason,
+                                              "at": datetime.now(timezone.utc).isoformat(timespec="seconds")}])[-50:]
+    _write_state(root, state)
+    print(f"🔁 {link} -> {generation} ({reason}; previous: {state['previous'] or '-'})")
+
+def collect_garbage(root, keep, dry_run=False):
+    """Remove all but the `keep` newest inactive generations; the active and previous ones always stay."""
+    state = read_state(root)
+    protected = {state["active"], state["previous"]}
+    candidates = [g for g in reversed(list_generations(root)) if g not in protected][keep:]
+    for generation in candidates:
+        if dry_run:
+            print(f"Would remove {generation_path(root, generation)}")
+        else:
+            shutil.rmtree(generation_path(root, generation))
+            print(f"🗑️ Removed {generation_path(root, generation)}")
+    return candidates
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--root', required=True, help='Directory holding generations/ and the current symlink')
+    parser = argparse.ArgumentParser(description='Manage versioned generations of the memory-mapped index')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('new', parents=[common], help='Create an empty generation directory and print its path (build --output)')
+    for name in ('verify', 'activate'):
+        command = commands.add_parser(name, parents=[common], help=f'{name.capitalize()} a built generation')
+        command.add_argument('generation')
+        command.add_argument('--max-shrink', type=float, default=0.5,
+                             help='Fail when N drops by more than this fraction against the active generation')
+    commands.choices['activate'].add_argument('--force', action='store_true', help='Activate without verifying')
+    commands.add_parser('rollback', parents=[common], help='Re-activate the previously active generation')
+    commands.add_parser('list', parents=[common], help='Show generations and the active one')
+    gc = commands.add_parser('gc', parents=[common], help='Remove old generations')
+    gc.add_argument('--keep', type=int, default=1, help='Inactive generations to keep besides the previous one')
+    gc.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'new':
+        generation = datetime.now(timezone.utc).strftime("g%Y%m%dT%H%M%S%fZ")
+        os.makedirs(generation_path(args.root, generation))
+        print(generation_path(args.root, generation))
+
+    elif args.command in ('verify', 'activate'):
+        generation = os.path.basename(os.path.normpath(args.generation))   # an id or the path `new` printed
+        problems = [] if getattr(args, 'force', False) else verify(args.root, generation, args.max_shrink)
+        if problems:
+            print(f"❌ Generation {generation} failed verification:\n  - " + "\n  - ".join(problems))
+            sys.exit(1)
+        if not getattr(args, 'force', False):
+            print(f"✅ Generation {generation} verified: N={collection_size(generation_path(args.root, generation))}")
+        if args.command == 'activate':
+            switch(args.root, generation, "forced" if args.force else "verified")
+
+    elif args.command == 'rollback':
+        previous = read_state(args.root)["previous"]
+        if not previous or not os.path.isdir(generation_path(args.root, previous)):
+            print("❌ No previous generation to roll back to")
+            sys.exit(1)
+        switch(args.root, previous, "rollback")
+
+    elif args.command == 'list':
+        state = read_state(args.root)
+        for generation in reversed(list_generations(args.root)):
+            mark = "active" if generation == state["active"] else "previous" if generation == state["previous"] else ""
+            N = collection_size(generation_path(args.root, generation))
+            print(f"  {generation:<26}{mark:<10}N={N}")
+
+    elif args.command == 'gc':
+        removed = collect_garbage(args.root, args.keep, args.dry_run)
+        print(f"{'Found' if args.dry_run else 'Removed'} {len(removed)} old generation(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+In-memory inverted index loaded from the indexer's CSV output
+(term, filename, tf, df, doc_len, tfidf[, positions]).
+
+Documents get dense integer ids in filename order and every postings list is
+sorted by doc id, which is what the evaluators' intersections rely on.
+"""
+
+import os, csv, glob
+from array import array
+
+from .codec import positions_from_column, decode_positions
+
+
+class PostingList:
+    """Doc-id-sorted postings of one term; positions are kept encoded until a query needs them."""
+
+    __slots__ = ("term", "doc_ids", "tfs", "encoded_positions", "collection_df")
+
+    def __init__(self, term, doc_ids, tfs, encoded_positions=None, collection_df=None):
+        self.term = term
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.encoded_positions = encoded_positions
+        self.collection_df = collection_df    # df over all shards, when this index is one shard
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    @property
+    def df(self):
+        return self.collection_df if self.collection_df is not None else len(self.doc_ids)
+
+    @property
+    def has_positions(self):
+        return self.encoded_positions is not None
+
+    def positions(self, i):
+        return decode_positions(self.encoded_positions[i])
+
+
+class InvertedIndex:
+    def __init__(self, filenames, doc_lens, postings):
+        self.filenames = filenames          # doc id -> filename (<hash>.txt)
+        self.doc_lens = doc_lens            # doc id -> length in tokens
+        self.postings = postings            # term -> PostingList
+        self._ids = {name: i for i, name in enumerate(filenames)}
+        self.N = len(filenames)
+        self.avgdl = sum(doc_lens) / self.N if self.N else 0.0
+        # Statistics the scores use; only a shard of a larger collection has different ones
+        self.collection_N = self.N
+        self.collection_avgdl = self.avgdl
+        # No static priors: doc ids are the filename rank (MmapIndex may order them by prior)
+        self.doc_order = "filename"
+        self.priors = None
+
+    def __contains__(self, term):
+        return term in self.postings
+
+    def get(self, term):
+        return self.postings.get(term)
+
+    def doc_id(self, filename):
+        return self._ids.get(filename)
+
+    def file_id(self, doc):
+        """The id the wikipedia collection uses (filename without .txt)."""
+        return self.filenames[doc].split(".txt")[0]
+
+    @classmethod
+    def from_csv(cls, paths):
+        """Load one merged CSV or a glob of part files."""
+        files = sorted(glob.glob(paths)) if isinstance(paths, str) else list(paths)
+        if not files:
+            raise FileNotFoundError(f"No index files match {paths}")
+
+        rows = {}
+        doc_len_by_name = {}
+        for path in files:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    filename = row["filename"]
+                    doc_len_by_name[filename] = int(row["doc_len"])
+                    rows.setdefault(row["term"], []).append(
+                        (filename, int(float(row["tf"])), row.get("positions")))
+
+        filenames = sorted(doc_len_by_name)
+        ids = {name: i for i, name in enumerate(filenames)}
+        doc_lens = array("i", (doc_len_by_name[name] for name in filenames))
+
+        postings = {}
+        for term, entries in rows.items():
+            entries.sort(key=lambda e: ids[e[0]])
+            has_positions = entries[0][2] is not None
+            postings[term] = PostingList(
+                term,
+                array("i", (ids[e[0]] for e in entries)),
+                array("i", (e[1] for e in entries)),
+                [positions_from_column(e[2]) for e in entries] if has_positions else None,
+            )
+
+        return cls(filenames, doc_lens, postings)
+
+    @classmethod
+    def from_documents(cls, paths, tokenize):
+        """
+        Index crawl files (<hash>.txt) directly, without Spark: for small corpora such as the
+        evaluation set. Like the indexer, every line is tokenized on its own.
+        """
+        files = sorted(glob.glob(paths)) if isinstance(paths, str) else sorted(paths)
+        if not files:
+            raise FileNotFoundError(f"No documents match {paths}")
+
+        filenames = sorted(os.path.basename(path) for path in files)
+        ids = {name: i for i, name in enumerate(filenames)}
+        doc_lens = array("i", [0] * len(filenames))
+        counts = {}
+        for path in files:
+            doc = ids[os.path.basename(path)]
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    for term in tokenize(line):
+                        if term:
+                            doc_lens[doc] += 1
+                            tfs = counts.setdefault(term, {})
+                            tfs[doc] = tfs.get(doc, 0) + 1
+
+        postings = {term: PostingList(term, array("i", sorted(tfs)), array("i", (tfs[d] for d in sorted(tfs))))
+                    for term, tfs in counts.items()}
+        return cls(filenames, doc_lens, postings)
@@ -0,0 +1,342 @@
+"""
+Memory-mapped index: the indexer's postings in flat binary files, opened without
+parsing so a query only touches the pages of the terms it reads.
+
+Layout of an index directory (all integers little-endian):
+
+    meta.json           N, total_length, avgdl, terms, postings, has_positions, stemming
+    terms.txt           sorted terms, one per line (the term dictionary)
+    term_offsets.bin    int64[terms + 1]   postings of term t are [off[t], off[t + 1])
+    doc_ids.bin         int32[postings]    dense doc ids, sorted within each term
+    tfs.bin             int32[postings]
+    filenames.txt       doc id -> filename (<hash>.txt), in filename order (or by prior)
+    doc_lens.bin        int32[N]
+    priors.bin          float32[N]         static document prior, non-increasing (--priors only)
+    positions.bin       delta-encoded varint positions, back to back   (--positions only)
+    pos_offsets.bin     int64[postings + 1]                            (--positions only)
+    df.bin              int32[terms]       collection df of each term  (shards only)
+
+A shard (write_shards) is an index over part of the documents whose meta.json also
+holds the "collection" N / avgdl, which the scorers use instead of the shard's own.
+
+Doc ids are the filename rank, as in InvertedIndex.from_csv and the indexer's
+score bounds, so the evaluators work on either index unchanged. With priors
+(search_engine.pagerank), doc ids go by decreasing prior instead ("doc_order":
+"prior" in meta.json): the top-k evaluators then meet the best documents first,
+and the prior of a doc bounds the prior of every later one.
+
+"stemming" is the indexer's --use-stemming (from its stats file, see build --stats):
+queries must be tokenized the same way (search_engine.tokenizer.stem_query).
+Indexes that don't record it were always queried with stemming.
+"""
+
+import os, csv, glob, json, mmap, struct, sys, zlib
+from array import array
+from collections.abc import Mapping
+
+from .codec import positions_from_column
+from .index import PostingList
+
+FORMAT_VERSION = 1
+
+if sys.byteorder != "little":
+    raise ImportError("search_engine.mmap_index expects a little-endian host")
+
+
+# --- WRITING ---
+
+def _index_files(paths):
+    files = sorted(glob.glob(paths)) if isinstance(paths, str) else list(paths)
+    if not files:
+        raise FileNotFoundError(f"No index files match {paths}")
+    return files
+
+def _iter_rows(files):
+    for path in files:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+class _IndexWriter:
+    """Writes one index directory; postings are added term by term, in term order."""
+
+    def __init__(self, output, filenames, doc_lens, has_positions, priors=None, collection_df=False):
+        """collection_df: write df.bin (shards), even when no term reaches this writer."""
+        os.makedirs(output, exist_ok=True)
+        self.output = output
+        self.filenames = filenames
+        self.doc_lens = doc_lens
+        self.has_positions = has_positions
+        self.n_terms = self.n_postings = self.pos_bytes = 0
+
+        with open(os.path.join(output, "filenames.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"{name}\n" for name in filenames)
+        with open(os.path.join(output, "doc_lens.bin"), "wb") as f:
+            doc_lens.tofile(f)
+        self.has_priors = priors is not None
+        if self.has_priors:
+            with open(os.path.join(output, "priors.bin"), "wb") as f:
+                array("f", (priors.get(name, 0.0) for name in filenames)).tofile(f)
+
+        self.terms_f = open(os.path.join(output, "terms.txt"), "w", encoding="utf-8")
+        self.offsets_f = open(os.path.join(output, "term_offsets.bin"), "wb")
+        self.ids_f = open(os.path.join(output, "doc_ids.bin"), "wb")
+        self.tfs_f = open(os.path.join(output, "tfs.bin"), "wb")
+        self.df_f = open(os.path.join(output, "df.bin"), "wb") if collection_df else None
+        self.offsets_f.write(struct.pack("<q", 0))
+        if has_positions:
+            self.pos_f = open(os.path.join(output, "positions.bin"), "wb")
+            self.pos_off_f = open(os.path.join(output, "pos_offsets.bin"), "wb")
+            self.pos_off_f.write(struct.pack("<q", 0))
+
+    def add(self, term, group, collection_df=None):
+        """group: [(doc id, tf, positions column)] of one term, any order."""
+        group.sort()
+        self.terms_f.write(f"{term}\n")
+        array("i", (g[0] for g in group)).tofile(self.ids_f)
+        array("i", (g[1] for g in group)).tofile(self.tfs_f)
+        if self.df_f is not None:
+            array("i", [collection_df]).tofile(self.df_f)
+        if self.has_positions:
+            ends = array("q")
+            for g in group:
+                encoded = positions_from_column(g[2])
+                self.pos_f.write(encoded)
+                self.pos_bytes += len(encoded)
+                ends.append(self.pos_bytes)
+            ends.tofile(self.pos_off_f)
+        self.n_terms += 1
+        self.n_postings += len(group)
+        self.offsets_f.write(struct.pack("<q", self.n_postings))
+
+    def close(self, **extra_meta):
+        for f in (self.terms_f, self.offsets_f, self.ids_f, self.tfs_f, self.df_f,
+                  *((self.pos_f, self.pos_off_f) if self.has_positions else ())):
+            if f is not None:
+                f.close()
+        total_length = sum(self.doc_lens)
+        meta = {
+            "format": FORMAT_VERSION,
+            "N": len(self.filenames),
+            "total_length": total_length,
+            "avgdl": total_length / len(self.filenames) if self.filenames else 0.0,
+            "terms": self.n_terms,
+            "postings": self.n_postings,
+            "has_positions": self.has_positions,
+            "doc_order": "prior" if self.has_priors else "filename",
+            **extra_meta,
+        }
+        with open(os.path.join(self.output, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def _read_doc_table(files):
+    doc_len_by_name = {}
+    has_positions = False
+    for row in _iter_rows(files):
+        doc_len_by_name[row["filename"]] = int(row["doc_len"])
+        has_positions = has_positions or bool(row.get("positions"))
+    return doc_len_by_name, has_positions
+
+def _doc_order(doc_len_by_name, priors):
+    """Filenames in doc id order: by filename, or by decreasing prior (ties by filename)."""
+    if priors is None:
+        return sorted(doc_len_by_name)
+    # compare the float32 values stored in priors.bin, so the stored priors never increase
+    stored = array("f", (priors.get(name, 0.0) for name in doc_len_by_name))
+    return [name for _, name in sorted(zip((-p for p in stored), doc_len_by_name))]
+
+def _iter_term_groups(files, ids):
+    """(term, [(doc id, tf, positions)]) in term order; rows must be sorted by term."""
+    term, group = None, []
+    for row in _iter_rows(files):
+        if row["term"] != term:
+            if term is not None:
+                if row["term"] < term:
+                    raise ValueError(f"Input is not sorted by term ('{row['term']}' after '{term}'); "
+                                     f"merge it with Indexer/merge_index_files.py first")
+                yield term, group
+            term, group = row["term"], []
+        group.append((ids[row["filename"]], int(float(row["tf"])), row.get("positions")))
+    if term is not None:
+        yield term, group
+
+def _stemming_meta(stemming):
+    return {} if stemming is None else {"stemming": bool(stemming)}
+
+def write_index(paths, output, priors=None, stemming=None):
+    """
+    Convert a term-sorted index CSV (merge_index_files.py output or segments.py export)
+    into the memory-mapped layout. Two streaming passes: doc table, then postings.
+    priors: optional filename -> prior (search_engine.pagerank); docs are then ordered by it.
+    stemming: the indexer's stemming setting, recorded in meta.json for the query tokenizer.
+    """
+    files = _index_files(paths)
+    doc_len_by_name, has_positions = _read_doc_table(files)
+    filenames = _doc_order(doc_len_by_name, priors)
+    ids = {name: i for i, name in enumerate(filenames)}
+    writer = _IndexWriter(output, filenames, array("i", (doc_len_by_name[name] for name in filenames)),
+                          has_positions, priors)
+    for term, group in _iter_term_groups(files, ids):
+        writer.add(term, group)
+    return writer.close(**_stemming_meta(stemming))
+
+
+def shard_of(filename, shards):
+    """Shard of a document: stable across runs and machines (zlib's crc32 of the filename)."""
+    return zlib.crc32(filename.encode("utf-8")) % shards
+
+def write_shards(paths, output, shards, priors=None, stemming=None):
+    """
+    Split a term-sorted index CSV into `shards` document-partitioned indexes
+    <output>/shard-000 ... in the same two streaming passes as write_index.
+
+    Every shard stores the collection's N and avgdl in meta.json and each term's
+    collection df in df.bin, so a shard scores its documents exactly as the
+    unsharded index would and per-shard top-k lists can be merged by score.
+    """
+    files = _index_files(paths)
+    doc_len_by_name, has_positions = _read_doc_table(files)
+    filenames = _doc_order(doc_len_by_name, priors)
+    total_length = sum(doc_len_by_name.values())
+    collection = {"N": len(filenames), "total_length": total_length,
+                  "avgdl": total_length / len(filenames) if filenames else 0.0}
+
+    # Global doc id -> (shard, doc id within the shard); both in filename (or prior) order
+    shard_files = [[] for _ in range(shards)]
+    location = []
+    for name in filenames:
+        s = shard_of(name, shards)
+        location.append((s, len(shard_files[s])))
+        shard_files[s].append(name)
+    writers = [_IndexWriter(os.path.join(output, f"shard-{s:03d}"), names,
+                            array("i", (doc_len_by_name[name] for name in names)), has_positions, priors,
+                            collection_df=True)
+               for s, names in enumerate(shard_files)]
+
+    ids = {name: i for i, name in enumerate(filenames)}
+    for term, group in _iter_term_groups(files, ids):
+        parts = {}
+        for doc, tf, positions in group:
+            s, local = location[doc]
+            parts.setdefault(s, []).append((local, tf, positions))
+        for s, part in parts.items():
+            writers[s].add(term, part, collection_df=len(group))
+
+    metas = [writer.close(collection=collection, shard={"id": s, "count": shards}, **_stemming_meta(stemming))
+             for s, writer in enumerate(writers)]
+    layout = {"shards": shards, "partitioning": "crc32(filename) % shards", **collection,
+              "docs_per_shard": [m["N"] for m in metas], "postings_per_shard": [m["postings"] for m in metas],
+              **_stemming_meta(stemming)}
+    with open(os.path.join(output, "shards.json"), "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=2)
+    return layout
+
+
+# --- READING ---
+
+def _map(path, typecode):
+    """Read-only mapping of a binary file as a typed memoryview (empty files map to an empty array)."""
+    if os.path.getsize(path) == 0:
+        return None, memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped).cast(typecode)
+
+
+class _EncodedPositions:
+    """encoded_positions of one PostingList, sliced out of positions.bin on demand."""
+
+    __slots__ = ("data", "offsets", "start")
+
+    def __init__(self, data, offsets, start):
+        self.data = data
+        self.offsets = offsets
+        self.start = start
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[self.start + i]:self.offsets[self.start + i + 1]]
+
+
+class _PostingsView(Mapping):
+    """term -> PostingList, materialized lazily (InvertedIndex.postings interface)."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, term):
+        postings = self.index.get(term)
+        if postings is None:
+            raise KeyError(term)
+        return postings
+
+    def __iter__(self):
+        return iter(self.index.terms)
+
+    def __len__(self):
+        return len(self.index.terms)
+
+
+class MmapIndex:
+    """Same interface as InvertedIndex, backed by the files written by write_index."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format {self.meta.get('format')} in {path}")
+
+        with open(os.path.join(path, "terms.txt"), "r", encoding="utf-8") as f:
+            self.terms = [line.rstrip("\n") for line in f]
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        with open(os.path.join(path, "filenames.txt"), "r", encoding="utf-8") as f:
+            self.filenames = [line.rstrip("\n") for line in f]
+        self._ids = {name: i for i, name in enumerate(self.filenames)}
+
+        # Mappings stay open as long as the index (or a PostingList sliced from it) is referenced
+        self._maps = []
+        self.doc_lens = self._open("doc_lens.bin", "i")
+        self.doc_order = self.meta.get("doc_order", "filename")
+        self.priors = self._open("priors.bin", "f") if self.doc_order == "prior" else None
+        self._offsets = self._open("term_offsets.bin", "q")
+        self._doc_ids = self._open("doc_ids.bin", "i")
+        self._tfs = self._open("tfs.bin", "i")
+        if self.meta["has_positions"]:
+            self._pos_offsets = self._open("pos_offsets.bin", "q")
+            self._positions = self._open("positions.bin", "B")
+
+        self.N = self.meta["N"]
+        self.avgdl = self.meta["avgdl"]
+        self.stemming = self.meta.get("stemming", True)
+        collection = self.meta.get("collection", self.meta)
+        self.collection_N = collection["N"]
+        self.collection_avgdl = collection["avgdl"]
+        self._df = self._open("df.bin", "i") if "collection" in self.meta else None
+        self.postings = _PostingsView(self)
+
+    def _open(self, name, typecode):
+        mapped, view = _map(os.path.join(self.path, name), typecode)
+        if mapped is not None:
+            self._maps.append(mapped)
+        return view
+
+    def __contains__(self, term):
+        return term in self._term_ids
+
+    def get(self, term):
+        t = self._term_ids.get(term)
+        if t is None:
+            return None
+        start, end = self._offsets[t], self._offsets[t + 1]
+        encoded = _EncodedPositions(self._positions, self._pos_offsets, start) if self.meta["has_positions"] else None
+        return PostingList(term, self._doc_ids[start:end], self._tfs[start:end], encoded,
+                           self._df[t] if self._df is not None else None)
+
+    def doc_id(self, filename):
+        return self._ids.get(filename)
+
+    def file_id(self, doc):
+        """The id the wikipedia collection uses (filename without .txt)."""
+        return self.filenames[doc].split(".txt")[0]
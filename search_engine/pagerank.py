@@ -0,0 +1,119 @@
+"""
+Static document priors from the crawl's link graph (PageRank), for
+search_engine.build --priors:
+
+    python -m search_engine.pagerank crawler/storage/links --output IndexData/priors.csv
+    python -m search_engine.build IndexData/inverted_index.csv --output IndexData/engine --priors IndexData/priors.csv
+
+The crawler appends one record per stored page to <links dir>/<worker id>.edges:
+the 16-byte md5 of the page url (its storage file name), a uint32 link count and
+the 16-byte md5 of each link. Nodes are the stored pages; links to pages that were
+not stored are dropped. PageRank is a power iteration over the edge arrays
+(np.bincount as the sparse matrix-vector product), with the rank of pages
+without out-links spread uniformly.
+
+The prior of a page is log(1 + n * rank) / log(1 + n * max rank), in [0, 1]:
+a page with the average rank gets log 2 / log(1 + n * max rank).
+Requires numpy.
+"""
+
+import os, csv, glob, struct, argparse
+
+import numpy as np
+
+RECORD_HEAD = struct.Struct("<16sI")
+
+
+def read_edges(links_dir):
+    """(source digest, [target digests]) of every record in <links_dir>/*.edges."""
+    for path in sorted(glob.glob(os.path.join(links_dir, "*.edges"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        pos = 0
+        # a worker killed mid-write leaves a truncated last record: stop there
+        while pos + RECORD_HEAD.size <= len(data):
+            source, count = RECORD_HEAD.unpack_from(data, pos)
+            end = pos + RECORD_HEAD.size + 16 * count
+            if end > len(data):
+                break
+            yield source, [data[i:i + 16] for i in range(pos + RECORD_HEAD.size, end, 16)]
+            pos = end
+
+def link_graph(records):
+    """(filenames, source ids, target ids) with one node per stored page and no duplicate edges."""
+    records = list(records)
+    ids = {}
+    for source, _ in records:
+        ids.setdefault(source, len(ids))
+    src, dst = [], []
+    for source, targets in records:
+        for target in targets:
+            t = ids.get(target)
+            if t is not None and t != ids[source]:
+                src.append(ids[source])
+                dst.append(t)
+    n = max(len(ids), 1)
+    edges = np.unique(np.array(src, dtype=np.int64) * n + np.array(dst, dtype=np.int64))
+    filenames = [f"{digest.hex()}.txt" for digest in ids]
+    return filenames, (edges // n).astype(np.int32), (edges % n).astype(np.int32)
+
+def pagerank(src, dst, n, damping=0.85, tol=1e-10, max_iter=100):
+    """(rank per node summing to 1, iterations run) by power iteration."""
+    if n == 0:
+        return np.zeros(0), 0
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    rank = np.full(n, 1.0 / n)
+    for iteration in range(1, max_iter + 1):
+        spread = np.bincount(dst, weights=(rank * inv_degree)[src], minlength=n)
+        updated = damping * (spread + rank[dangling].sum() / n) + (1 - damping) / n
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < tol:
+            break
+    return rank, iteration
+
+def priors_from_ranks(rank):
+    """PageRank scaled to [0, 1] on a log scale (the best page gets 1)."""
+    if not len(rank):
+        return rank
+    scaled = np.log1p(rank * len(rank))
+    return scaled / scaled.max()
+
+
+# --- FILES ---
+
+def write_priors(path, filenames, rank):
+    """CSV of filename, pagerank, prior; best page first."""
+    prior = priors_from_ranks(rank)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "pagerank", "prior"])
+        for i in np.argsort(-rank, kind="stable"):
+            writer.writerow([filenames[i], f"{rank[i]:.6e}", f"{prior[i]:.6f}"])
+
+def read_priors(path):
+    """filename -> prior from a write_priors CSV."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return {row["filename"]: float(row["prior"]) for row in csv.DictReader(f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute PageRank priors from the crawler link graph')
+    parser.add_argument('links', help='Directory of <worker id>.edges files written by the crawler')
+    parser.add_argument('--output', required=True, help='Priors CSV for search_engine.build --priors')
+    parser.add_argument('--damping', type=float, default=0.85, help='Probability of following a link')
+    parser.add_argument('--tol', type=float, default=1e-10, help='Stop when the L1 change drops below this')
+    parser.add_argument('--max-iter', type=int, default=100)
+    args = parser.parse_args()
+
+    filenames, src, dst = link_graph(read_edges(args.links))
+    if not filenames:
+        raise SystemExit(f"No link records in {args.links}")
+    rank, iterations = pagerank(src, dst, len(filenames), args.damping, args.tol, args.max_iter)
+    write_priors(args.output, filenames, rank)
+    print(f"✅ PageRank of {len(filenames)} pages over {len(src)} links in {iterations} iterations -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Phrase matching and proximity-boosted ranking over a positional index
+(inverted_index.py --positions).
+
+Both modes avoid decoding positions wherever possible:
+- phrase: candidates come from a galloping intersection of the phrase words'
+  doc lists (cost driven by the shortest list), and positions are only checked
+  for candidates in score order until k of them match;
+- proximity: base BM25/TF-IDF scores are computed first and documents are
+  visited best-first; once base + the largest possible boost can no longer beat
+  the k-th score, the remaining documents keep their base score without ever
+  decoding a position list.
+"""
+
+import heapq
+from bisect import bisect_left
+
+from .scoring import Scorer
+
+
+# --- INTERSECTION PRIMITIVES ---
+
+def gallop(seq, target, lo=0):
+    """Smallest i >= lo with seq[i] >= target: exponential probe, then binary search."""
+    n = len(seq)
+    if lo >= n or seq[lo] >= target:
+        return lo
+    step, hi = 1, lo + 1
+    while hi < n and seq[hi] < target:
+        lo = hi
+        step <<= 1
+        hi = lo + step
+    return bisect_left(seq, target, lo + 1, min(hi, n))
+
+def intersect(lists):
+    """
+    Intersect sorted integer lists. Returns [(doc, [index of doc in each list])],
+    probing the longer lists with galloping search from the shortest one.
+    """
+    if not lists:
+        return []
+    order = sorted(range(len(lists)), key=lambda i: len(lists[i]))
+    cursors = [0] * len(lists)
+    matches = []
+    for j, doc in enumerate(lists[order[0]]):
+        idx = [0] * len(lists)
+        idx[order[0]] = j
+        for i in order[1:]:
+            c = gallop(lists[i], doc, cursors[i])
+            cursors[i] = c
+            if c == len(lists[i]):
+                return matches
+            if lists[i][c] != doc:
+                break
+            idx[i] = c
+        else:
+            matches.append((doc, idx))
+    return matches
+
+def phrase_match(position_lists, offsets):
+    """True if some p has p + offsets[i] - offsets[0] in position_lists[i] for every i."""
+    order = sorted(range(len(position_lists)), key=lambda i: len(position_lists[i]))
+    anchor = order[0]
+    cursors = [0] * len(position_lists)
+    for p in position_lists[anchor]:
+        start = p - offsets[anchor]
+        for i in order[1:]:
+            want = start + offsets[i]
+            c = gallop(position_lists[i], want, cursors[i])
+            cursors[i] = c
+            if c == len(position_lists[i]):
+                return False
+            if position_lists[i][c] != want:
+                break
+        else:
+            return True
+    return False
+
+def min_span(position_lists):
+    """Length of the shortest window holding at least one position from every list."""
+    heap = [(positions[0], i, 0) for i, positions in enumerate(position_lists)]
+    heapq.heapify(heap)
+    hi = max(entry[0] for entry in heap)
+    best = hi - heap[0][0] + 1
+    while True:
+        lo, i, j = heapq.heappop(heap)
+        best = min(best, hi - lo + 1)
+        if j + 1 == len(position_lists[i]):
+            return best
+        nxt = position_lists[i][j + 1]
+        hi = max(hi, nxt)
+        heapq.heappush(heap, (nxt, i, j + 1))
+
+
+# --- EVALUATOR ---
+
+def _normalize_terms(terms):
+    """Accept ['world', 'war'] or [('world', 0), ('war', 1)] (term, query position) pairs."""
+    pairs = []
+    for i, term in enumerate(terms):
+        pairs.append(term if isinstance(term, tuple) else (term, i))
+    return pairs
+
+
+class PositionalEvaluator:
+    def __init__(self, index, method="bm25", proximity_weight=0.5, prior_weight=0.0):
+        self.index = index
+        self.scorer = Scorer(index, method, prior_weight=prior_weight)
+        self.proximity_weight = proximity_weight
+
+    def _lookup(self, postings, doc):
+        i = bisect_left(postings.doc_ids, doc)
+        return i if i < len(postings) and postings.doc_ids[i] == doc else None
+
+    def _base_scores(self, terms):
+        scores = {}
+        touched = 0
+        for term in terms:
+            postings = self.index.get(term)
+            if postings is None:
+                continue
+            idf = self.scorer.idf(postings.df)
+            for doc, tf in zip(postings.doc_ids, postings.tfs):
+                scores[doc] = scores.get(doc, 0.0) + self.scorer.score(tf, doc, idf)
+            touched += len(postings)
+        return scores, touched
+
+    def search(self, terms, k=50, phrase=False, stats=None):
+        """
+        Top-k [(doc, score)] for the query terms (in query order).
+        Multi-word entity tokens contribute to the base score; single words drive
+        phrase matching and proximity. stats (optional dict) gets the counts of this call.
+        """
+        pairs = _normalize_terms(terms)
+        unique_terms = list(dict.fromkeys(t for t, _ in pairs))
+        words = [(t, pos) for t, pos in pairs if " " not in t]
+        stats = {} if stats is None else stats
+        if phrase:
+            return self._phrase_search(unique_terms, words, k, stats)
+        return self._proximity_search(unique_terms, words, k, stats)
+
+    def _phrase_search(self, unique_terms, words, k, stats):
+        stats.update(candidates=0, positions_decoded=0, postings_scored=0)
+        postings = [self.index.get(t) for t, _ in words]
+        if not words or any(p is None or not p.has_positions for p in postings):
+            return []
+        offsets = [pos for _, pos in words]
+
+        candidates = intersect([p.doc_ids for p in postings])
+        stats["candidates"] = len(candidates)
+        if not candidates:
+            return []
+
+        # Score candidates only; non-phrase terms are looked up per candidate
+        idfs = {t: self.scorer.idf(self.index.get(t).df) for t in unique_terms if t in self.index}
+        heap = []
+        for doc, idx in candidates:
+            score = self.scorer.prior(doc)
+            for term in idfs:
+                p = self.index.get(term)
+                i = self._lookup(p, doc)
+                if i is not None:
+                    score += self.scorer.score(p.tfs[i], doc, idfs[term])
+            heap.append((-score, doc, idx))
+        stats["postings_scored"] = len(candidates) * len(idfs)
+        heapq.heapify(heap)
+
+        # Best-first verification: the first k verified docs are exactly the top-k
+        results = []
+        while heap and len(results) < k:
+            neg_score, doc, idx = heapq.heappop(heap)
+            position_lists = [p.positions(i) for p, i in zip(postings, idx)]
+            stats["positions_decoded"] += len(position_lists)
+            if phrase_match(position_lists, offsets):
+                results.append((doc, -neg_score))
+        return results
+
+    def _proximity_search(self, unique_terms, words, k, stats):
+        scores, touched = self._base_scores(unique_terms)
+        stats.update(candidates=len(scores), positions_decoded=0, postings_scored=touched, docs_skipped=0)
+
+        offsets = {}
+        for term, pos in words:
+            offsets.setdefault(term, pos)
+        prox_terms = [t for t in offsets if t in self.index and self.index.get(t).has_positions]
+        ranked = [(-(s + self.scorer.prior(d)), d) for d, s in scores.items()]
+        heapq.heapify(ranked)
+        if len(prox_terms) < 2:
+            return [(d, -s) for s, d in heapq.nsmallest(k, ranked)]
+
+        prox_idf = {t: self.scorer.idf(self.index.get(t).df) for t in prox_terms}
+        max_boost = self.proximity_weight * sum(prox_idf.values())
+
+        top = []  # min-heap of (score, doc)
+        while ranked:
+            neg_base, doc = heapq.heappop(ranked)
+            base = -neg_base
+            if len(top) == k and base + max_boost <= top[0][0]:
+                # Nothing left can overtake the current k-th result, even with a full boost
+                stats["docs_skipped"] = len(ranked) + 1
+                break
+            score = base + self._proximity_boost(doc, prox_terms, offsets, prox_idf, stats)
+            if len(top) < k:
+                heapq.heappush(top, (score, doc))
+            elif score > top[0][0]:
+                heapq.heapreplace(top, (score, doc))
+
+        return [(d, s) for s, d in sorted(top, reverse=True)]
+
+    def _proximity_boost(self, doc, prox_terms, offsets, prox_idf, stats):
+        present = []
+        for term in prox_terms:
+            p = self.index.get(term)
+            i = self._lookup(p, doc)
+            if i is not None:
+                present.append((term, p, i))
+        if len(present) < 2:
+            return 0.0
+
+        position_lists = [p.positions(i) for _, p, i in present]
+        stats["positions_decoded"] += len(position_lists)
+        query_offsets = [offsets[t] for t, _, _ in present]
+        query_span = max(query_offsets) - min(query_offsets) + 1
+        tightness = min(1.0, query_span / min_span(position_lists))
+        return self.proximity_weight * sum(prox_idf[t] for t, _, _ in present) * tightness
@@ -0,0 +1,176 @@
+"""
+Pre-forked query serving: the parent opens the index once, then forks worker
+processes that each run a ThreadingHTTPServer. The memory-mapped postings are
+shared through the page cache and the parent's Python objects (term dictionary,
+doc table) copy-on-write, so N workers use N cores without N copies of the index.
+
+Connections are balanced either by all workers accepting on one listening
+socket inherited from the parent (default), or with SO_REUSEPORT, where every
+worker binds its own socket and the kernel spreads connections (--reuse-port).
+
+Reload (SIGHUP, or --watch noticing that the index directory or its meta.json
+changed): the parent opens the new index, forks a new generation of workers and
+only then asks the old ones to stop. Old workers stop accepting, finish their
+in-flight requests and exit, so there is no moment without a listening worker.
+"""
+
+import os, gc, sys, time, signal, socket, threading
+from http.server import ThreadingHTTPServer
+
+
+def index_version(path):
+    """What changes when a new index is put in place: the resolved directory and its meta.json."""
+    real = os.path.realpath(path)
+    try:
+        return real, os.stat(os.path.join(real, "meta.json")).st_mtime_ns
+    except OSError:
+        return real, None
+
+
+def _serve(handler, address, listener, verbose):
+    """Body of one worker process."""
+    if listener is None:
+        server = ThreadingHTTPServer(address, handler, bind_and_activate=False)
+        server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.server_bind()
+        server.server_activate()
+    else:
+        server = ThreadingHTTPServer(address, handler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = listener
+    server.verbose = verbose
+    server.daemon_threads = False       # server_close() waits for in-flight requests
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})   # blocked by the parent around fork()
+    server.serve_forever()
+    # closes only this process' copy of a shared listener, after the in-flight requests
+    server.server_close()
+
+
+class PreforkServer:
+    def __init__(self, load_engine, make_handler, address, workers=2, reuse_port=False,
+                 watch_path=None, watch_interval=0, verbose=False):
+        """
+        load_engine(): a fresh engine over the current index; make_handler(engine): its request
+        handler class. watch_path / watch_interval enable reloads when index_version changes.
+        """
+        self.load_engine = load_engine
+        self.make_handler = make_handler
+        self.address = address
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.watch_path = watch_path
+        self.watch_interval = watch_interval
+        self.verbose = verbose
+        self.listener = None
+        self.children = {}          # pid -> (generation, fork time)
+        self.generation = 0
+        self.handler = None
+        self.reload_requested = False
+        self.stopping = False
+
+    def serve_forever(self):
+        if not self.reuse_port:
+            self.listener = socket.create_server(self.address, backlog=1024)
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reload_requested", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", True))
+
+        self._start_generation()
+        version = index_version(self.watch_path) if self.watch_path else None
+        next_check = time.monotonic() + self.watch_interval
+        try:
+            while not self.stopping:
+                self._reap()
+                if self.watch_interval and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.watch_interval
+                    current = index_version(self.watch_path)
+                    if current != version:
+                        version = current
+                        self.reload_requested = True
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self._start_generation()
+                time.sleep(0.2)
+        finally:
+            self._stop_generations(lambda g: True)
+            while self.children:
+                self._reap(block=True)
+            if self.listener is not None:
+                self.listener.close()
+
+    def _start_generation(self):
+        """Open the index, fork a new set of workers, then retire the previous set."""
+        started = time.time()
+        gc.unfreeze()
+        try:
+            engine = self.load_engine()
+        except Exception as e:
+            if self.handler is None:
+                raise
+            print(f"❌ Reload failed, keeping generation {self.generation}: {e}")
+            return
+        self.handler = self.make_handler(engine)
+        del engine
+        self.generation += 1
+        # Objects created so far are never collected in the workers, so collections don't
+        # touch (and copy) the pages holding them
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            self._fork()
+        print(f"🚀 Generation {self.generation}: {self.workers} workers on "
+              f"http://{self.address[0]}:{self.address[1]}/query-stem ({time.time() - started:.2f}s)")
+        self._stop_generations(lambda g: g < self.generation)
+
+    def _fork(self):
+        sys.stdout.flush()          # or the child would print the parent's buffered output again
+        # a SIGTERM arriving before the worker installed its own handler waits until it has
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve(self.handler, self.address, self.listener, self.verbose)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+        self.children[pid] = (self.generation, time.monotonic())
+
+    def _stop_generations(self, retire):
+        for pid, (generation, _) in list(self.children.items()):
+            if retire(generation):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def _reap(self, block=False):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            generation, forked = self.children.pop(pid, (None, 0))
+            # a worker of the live generation died on its own: replace it, unless it could not
+            # even start (e.g. the port is taken), which would only repeat
+            if generation == self.generation and not self.stopping and status != 0:
+                if time.monotonic() - forked < 1:
+                    print(f"❌ Worker {pid} failed on startup (status {status}); not restarting it")
+                else:
+                    print(f"⚠️ Worker {pid} exited with status {status}; restarting it")
+                    self._fork()
+            if block:
+                return
@@ -0,0 +1,90 @@
+"""
+Result-record store: everything needed to render one search result, keyed by
+dense doc id, in a memory-mapped file next to the index.
+
+    records.bin          per doc: varint len + UTF-8 title, varint len + UTF-8 snippet,
+                         varint image count (nothing for pages missing from the storage)
+    record_offsets.bin   int64[N + 1]   record of doc d is [off[d], off[d + 1])
+
+The filename comes from the index, the url is derived from the title and the
+image ids are <file_id>-0 .. <file_id>-(count-1), exactly as insertScript.py
+builds them, so none of those are stored. Rendering the top-k reads k short
+byte ranges instead of opening k crawled files or fetching full documents.
+"""
+
+import os
+from array import array
+
+from .codec import encode_varints, read_varint
+from .documents import CrawlStore
+from .mmap_index import _map
+
+
+def write_records(index, output, storage, image_dir=None):
+    """Build the record file for every doc of `index` from the crawl storage."""
+    crawl = CrawlStore(storage, image_dir)
+    offsets = array("q", [0])
+    missing = 0
+    with open(os.path.join(output, "records.bin"), "wb") as f:
+        for filename in index.filenames:
+            record = crawl.record(filename)
+            if record is None:
+                # Empty record: the page is not in the storage
+                missing += 1
+                offsets.append(offsets[-1])
+                continue
+            title = record["docId"].encode("utf-8")
+            snippet = record["chunkedBody"].encode("utf-8")
+            data = (encode_varints([len(title)]) + title + encode_varints([len(snippet)]) + snippet
+                    + encode_varints([len(record["images"])]))
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    with open(os.path.join(output, "record_offsets.bin"), "wb") as f:
+        offsets.tofile(f)
+    return missing
+
+
+class RecordStore:
+    """Result records by dense doc id, read from the files written by write_records."""
+
+    def __init__(self, path, index):
+        self.index = index
+        self._maps = []
+        self._data = self._open(path, "records.bin", "B")
+        self._offsets = self._open(path, "record_offsets.bin", "q")
+        if len(self._offsets) != index.N + 1:
+            raise ValueError(f"Record store in {path} has {len(self._offsets) - 1} docs, index has {index.N}")
+
+    def _open(self, path, name, typecode):
+        mapped, view = _map(os.path.join(path, name), typecode)
+        if mapped is not None:
+            self._maps.append(mapped)
+        return view
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "record_offsets.bin"))
+
+    def record(self, doc):
+        """None for docs whose page was missing from the storage at build time."""
+        data = self._data[self._offsets[doc]:self._offsets[doc + 1]]
+        if not len(data):
+            return None
+        n, pos = read_varint(data, 0)
+        title = bytes(data[pos:pos + n]).decode("utf-8")
+        n, pos = read_varint(data, pos + n)
+        snippet = bytes(data[pos:pos + n]).decode("utf-8")
+        images, _ = read_varint(data, pos + n)
+        file_id = self.index.file_id(doc)
+        return {
+            "docId": title,
+            "chunkedBody": snippet,
+            "filename": self.index.filenames[doc],
+            "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            "images": [f"{file_id}-{i}" for i in range(images)],
+        }
+
+    def fetch(self, docs):
+        """Records of the given doc ids (in the same order), read in ascending file order."""
+        by_doc = {doc: self.record(doc) for doc in sorted(set(docs))}
+        return [by_doc[doc] for doc in docs]
@@ -0,0 +1,66 @@
+"""
+Term weighting shared by every evaluator. Formulas and defaults match
+getDocuments in backend/services/mongoService.js so rankings line up.
+
+With a prior weight w and an index built with priors (search_engine.pagerank),
+a document scores w * prior(doc) on top of its term contributions.
+"""
+
+import math
+
+K1 = 1.5
+B = 0.75
+
+
+def bm25_idf(N, df):
+    return math.log((N - df + 0.5) / (df + 0.5) + 1)
+
+
+def tfidf_idf(N, df):
+    return math.log(N / df) if df else 0.0
+
+
+def bm25_term(tf, dl, avgdl, idf, k1=K1, b=B):
+    return idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * (dl / avgdl)))
+
+
+def tfidf_term(tf, idf):
+    return tf * idf
+
+
+class Scorer:
+    """Per-posting contribution for one ranking method ('tfidf' or 'bm25') over one index."""
+
+    def __init__(self, index, method="tfidf", k1=K1, b=B, prior_weight=0.0):
+        if method not in ("tfidf", "bm25"):
+            raise ValueError(f"Unknown ranking method: {method}")
+        self.index = index
+        self.method = method
+        self.k1 = k1
+        self.b = b
+        priors = getattr(index, "priors", None)
+        self.priors = priors if prior_weight and priors is not None and len(priors) else None
+        self.prior_weight = prior_weight if self.priors is not None else 0.0
+        # In prior order the prior of doc d bounds every later doc; otherwise only the maximum does
+        self.priors_sorted = getattr(index, "doc_order", "filename") == "prior"
+        self.max_prior = self.prior_weight * max(self.priors) if self.priors is not None else 0.0
+
+    def idf(self, df):
+        if self.method == "bm25":
+            return bm25_idf(self.index.collection_N, df)
+        return tfidf_idf(self.index.collection_N, df)
+
+    def score(self, tf, doc, idf):
+        if self.method == "bm25":
+            return bm25_term(tf, self.index.doc_lens[doc], self.index.collection_avgdl, idf, self.k1, self.b)
+        return tfidf_term(tf, idf)
+
+    def prior(self, doc):
+        """Weighted static prior of doc (0 without priors)."""
+        return self.prior_weight * self.priors[doc] if self.priors is not None else 0.0
+
+    def prior_bound(self, doc):
+        """Upper bound of prior() over all docs >= doc."""
+        if self.priors is None or doc >= len(self.priors):
+            return 0.0
+        return self.prior(doc) if self.priors_sorted else self.max_prior
@@ -0,0 +1,226 @@
+"""
+HTTP query server over a local index, answering the backend's contract:
+
+    GET /query-stem?query=<text>&optionName=tfidf|bm25[&match=any|all|phrase]
+    -> {imageResult, textResult, searchTime, profile: {measures, sysSnapshot}}
+
+Started on a shard (search_engine.build --shards), it also answers the coordinator:
+
+    GET /shard?term=<t>&term=<t>...&optionName=tfidf|bm25&k=<k>[&match=any|all|phrase][&pos=<p>...]
+    -> {hits: [result records with score, best first], postings_scored}
+
+With suggestions built (search_engine.build --suggest), it answers typeahead:
+
+    GET /suggest?q=<typed prefix>&k=<k>
+    -> {suggestions: [{text, weight}], took_us}
+
+Usage:
+    python -m search_engine.build 'IndexData/inverted_index.csv' --output IndexData/engine --storage crawler/storage
+    python -m search_engine.server --index IndexData/engine --port 3001
+"""
+
+import os, json, time, resource, argparse, functools
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from .engine import SearchEngine, Profile
+from .mmap_index import MmapIndex
+from .documents import CrawlStore
+from .records import RecordStore
+from .suggest import Suggester
+from .spell import Speller
+from .topk import ScoreBounds
+
+
+def sys_snapshot():
+    """
+    Memory of this process, shaped like sysSnapshot in backend/utils/profiler.js. pss_mb
+    (Linux) splits shared pages between the processes mapping them, so it shows what a
+    pre-forked worker really adds.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    snapshot = {"rss_mb": round(rss / 1048576, 1), "pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    snapshot["pss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return snapshot
+
+
+def process_query(engine, params, top_k):
+    """(status, body) for one /query-stem request, mirroring queryController.processQuery."""
+    started = time.perf_counter()
+    profile = Profile()
+    with profile.span("validate_input"):
+        query = (params.get("query", [""])[0] or "").strip()
+        method = (params.get("optionName", ["tfidf"])[0] or "tfidf").lower()
+        match = (params.get("match", ["any"])[0] or "any").lower()
+    if not query:
+        return 400, {"success": False, "result": [], "error": "Empty query"}
+
+    records = engine.search(query, method, top_k, profile, match)
+    with profile.span("get_image_filenames"):
+        image_result = [image_id for record in records for image_id in record["images"]]
+    text_result = [{"_id": r["_id"], "docId": r["docId"], "chunkedBody": r["chunkedBody"],
+                    "filename": r["filename"], "url": r["url"]} for r in records]
+    elapsed = time.perf_counter() - started
+    profile.measures.append({"name": "total_request", "duration_ms": round(elapsed * 1000, 2)})
+    return 200, {
+        "imageResult": image_result,
+        "textResult": text_result,
+        "searchTime": f"{elapsed:.3f}",
+        "profile": {"measures": profile.measures, "sysSnapshot": sys_snapshot(), **profile.info},
+    }
+
+
+def shard_query(engine, params, top_k):
+    """(status, body) for one /shard request: top-k records of this shard for tokenized terms."""
+    terms = params.get("term", [])
+    if "pos" in params:
+        # token offsets of the terms, for phrase matching
+        if len(params["pos"]) != len(terms):
+            raise ValueError("Expected one pos per term")
+        terms = list(zip(terms, map(int, params["pos"])))
+    if "group" in params:
+        # OR group number of each term, for AND queries with spelling expansions
+        if len(params["group"]) != len(terms):
+            raise ValueError("Expected one group per term")
+        groups = {}
+        for term, g in zip(terms, map(int, params["group"])):
+            groups.setdefault(g, []).append(term)
+        terms = [groups[g] for g in sorted(groups)]
+    method = (params.get("optionName", ["tfidf"])[0] or "tfidf").lower()
+    k = int(params.get("k", [top_k])[0])
+    match = (params.get("match", ["any"])[0] or "any").lower()
+    ranked, stats = engine.rank(terms, method, k, match)
+    return 200, {"hits": engine.records(ranked), "postings_scored": stats.get("postings_scored", 0)}
+
+
+def suggest_query(engine, params, top_k):
+    """(status, body) for one /suggest request."""
+    if engine.suggester is None:
+        return 404, {"suggestions": [], "error": "No suggestions built for this index (search_engine.build --suggest)"}
+    started = time.perf_counter()
+    suggestions = engine.suggester.suggest(params.get("q", [""])[0], int(params.get("k", [10])[0]))
+    return 200, {"suggestions": suggestions, "took_us": round((time.perf_counter() - started) * 1e6, 1)}
+
+
+def make_handler(engine, top_k):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = {"/query-stem": process_query, "/shard": shard_query,
+                     "/suggest": suggest_query}.get(url.path.rstrip("/"))
+            if route is None:
+                return self._send(404, {"error": "Not found"})
+            try:
+                status, body = route(engine, parse_qs(url.query), top_k)
+            except ValueError as e:
+                status, body = 400, {"success": False, "result": [], "error": str(e)}
+            except Exception as e:
+                self.log_error("query failed: %s", e)
+                return self._send(500, "Server Error")
+            self._send(status, body)
+
+        def _send(self, status, body):
+            data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8" if isinstance(body, str)
+                             else "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_request(self, code="-", size="-"):
+            if self.server.verbose:
+                super().log_request(code, size)
+
+    return QueryHandler
+
+
+def load_engine(args):
+    from .tokenizer import stem_query
+
+    index = MmapIndex(args.index)
+    bounds = {}
+    if args.bounds:
+        try:
+            ScoreBounds.check_doc_ids(args.bounds, index)
+        except ValueError as e:
+            raise SystemExit(f"--bounds don't match the index: {e} (leave --bounds out)")
+        bounds = {m: ScoreBounds.from_csv(args.bounds, m) for m in ("tfidf", "bm25")}
+    if RecordStore.exists(args.index):
+        store = RecordStore(args.index, index)
+    elif args.storage:
+        store = CrawlStore(args.storage, args.images, index)
+    else:
+        raise SystemExit("No record store in the index directory: build it with --storage, or pass --storage")
+    suggester = Suggester(args.index) if Suggester.exists(args.index) else None
+    speller = None
+    if Speller.exists(args.index) and args.max_expansions > 0:
+        speller = Speller(args.index, args.max_edits, args.max_expansions, args.expand_below_df)
+    tokenize = functools.partial(stem_query, use_stemming=index.stemming)
+    return SearchEngine(index, store, tokenize, args.algorithm, bounds, suggester, speller, args.prior_weight)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve /query-stem from a local memory-mapped index')
+    parser.add_argument('--index', required=True, help='Directory written by search_engine.build')
+    parser.add_argument('--storage', default=None,
+                        help='Crawl storage directory (<hash>.txt files); only needed without a record store')
+    parser.add_argument('--images', default=None, help='Image directory (default: <storage>/images)')
+    parser.add_argument('--bounds', default=None, help='<output>_blocks from inverted_index.py --score-bounds')
+    parser.add_argument('--algorithm', default='bmw', choices=['exhaustive', 'wand', 'bmw', 'maxscore', 'numpy'],
+                        help='Top-k evaluation strategy (numpy: vectorized scoring, needs numpy)')
+    parser.add_argument('--top-k', type=int, default=50, help='Results per query')
+    parser.add_argument('--prior-weight', type=float, default=1.0,
+                        help='Weight of the static prior in every score (index built with --priors; 0 turns it off)')
+    parser.add_argument('--max-edits', type=int, default=2, help='Spelling: largest edit distance of an expansion')
+    parser.add_argument('--max-expansions', type=int, default=2,
+                        help='Spelling: expansions per unknown term (0 turns spelling correction off)')
+    parser.add_argument('--expand-below-df', type=int, default=0,
+                        help='Spelling: also expand terms found in at most this many documents')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Pre-forked worker processes sharing the mapped index (one per core)')
+    parser.add_argument('--reuse-port', action='store_true',
+                        help='Each worker binds its own SO_REUSEPORT socket instead of sharing one')
+    parser.add_argument('--watch', type=float, default=0,
+                        help='Check the index every this many seconds and reload workers when it changes')
+    args = parser.parse_args()
+
+    if args.workers > 1 or args.watch or args.reuse_port:
+        from .prefork import PreforkServer
+        print(f"📂 Serving {args.index} with {args.workers} workers")
+        PreforkServer(lambda: load_engine(args), lambda engine: make_handler(engine, args.top_k),
+                      (args.host, args.port), args.workers, args.reuse_port,
+                      watch_path=args.index, watch_interval=args.watch, verbose=args.verbose).serve_forever()
+        return
+
+    started = time.time()
+    engine = load_engine(args)
+    print(f"📂 Opened index {args.index}: N={engine.index.N}, {len(engine.index.postings)} terms "
+          f"({time.time() - started:.2f}s)")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(engine, args.top_k))
+    server.verbose = args.verbose
+    print(f"🚀 Listening on http://{args.host}:{args.port}/query-stem")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
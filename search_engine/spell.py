@@ -0,0 +1,221 @@
+"""
+Spelling correction for query terms with a SymSpell deletion index, written into
+<index>/spell/ by search_engine.build --spell (or python -m search_engine.spell <index>).
+
+Every frequent dictionary term (df >= min_df) is indexed under each string
+obtained by deleting up to max_edits characters from its first prefix_length
+characters. A query term is looked up the same way, so candidates within
+max_edits edits are found with a few dozen exact lookups and no scan of the
+dictionary. Candidates are checked with the real (optimal string alignment)
+edit distance and ranked by distance, then df; a term is expanded to the most
+frequent of its closest candidates.
+
+Layout of <index>/spell/ (all integers little-endian uint32):
+
+    spell.json          terms, deletes, max_edits, prefix_length, min_df, block
+    terms.bin           every dictionary term, front-coded (codec.write_front_coded)
+    term_blocks.bin
+    dfs.bin             uint32[terms]
+    deletes.bin         delete variants of the frequent terms, front-coded
+    delete_blocks.bin
+    delete_offsets.bin  uint32[deletes + 1]   terms of delete d are [off[d], off[d + 1])
+    delete_terms.bin    uint32[]              term ids
+
+Expansion only touches terms with at most `low_df` hits, and is bounded by
+max_edits, max_expansions per term and the postings the expansions add
+(backend/services/spellService.js reads the same files).
+"""
+
+import os, json, argparse
+from array import array
+
+from .codec import write_front_coded, FrontCoded
+from .mmap_index import _map
+
+FORMAT_VERSION = 1
+
+
+def deletes(word, max_edits, prefix_length):
+    """The word's prefix and every string made by deleting up to max_edits characters from it."""
+    level = {word[:prefix_length]}
+    found = set(level)
+    for _ in range(max_edits):
+        level = {w[:i] + w[i + 1:] for w in level if len(w) > 1 for i in range(len(w))} - found
+        found |= level
+    return found
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance of a and b, or limit + 1 when it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+# --- WRITING ---
+
+def write_spelling(term_dfs, output, max_edits=2, prefix_length=7, min_df=2, block=16):
+    """Write <output>/spell/ from term -> df."""
+    os.makedirs(os.path.join(output, "spell"), exist_ok=True)
+    path = lambda name: os.path.join(output, "spell", name)
+
+    terms = sorted(term_dfs, key=lambda term: term.encode("utf-8"))
+    variants = {}
+    for t, term in enumerate(terms):
+        # entity phrases and digits are left alone: they are not typed letter by letter
+        if term_dfs[term] >= min_df and term.isalpha():
+            for variant in deletes(term, max_edits, prefix_length):
+                variants.setdefault(variant.encode("utf-8"), []).append(t)
+    keys = sorted(variants)
+
+    write_front_coded(path("terms.bin"), path("term_blocks.bin"), [term.encode("utf-8") for term in terms], block)
+    write_front_coded(path("deletes.bin"), path("delete_blocks.bin"), keys, block)
+    with open(path("dfs.bin"), "wb") as f:
+        array("I", (term_dfs[term] for term in terms)).tofile(f)
+    offsets, ids = array("I", [0]), array("I")
+    for key in keys:
+        ids.extend(variants[key])
+        offsets.append(len(ids))
+    with open(path("delete_offsets.bin"), "wb") as f:
+        offsets.tofile(f)
+    with open(path("delete_terms.bin"), "wb") as f:
+        ids.tofile(f)
+
+    meta = {"format": FORMAT_VERSION, "terms": len(terms), "deletes": len(keys), "postings": len(ids),
+            "max_edits": max_edits, "prefix_length": prefix_length, "min_df": min_df, "block": block}
+    with open(path("spell.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def build(paths, output, max_edits=2, prefix_length=7, min_df=2):
+    """Spelling index of index directories (one index, or all shards, whose df is the collection df)."""
+    from .mmap_index import MmapIndex
+
+    term_dfs = {}
+    for path in paths:
+        index = MmapIndex(path)
+        for term in index.terms:
+            term_dfs[term] = max(term_dfs.get(term, 0), index.get(term).df)
+    return write_spelling(term_dfs, output, max_edits, prefix_length, min_df)
+
+
+# --- READING ---
+
+class Speller:
+    """Bounded expansion of rare or unknown query terms to frequent dictionary neighbours."""
+
+    def __init__(self, path, max_edits=None, max_expansions=2, low_df=0, max_postings=500_000):
+        path = os.path.join(path, "spell")
+        with open(os.path.join(path, "spell.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported spelling format {self.meta.get('format')} in {path}")
+        self.max_edits = min(max_edits or self.meta["max_edits"], self.meta["max_edits"])
+        self.max_expansions = max_expansions
+        self.low_df = low_df
+        self.max_postings = max_postings
+
+        self._maps = []
+        block = self.meta["block"]
+        self.terms = FrontCoded(self._open(path, "terms.bin", "B"), self._open(path, "term_blocks.bin", "I"), block)
+        self.deletes = FrontCoded(self._open(path, "deletes.bin", "B"), self._open(path, "delete_blocks.bin", "I"), block)
+        self.dfs = self._open(path, "dfs.bin", "I")
+        self.delete_offsets = self._open(path, "delete_offsets.bin", "I")
+        self.delete_terms = self._open(path, "delete_terms.bin", "I")
+
+    def _open(self, path, name, typecode):
+        mapped, view = _map(os.path.join(path, name), typecode)
+        if mapped is not None:
+            self._maps.append(mapped)
+        return view
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "spell", "spell.json"))
+
+    def df(self, term):
+        t = self.terms.index_of(term.encode("utf-8"))
+        return self.dfs[t] if t is not None else 0
+
+    def _term(self, t):
+        block = self.meta["block"]
+        return self.terms.decode_block(t // block)[t % block].decode("utf-8")
+
+    def candidates(self, term):
+        """[(distance, -df, candidate)] of dictionary terms within max_edits, nearest and most frequent first."""
+        ids = set()
+        for variant in deletes(term, self.max_edits, self.meta["prefix_length"]):
+            d = self.deletes.index_of(variant.encode("utf-8"))
+            if d is not None:
+                ids.update(self.delete_terms[self.delete_offsets[d]:self.delete_offsets[d + 1]])
+        found = []
+        for t in ids:
+            candidate = self._term(t)
+            distance = edit_distance(term, candidate, self.max_edits)
+            if 0 < distance <= self.max_edits:
+                found.append((distance, -self.dfs[t], candidate))
+        return sorted(found)
+
+    def expand(self, terms, grouped=False):
+        """
+        (terms with rare/unknown ones expanded, {term: [expansions]}). grouped: one list per query term
+        instead, the term followed by its expansions (even if no document has it), for AND queries.
+        """
+        expanded, groups, corrections = [], [], {}
+        for term in terms:
+            df = self.df(term)
+            if df > 0:
+                expanded.append(term)
+            group = [term]
+            groups.append(group)
+            # short words have too many neighbours to guess from
+            if df > self.low_df or len(term) <= self.max_edits or not term.isalpha():
+                continue
+            added, postings = [], 0
+            candidates = self.candidates(term)
+            for distance, neg_df, candidate in candidates:
+                # only the closest neighbours: a farther one is rarely what was meant
+                if distance > candidates[0][0] or len(added) == self.max_expansions \
+                        or (added and postings - neg_df > self.max_postings):
+                    break
+                if -neg_df <= df or candidate in terms:
+                    continue                  # only more frequent neighbours, and no repeats
+                added.append(candidate)
+                postings -= neg_df
+            if added:
+                corrections[term] = added
+                expanded.extend(added)
+                group.extend(added)
+        return (groups if grouped else expanded), corrections
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the spelling index of an index directory')
+    parser.add_argument('index', help='Directory written by search_engine.build')
+    parser.add_argument('--query', default=None, help='Print the expansion of these (already tokenized) terms')
+    parser.add_argument('--max-edits', type=int, default=2, help='Largest edit distance indexed / searched')
+    parser.add_argument('--prefix-length', type=int, default=7, help='Characters of each term that get deletes')
+    parser.add_argument('--min-df', type=int, default=2, help='Only terms in this many documents are suggested')
+    args = parser.parse_args()
+
+    if args.query is not None:
+        speller = Speller(args.index, args.max_edits)
+        terms, corrections = speller.expand(args.query.split())
+        for term, added in corrections.items():
+            print(f"{term} -> {', '.join(f'{c} (df {speller.df(c)})' for c in added)}")
+        print(" ".join(terms))
+        return
+    meta = build([args.index], args.index, args.max_edits, args.prefix_length, args.min_df)
+    print(f"✅ Wrote {meta['terms']} terms, {meta['deletes']} delete variants to {args.index}/spell")
+
+if __name__ == "__main__":
+    main()
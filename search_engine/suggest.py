@@ -0,0 +1,237 @@
+"""
+Typeahead suggestions: a sorted, front-coded array of completions with the top-k
+of every popular prefix precomputed, written into <index>/suggest/ by
+search_engine.build --suggest (or python -m search_engine.suggest <index>) and
+read back through mmap.
+
+Completions are page titles, the words of titles (weighted by the df of their
+stem) and the entity phrases of the term dictionary ("lionel messi", weighted by
+df). A title's weight is the df of its rarest stemmed word, plus its count in an
+optional query log, which ranks it above everything that was never searched.
+
+Layout of <index>/suggest/ (all integers little-endian uint32):
+
+    suggest.json        count, block, k, threshold, prefixes
+    keys.bin            normalized completions, front-coded in blocks of `block` keys:
+                        per key varint(shared prefix bytes) varint(suffix bytes) suffix
+    key_blocks.bin      uint32[blocks + 1]   byte offset of each block in keys.bin
+    weights.bin         uint32[count]
+    labels.bin          display text of each key (a title's original case, else the key)
+    label_offsets.bin   uint32[count + 1]
+    prefixes.bin        front-coded prefixes matching more than `threshold` keys
+    prefix_blocks.bin   uint32[prefix blocks + 1]
+    top.bin             uint32[prefixes * k]  best keys of each prefix (0xFFFFFFFF pads)
+
+Keys are sorted by their UTF-8 bytes, so the keys with a prefix are one range.
+A lookup is either one binary search in the prefix table, or a binary search in
+the keys and a scan of at most `threshold` of them (backend/services/suggestService.js
+reads the same files).
+"""
+
+import os, json, heapq, argparse
+from array import array
+
+from .codec import write_front_coded, FrontCoded
+from .mmap_index import _map
+from .tokenizer import normalize
+
+FORMAT_VERSION = 1
+NO_KEY = 0xFFFFFFFF
+
+
+def normalize_prefix(text):
+    """Lowercase alphanumeric words joined by single spaces; a trailing space is kept (next word)."""
+    words = normalize(text).split()
+    return " ".join(words) + (" " if words and text[-1:].isspace() else "")
+
+
+# --- WRITING ---
+
+def collect_completions(index, titles, stem, query_log=None):
+    """key -> (weight, label): titles, title words and the dictionary's entity phrases."""
+    def df(term):
+        postings = index.get(term)
+        return postings.df if postings is not None else 0
+
+    completions = {}
+    def offer(key, weight, label=""):
+        if key and weight > completions.get(key, (-1,))[0]:
+            completions[key] = (weight, label or key)
+
+    log_counts = {}
+    for query in query_log or []:
+        key = normalize_prefix(query).strip()
+        log_counts[key] = log_counts.get(key, 0) + 1
+
+    for title in titles:
+        key = normalize_prefix(title).strip()
+        if not key:
+            continue
+        dfs = [max(df(word), df(stem(word))) for word in key.split()]
+        for word, word_df in zip(key.split(), dfs):
+            offer(word, word_df)
+        offer(key, min(dfs) + log_counts.get(key, 0) * index.collection_N, title)
+    for term in index.terms:
+        if " " in term:                       # entity phrases are indexed unstemmed
+            offer(normalize_prefix(term).strip(), df(term))
+    return completions
+
+def write_suggestions(completions, output, k=10, block=16, threshold=64):
+    """Write <output>/suggest/ from key -> (weight, label)."""
+    os.makedirs(os.path.join(output, "suggest"), exist_ok=True)
+    path = lambda name: os.path.join(output, "suggest", name)
+
+    keys = sorted(completions, key=lambda key: key.encode("utf-8"))
+    encoded = [key.encode("utf-8") for key in keys]
+    weights = array("I", (min(completions[key][0], NO_KEY - 1) for key in keys))
+    rank = lambda i: (-weights[i], i)
+
+    # Prefixes (by characters) matching more than `threshold` keys, found level by level:
+    # only the ranges of such prefixes can hold one at the next length
+    prefixes, ranges = [], [(0, len(keys), 0)]
+    while ranges:
+        next_ranges = []
+        for lo, hi, length in ranges:
+            i = lo
+            while i < hi:
+                if len(keys[i]) <= length:
+                    i += 1
+                    continue
+                prefix, j = keys[i][:length + 1], i + 1
+                while j < hi and keys[j].startswith(prefix):
+                    j += 1
+                if j - i > threshold:
+                    top = heapq.nsmallest(k, range(i, j), key=rank)
+                    prefixes.append((prefix.encode("utf-8"), top + [NO_KEY] * (k - len(top))))
+                    next_ranges.append((i, j, length + 1))
+                i = j
+        ranges = next_ranges
+    prefixes.sort()
+
+    write_front_coded(path("keys.bin"), path("key_blocks.bin"), encoded, block)
+    write_front_coded(path("prefixes.bin"), path("prefix_blocks.bin"), [p for p, _ in prefixes], block)
+    with open(path("weights.bin"), "wb") as f:
+        weights.tofile(f)
+    with open(path("top.bin"), "wb") as f:
+        array("I", (i for _, top in prefixes for i in top)).tofile(f)
+    label_offsets = array("I", [0])
+    with open(path("labels.bin"), "wb") as f:
+        for key in keys:
+            label = completions[key][1].encode("utf-8")
+            f.write(label)
+            label_offsets.append(label_offsets[-1] + len(label))
+    with open(path("label_offsets.bin"), "wb") as f:
+        label_offsets.tofile(f)
+
+    meta = {"format": FORMAT_VERSION, "count": len(keys), "block": block, "k": k,
+            "threshold": threshold, "prefixes": len(prefixes)}
+    with open(path("suggest.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# --- READING ---
+
+class Suggester:
+    """Prefix completions from <index>/suggest/, memory-mapped."""
+
+    def __init__(self, path):
+        path = os.path.join(path, "suggest")
+        with open(os.path.join(path, "suggest.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported suggestion format {self.meta.get('format')} in {path}")
+        self._maps = []
+        block = self.meta["block"]
+        self.keys = FrontCoded(self._open(path, "keys.bin", "B"), self._open(path, "key_blocks.bin", "I"), block)
+        self.prefixes = FrontCoded(self._open(path, "prefixes.bin", "B"),
+                                    self._open(path, "prefix_blocks.bin", "I"), block)
+        self.weights = self._open(path, "weights.bin", "I")
+        self.labels = self._open(path, "labels.bin", "B")
+        self.label_offsets = self._open(path, "label_offsets.bin", "I")
+        self.top = self._open(path, "top.bin", "I")
+
+    def _open(self, path, name, typecode):
+        mapped, view = _map(os.path.join(path, name), typecode)
+        if mapped is not None:
+            self._maps.append(mapped)
+        return view
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "suggest", "suggest.json"))
+
+    def _label(self, i):
+        return bytes(self.labels[self.label_offsets[i]:self.label_offsets[i + 1]]).decode("utf-8")
+
+    def suggest(self, text, k=None):
+        """[{"text", "weight"}] best first for a typed prefix."""
+        k = min(k or self.meta["k"], self.meta["k"])
+        prefix = normalize_prefix(text).encode("utf-8")
+        if not prefix:
+            return []
+        j, candidates = self.prefixes.lower_bound(prefix)
+        if candidates and candidates[0] == prefix:
+            ids = [i for i in self.top[j * self.meta["k"]:j * self.meta["k"] + k] if i != NO_KEY]
+            return [{"text": self._label(i), "weight": self.weights[i]} for i in ids]
+
+        # Not a popular prefix: at most `threshold` keys start with it
+        i, keys = self.keys.lower_bound(prefix)
+        matches = []
+        while keys and keys[0].startswith(prefix):
+            matches.append((-self.weights[i], i))
+            keys.pop(0)
+            i += 1
+            if not keys and i < self.meta["count"]:
+                keys = self.keys.decode_block(i // self.meta["block"])
+        return [{"text": self._label(i), "weight": -w} for w, i in sorted(matches)[:k]]
+
+
+def read_query_log(path):
+    """Queries of a log: one per line, or JSON lines with "query" (benchmarks/make_query_log.py)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line).get("query", "") if line.startswith("{") else line
+
+def build(paths, output, query_log=None, k=10, threshold=64):
+    """Suggestions of index directories (one index, or all shards), from the titles in their record stores."""
+    from .mmap_index import MmapIndex
+    from .records import RecordStore
+    from .tokenizer import _stemmer
+
+    completions = {}
+    for path in paths:
+        if not RecordStore.exists(path):
+            raise FileNotFoundError(f"No record store in {path}: build the index with --storage")
+        index = MmapIndex(path)
+        store = RecordStore(path, index)
+        titles = (record["docId"] for record in map(store.record, range(index.N)) if record is not None)
+        log = read_query_log(query_log) if query_log else None
+        for key, entry in collect_completions(index, titles, _stemmer.stem, log).items():
+            if entry[0] > completions.get(key, (-1,))[0]:
+                completions[key] = entry
+    return write_suggestions(completions, output, k, threshold=threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the typeahead suggestions of an index directory')
+    parser.add_argument('index', help='Directory written by search_engine.build (with its record store)')
+    parser.add_argument('--query', default=None, help='Print the suggestions for this prefix instead of building')
+    parser.add_argument('--query-log', default=None, help='Queries (one per line, or JSON lines with "query") '
+                                                          'whose counts boost matching titles')
+    parser.add_argument('--k', type=int, default=10, help='Suggestions kept per prefix')
+    parser.add_argument('--threshold', type=int, default=64,
+                        help='Precompute the top-k of prefixes matching more keys than this')
+    args = parser.parse_args()
+
+    if args.query is not None:
+        for suggestion in Suggester(args.index).suggest(args.query, args.k):
+            print(f"{suggestion['weight']:>8}  {suggestion['text']}")
+        return
+    meta = build([args.index], args.index, args.query_log, args.k, args.threshold)
+    print(f"✅ Wrote {meta['count']} suggestions, {meta['prefixes']} precomputed prefixes to {args.index}/suggest")
+
+if __name__ == "__main__":
+    main()
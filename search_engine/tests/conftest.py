@@ -0,0 +1,71 @@
+"""Small synthetic indexes for the search_engine tests."""
+
+import base64, csv, random
+from array import array
+
+import pytest
+
+from search_engine.codec import encode_positions
+from search_engine.index import InvertedIndex, PostingList
+
+
+def build_index(docs, doc_lens=None):
+    """
+    InvertedIndex of {filename: [(term, position)]}, like the indexer writes it with --positions
+    (positions count removed stop words, so they can have gaps). doc_lens default to the token counts.
+    """
+    filenames = sorted(docs)
+    lens = array("i", (doc_lens[name] if doc_lens else len(docs[name]) for name in filenames))
+    occurrences = {}
+    for doc, name in enumerate(filenames):
+        for term, pos in docs[name]:
+            occurrences.setdefault(term, {}).setdefault(doc, []).append(pos)
+    postings = {}
+    for term, by_doc in occurrences.items():
+        ids = sorted(by_doc)
+        postings[term] = PostingList(term, array("i", ids), array("i", (len(by_doc[d]) for d in ids)),
+                                     [encode_positions(sorted(by_doc[d])) for d in ids])
+    return InvertedIndex(filenames, lens, postings)
+
+
+def write_csv(path, docs):
+    """Term-sorted index CSV of {filename: [(term, position)]}, as merge_index_files.py writes it."""
+    occurrences = {}
+    for name, tokens in docs.items():
+        for term, pos in tokens:
+            occurrences.setdefault(term, {}).setdefault(name, []).append(pos)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["term", "filename", "tf", "df", "doc_len", "tfidf", "positions"])
+        for term in sorted(occurrences):
+            for name, positions in sorted(occurrences[term].items()):
+                writer.writerow([term, name, len(positions), len(occurrences[term]), len(docs[name]), 0,
+                                 base64.b64encode(encode_positions(sorted(positions))).decode("ascii")])
+    return str(path)
+
+
+def synthetic_docs(seed=7, docs=300, vocabulary=60, max_len=80):
+    """{filename: [(term, position)]} with Zipf-like term frequencies and varied lengths."""
+    rng = random.Random(seed)
+    terms = [f"t{i}" for i in range(vocabulary)]
+    weights = [1 / (i + 1) for i in range(vocabulary)]
+    corpus = {}
+    for d in range(docs):
+        words = rng.choices(terms, weights, k=rng.randint(5, max_len))
+        corpus[f"{d:04x}.txt"] = [(word, pos) for pos, word in enumerate(words)]
+    return corpus
+
+
+@pytest.fixture(scope="session")
+def make_index():
+    return build_index
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return synthetic_docs()
+
+
+@pytest.fixture
+def make_csv(tmp_path):
+    return lambda docs, name="index.csv": write_csv(tmp_path / name, docs)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from search_engine.index import InvertedIndex
+from search_engine.mmap_index import MmapIndex, write_index, write_shards, shard_of
+from search_engine.topk import TopKEvaluator
+
+DOCS = {
+    "a.txt": [("war", 0), ("world", 1), ("war", 2)],
+    "b.txt": [("messi", 0), ("goal", 1)],
+    "c.txt": [("world", 0), ("cup", 1), ("messi", 2)],
+}
+
+
+def test_shards_without_terms_open(make_csv, tmp_path):
+    output = tmp_path / "shards"
+    shards = 8
+    write_shards(make_csv(DOCS), str(output), shards)
+    used = {shard_of(name, shards) for name in DOCS}
+    assert len(used) < shards
+    for s in range(shards):
+        index = MmapIndex(os.path.join(output, f"shard-{s:03d}"))
+        assert index.N == (sum(shard_of(name, shards) == s for name in DOCS))
+        assert index.collection_N == len(DOCS)
+        if s not in used:
+            assert len(index.postings) == 0 and index.get("war") is None
+    # collection df is kept in each shard holding the term
+    for s in used:
+        index = MmapIndex(os.path.join(output, f"shard-{s:03d}"))
+        for term in index.terms:
+            assert index.get(term).df == len({n for n, tokens in DOCS.items() if term in dict(tokens)})
+
+
+def assert_same_postings(got, expected):
+    assert (got.N, got.avgdl) == (expected.N, pytest.approx(expected.avgdl))
+    assert list(got.filenames) == list(expected.filenames)
+    assert list(got.doc_lens) == list(expected.doc_lens)
+    assert sorted(got.terms) == sorted(expected.postings)
+    for term in expected.postings:
+        a, b = got.get(term), expected.get(term)
+        assert (list(a.doc_ids), list(a.tfs), a.df) == (list(b.doc_ids), list(b.tfs), b.df)
+        assert [a.positions(i) for i in range(len(a))] == [b.positions(i) for i in range(len(b))]
+
+
+def test_write_index_round_trip(corpus, make_csv, tmp_path):
+    path = make_csv(corpus)
+    write_index(path, str(tmp_path / "engine"))
+    index = MmapIndex(str(tmp_path / "engine"))
+    assert_same_postings(index, InvertedIndex.from_csv(path))
+    assert index.doc_order == "filename" and index.priors is None
+
+
+def test_stemming_setting_is_recorded(make_csv, tmp_path):
+    path = make_csv(DOCS)
+    write_index(path, str(tmp_path / "unrecorded"))
+    write_index(path, str(tmp_path / "unstemmed"), stemming=False)
+    write_shards(path, str(tmp_path / "shards"), 2, stemming=False)
+    assert MmapIndex(str(tmp_path / "unrecorded")).stemming is True
+    assert MmapIndex(str(tmp_path / "unstemmed")).stemming is False
+    assert {MmapIndex(str(tmp_path / "shards" / f"shard-{s:03d}")).stemming for s in range(2)} == {False}
+
+
+def test_priors_order_documents(corpus, make_csv, tmp_path):
+    priors = {name: (i * 37 % 101) / 100 for i, name in enumerate(sorted(corpus))}
+    write_index(make_csv(corpus), str(tmp_path / "engine"), priors)
+    index = MmapIndex(str(tmp_path / "engine"))
+    assert index.doc_order == "prior"
+    assert list(index.priors) == pytest.approx(sorted(priors.values(), reverse=True))
+    assert [priors[name] for name in index.filenames] == pytest.approx(list(index.priors))
+    # every posting list stays sorted by (the new) doc id
+    for term in index.terms:
+        ids = list(index.get(term).doc_ids)
+        assert ids == sorted(ids)
+
+
+def test_shards_score_like_the_whole_index(corpus, make_csv, tmp_path):
+    path = make_csv(corpus)
+    write_index(path, str(tmp_path / "engine"))
+    write_shards(path, str(tmp_path / "shards"), 4)
+    whole = MmapIndex(str(tmp_path / "engine"))
+    shards = [MmapIndex(str(tmp_path / "shards" / f"shard-{s:03d}")) for s in range(4)]
+    assert sum(shard.N for shard in shards) == whole.N
+    for method in ("tfidf", "bm25"):
+        for terms in (["t0"], ["t3", "t17"], ["t1", "t8", "t40"]):
+            expected = {whole.filenames[d]: s for d, s in TopKEvaluator(whole, method).search(terms, 1000, "exhaustive")}
+            got = {}
+            for shard in shards:
+                for d, s in TopKEvaluator(shard, method).search(terms, 1000, "bmw"):
+                    got[shard.filenames[d]] = s
+            assert got.keys() == expected.keys()
+            assert [got[name] for name in expected] == pytest.approx(list(expected.values()), rel=1e-9)
@@ -0,0 +1,44 @@
+from search_engine.engine import SearchEngine
+from search_engine.positional import PositionalEvaluator
+
+STOP_WORDS = {"the", "of", "a"}
+
+
+def tokenize(text, positions=False):
+    """Drops stop words like the indexer, keeping each word's offset in the text."""
+    tokens = [(word, i) for i, word in enumerate(text.lower().split()) if word not in STOP_WORDS]
+    return tokens if positions else [word for word, _ in tokens]
+
+
+def index_of(make_index, texts):
+    return make_index({name: tokenize(text, positions=True) for name, text in texts.items()})
+
+
+def test_phrase_with_inner_stop_word_matches(make_index):
+    index = index_of(make_index, {
+        "a.txt": "the lord of the rings trilogy",
+        "b.txt": "lord rings of the ring bearer",
+        "c.txt": "rings lord of the",
+    })
+    engine = SearchEngine(index, None, tokenize)
+    ranked, stats = engine.rank(tokenize("lord of the rings", positions=True), "bm25", 10, "phrase")
+    assert stats["candidates"] == 3   # every doc holds both words; only a.txt has them in order
+    assert [index.filenames[doc] for doc, _ in ranked] == ["a.txt"]
+
+
+def test_phrase_needs_the_stop_word_gap(make_index):
+    index = index_of(make_index, {"a.txt": "lord of the rings", "b.txt": "lord rings"})
+    evaluator = PositionalEvaluator(index, "bm25")
+    assert [doc for doc, _ in evaluator.search([("lord", 0), ("rings", 3)], phrase=True)] == [0]
+    assert [doc for doc, _ in evaluator.search(["lord", "rings"], phrase=True)] == [1]
+
+
+def test_search_tokenizes_phrases_with_offsets(make_index):
+    class Store:
+        def fetch(self, docs):
+            return [{"doc": doc} for doc in docs]
+
+    index = index_of(make_index, {"a.txt": "battle of the bulge", "b.txt": "bulge battle"})
+    engine = SearchEngine(index, Store(), tokenize)
+    assert [r["_id"] for r in engine.search("battle of the bulge", "tfidf", 10, match="phrase")] == ["a"]
+    assert len(engine.search("battle of the bulge", "tfidf", 10, match="all")) == 2
@@ -0,0 +1,54 @@
+from search_engine.engine import SearchEngine
+from search_engine.spell import Speller, write_spelling, edit_distance
+
+DFS = {"barcelona": 120, "barcelon": 1, "battle": 300, "bottle": 40, "messi": 90, "lionel messi": 30, "war": 500}
+
+
+def speller(tmp_path, **options):
+    write_spelling(DFS, str(tmp_path))
+    return Speller(str(tmp_path), **options)
+
+
+def test_edit_distance_counts_transpositions():
+    assert edit_distance("messi", "mesis", 2) == 1
+    assert edit_distance("barcelna", "barcelona", 2) == 1
+    assert edit_distance("war", "battle", 2) == 3
+
+
+def test_unknown_terms_expand_to_frequent_neighbours(tmp_path):
+    terms, corrections = speller(tmp_path).expand(["barcelna", "mesi", "war"])
+    assert corrections == {"barcelna": ["barcelona"], "mesi": ["messi"]}
+    assert terms == ["barcelona", "messi", "war"]
+
+
+def test_known_and_short_terms_are_kept(tmp_path):
+    terms, corrections = speller(tmp_path).expand(["battle", "wr", "2024"])
+    assert terms == ["battle"] and corrections == {}
+
+
+def test_rare_terms_expand_below_low_df(tmp_path):
+    terms, corrections = speller(tmp_path, low_df=1).expand(["barcelon"])
+    assert corrections == {"barcelon": ["barcelona"]}
+    assert terms == ["barcelon", "barcelona"]
+
+
+def test_grouped_expansion_keeps_one_group_per_word(tmp_path):
+    groups, corrections = speller(tmp_path).expand(["barcelna", "war", "zzzz"], grouped=True)
+    assert groups == [["barcelna", "barcelona"], ["war"], ["zzzz"]]
+    assert corrections == {"barcelna": ["barcelona"]}
+
+
+def test_and_query_matches_a_misspelled_word_through_any_expansion(tmp_path, make_index):
+    class Store:
+        def fetch(self, docs):
+            return [{"doc": doc} for doc in docs]
+
+    texts = {"a.txt": "battle war", "b.txt": "bottle war", "c.txt": "battle", "d.txt": "bottle", "e.txt": "war"}
+    index = make_index({name: [(w, i) for i, w in enumerate(text.split())] for name, text in texts.items()})
+    write_spelling({term: len(index.get(term)) for term in index.postings}, str(tmp_path))
+    engine = SearchEngine(index, Store(), str.split, speller=Speller(str(tmp_path)))
+    for match, expected in (("all", ["a", "b"]), ("any", ["a", "b", "c", "d", "e"])):
+        results = engine.search("bittle war", "bm25", 10, match=match)
+        # either correction satisfies the word; the corrections are not both required
+        assert sorted(r["_id"] for r in results) == expected
+    assert engine.search("bittle zzzz", "bm25", 10, match="all") == []
@@ -0,0 +1,30 @@
+import random
+
+from search_engine.suggest import Suggester, write_suggestions
+
+
+def test_suggestions_match_a_scan_of_all_keys(tmp_path):
+    rng = random.Random(11)
+    words = ["battle", "bat", "barcelona", "bulge", "world", "war", "cup", "messi", "lionel"]
+    completions = {}
+    for _ in range(300):
+        key = " ".join(rng.sample(words, rng.randint(1, 3)))
+        completions[key] = (rng.randint(1, 1000), key.title())
+    # a small threshold puts popular prefixes in the precomputed table and leaves others to the scan
+    write_suggestions(completions, str(tmp_path), k=5, block=4, threshold=8)
+    suggester = Suggester(str(tmp_path))
+
+    prefixes = {key[:n] for key in completions for n in range(1, len(key) + 1)}
+    for prefix in sorted(prefixes):
+        expected = sorted(((-w, key) for key, (w, _) in completions.items() if key.startswith(prefix)))[:5]
+        got = suggester.suggest(prefix)
+        assert [s["weight"] for s in got] == [-w for w, _ in expected]
+        assert all(s["text"].lower().startswith(prefix) for s in got)
+
+
+def test_unknown_prefix_has_no_suggestions(tmp_path):
+    write_suggestions({"messi": (3, "Messi")}, str(tmp_path))
+    suggester = Suggester(str(tmp_path))
+    assert suggester.suggest("zz") == []
+    assert suggester.suggest("   ") == []
+    assert suggester.suggest("MES") == [{"text": "Messi", "weight": 3}]
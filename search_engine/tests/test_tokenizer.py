@@ -0,0 +1,7 @@
+from search_engine.tokenizer import stem_query
+
+
+def test_query_is_stemmed_only_like_the_index():
+    assert stem_query("Running goals") == ["run", "goal"]
+    assert stem_query("Running goals", use_stemming=False) == ["running", "goals"]
+    assert stem_query("Running goals", positions=True, use_stemming=False) == [("running", 0), ("goals", 1)]
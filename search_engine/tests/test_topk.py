@@ -0,0 +1,161 @@
+import json, random
+from array import array
+
+import pytest
+
+from search_engine.scoring import Scorer
+from search_engine.topk import TopKEvaluator, ScoreBounds, DOC_IDS_FILE, doc_ids_checksum
+
+ALGORITHMS = ("wand", "bmw", "maxscore")
+
+
+def queries(index, count=60, seed=3):
+    rng = random.Random(seed)
+    terms = sorted(index.postings)
+    return [rng.sample(terms, rng.randint(1, 4)) + (["missing"] if q % 10 == 0 else []) for q in range(count)]
+
+
+def assert_same_top_k(got, expected):
+    """Same scores rank by rank (up to float rounding); documents may only differ where scores tie."""
+    assert [s for _, s in got] == pytest.approx([s for _, s in expected], rel=1e-9, abs=1e-12)
+    if expected:
+        kth = expected[-1][1] + 1e-9
+        assert {d for d, s in got if s > kth} == {d for d, s in expected if s > kth}
+
+
+def with_priors(index, ordered):
+    """Attach static priors: decreasing with the doc id (prior order) or shuffled (filename order)."""
+    rng = random.Random(5)
+    priors = sorted((rng.random() for _ in range(index.N)), reverse=True)
+    if not ordered:
+        rng.shuffle(priors)
+    index.priors = array("f", priors)
+    index.doc_order = "prior" if ordered else "filename"
+    return index
+
+
+@pytest.fixture(scope="module")
+def index(corpus, make_index):
+    return make_index(corpus)
+
+
+@pytest.mark.parametrize("method", ["tfidf", "bm25"])
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_pruned_evaluators_match_exhaustive(index, method, algorithm):
+    evaluator = TopKEvaluator(index, method, block_size=8)
+    scored = total = 0
+    for terms in queries(index):
+        for k in (1, 10):
+            expected, stats = evaluator.search(terms, k, "exhaustive"), {}
+            assert_same_top_k(evaluator.search(terms, k, algorithm, stats), expected)
+            scored += stats["postings_scored"]
+            total += stats["postings_total"]
+    assert scored < total
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+@pytest.mark.parametrize("algorithm", ALGORITHMS + ("and",))
+def test_priors_keep_pruning_safe(corpus, make_index, algorithm, ordered):
+    index = with_priors(make_index(corpus), ordered)
+    evaluator = TopKEvaluator(index, "bm25", block_size=8, prior_weight=2.0)
+    reference = "exhaustive" if algorithm != "and" else None
+    for terms in queries(index, 30):
+        got = evaluator.search(terms, 10, algorithm)
+        if reference:
+            assert_same_top_k(got, evaluator.search(terms, 10, reference))
+        else:
+            assert_same_top_k(got, conjunctive_reference(index, "bm25", terms, 10, 2.0))
+
+
+def conjunctive_reference(index, method, terms, k, prior_weight=0.0):
+    """Brute-force top-k of the documents holding every term."""
+    scorer = Scorer(index, method, prior_weight=prior_weight)
+    postings = [index.get(t) for t in dict.fromkeys(terms)]
+    if any(p is None for p in postings):
+        return []
+    docs = set(postings[0].doc_ids).intersection(*(p.doc_ids for p in postings[1:]))
+    scores = {}
+    for p in postings:
+        idf = scorer.idf(p.df)
+        for doc, tf in zip(p.doc_ids, p.tfs):
+            if doc in docs:
+                scores[doc] = scores.get(doc, 0.0) + scorer.score(tf, doc, idf)
+    ranked = sorted(((d, s + scorer.prior(d)) for d, s in scores.items()), key=lambda e: (-e[1], e[0]))
+    return ranked[:k]
+
+
+@pytest.mark.parametrize("method", ["tfidf", "bm25"])
+def test_conjunctive_matches_brute_force(index, method):
+    evaluator = TopKEvaluator(index, method, block_size=8)
+    for terms in queries(index):
+        for k in (1, 10):
+            assert_same_top_k(evaluator.search(terms, k, "and"), conjunctive_reference(index, method, terms, k))
+
+
+def test_conjunctive_is_driven_by_the_shortest_list(index):
+    rare = min(index.postings, key=lambda t: len(index.get(t)))
+    common = sorted(index.postings, key=lambda t: -len(index.get(t)))[:3]
+    evaluator = TopKEvaluator(index, "bm25", block_size=8)
+    stats = {}
+    evaluator.search([rare, *common], 10, "and", stats)
+    assert stats["postings_scored"] <= len(index.get(rare)) * 4
+
+
+@pytest.mark.parametrize("method", ["tfidf", "bm25"])
+def test_conjunctive_or_groups_match_brute_force(index, method):
+    """A doc needs one term of each group (a word and its expansions) and scores every term it holds."""
+    evaluator = TopKEvaluator(index, method, block_size=8)
+    scorer = Scorer(index, method)
+    rng = random.Random(9)
+    terms = sorted(index.postings)
+    for _ in range(40):
+        picked = rng.sample(terms, rng.randint(2, 6))
+        cut = rng.randint(1, len(picked) - 1)
+        groups = [picked[:cut], picked[cut:]] + ([["missing", picked[0]]] if rng.random() < 0.2 else [])
+        holders = [set().union(*(index.get(t).doc_ids for t in g if index.get(t))) for g in groups]
+        scores = {}
+        for t in dict.fromkeys(t for g in groups for t in g):
+            p = index.get(t)
+            if p is None:
+                continue
+            for doc, tf in zip(p.doc_ids, p.tfs):
+                if all(doc in h for h in holders):
+                    scores[doc] = scores.get(doc, 0.0) + scorer.score(tf, doc, scorer.idf(p.df))
+        expected = sorted(scores.items(), key=lambda e: (-e[1], e[0]))[:10]
+        assert_same_top_k(evaluator.search(groups, 10, "and"), expected)
+
+
+def test_bounds_for_other_method_are_refused(index):
+    with pytest.raises(ValueError):
+        TopKEvaluator(index, "tfidf", ScoreBounds("bm25", {}))
+
+
+def test_bounds_over_other_doc_ids_are_refused(index, tmp_path):
+    blocks = tmp_path / "index_output_blocks"
+    blocks.mkdir()
+    with pytest.raises(ValueError, match="no doc id scheme"):
+        ScoreBounds.check_doc_ids(str(blocks), index)
+    scheme = {"doc_order": "filename", "N": index.N, "checksum": doc_ids_checksum(index.filenames)}
+    (blocks / DOC_IDS_FILE).write_text(json.dumps(scheme))
+    ScoreBounds.check_doc_ids(str(blocks), index)
+    (blocks / DOC_IDS_FILE).write_text(json.dumps({**scheme, "checksum": doc_ids_checksum(index.filenames[::-1])}))
+    with pytest.raises(ValueError, match="other documents"):
+        ScoreBounds.check_doc_ids(str(blocks), index)
+    (blocks / DOC_IDS_FILE).write_text(json.dumps({**scheme, "doc_order": "prior"}))
+    with pytest.raises(ValueError, match="prior-ranked"):
+        ScoreBounds.check_doc_ids(str(blocks), index)
+
+
+@pytest.mark.parametrize("method", ["tfidf", "bm25"])
+def test_vectorized_matches_exhaustive(index, method):
+    pytest.importorskip("numpy")
+    from search_engine.vectorized import VectorScorer
+
+    scorer = VectorScorer(index, method)
+    evaluator = TopKEvaluator(index, method)
+    batch = queries(index, 20)
+    for terms, batched in zip(batch, scorer.search_batch(batch, 10)):
+        expected = evaluator.search(terms, 10, "exhaustive")
+        for got in (scorer.search(terms, 10), batched):
+            # float32 scores
+            assert [s for _, s in got] == pytest.approx([s for _, s in expected], rel=1e-5)
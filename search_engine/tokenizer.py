@@ -0,0 +1,136 @@
+"""
+The one tokenizer of the project: Indexer/inverted_index.py indexes with it, and the
+Python query path (search_engine) and the backend's tokenizer worker
+(backend/utils/tokenizerWorker.py) tokenize queries with it, so query terms match
+indexed terms.
+
+Tokens are NER-aware (spaCy en_core_web_sm): PERSON/ORG/GPE entities are kept as
+whole phrases and also as their words, other words lose stop words and long numbers
+and are Porter-stemmed when the index was built with stemming (the indexer's
+--use-stemming, recorded as "stemming" in the index stats / meta.json).
+Without spaCy, stem_query falls back to a plain split (+ Porter stem).
+The model is loaded once per process.
+"""
+
+import re
+
+from nltk.stem import PorterStemmer
+
+_stemmer = PorterStemmer()
+_NON_ALNUM = re.compile(r"[^A-Za-z0-9]+")
+_nlp = None
+
+ENTITY_LABELS = {"PERSON", "ORG", "GPE"}
+LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
+def load_model(required=False):
+    """The spaCy pipeline, or False when spaCy or its model is missing (raised when required)."""
+    global _nlp
+    if _nlp is None:
+        try:
+            import spacy
+            _nlp = spacy.load("en_core_web_sm")
+        except (ImportError, OSError):
+            _nlp = False
+    if required and not _nlp:
+        raise RuntimeError("spaCy with the en_core_web_sm model is required "
+                           "(pip install spacy && python -m spacy download en_core_web_sm)")
+    return _nlp
+
+
+def normalize(text):
+    return _NON_ALNUM.sub(" ", text).lower()
+
+
+def clean_text(text):
+    """Lowercase and remove non-alphanumeric characters except spaces."""
+    if text is None:
+        return ""
+    return re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
+
+
+# --- INDEX TOKENS ---
+
+def doc_positional_tokens(doc, use_stemming=True):
+    """
+    (token, spaCy token index) pairs of a parsed doc. A full entity takes the position of its
+    first word and each entity word its own position, so gaps left by stop words and
+    punctuation are kept for phrase/proximity matching.
+    """
+    tokens = []
+    entity_words = set()  # Track words that are part of entities
+
+    # 1. Extract named entities and their components
+    for ent in doc.ents:
+        if ent.label_ in ENTITY_LABELS:
+            full_entity = ent.text.strip().lower()
+            tokens.append((full_entity, ent.start))
+            for offset, word in enumerate(full_entity.split()):
+                clean_word = re.sub(r'[^a-zA-Z0-9]', '', word)
+                if len(clean_word) > 1:  # Skip single characters
+                    tokens.append((clean_word, ent.start + offset))
+                    entity_words.add(clean_word)
+
+    # 2. Extract remaining tokens (skip ones already processed as entity components)
+    for token in doc:
+        clean_word = re.sub(r'[^a-zA-Z0-9]', '', token.text.strip().lower())
+        if (not clean_word or clean_word in entity_words or
+                token.is_punct or token.is_space or token.is_stop):
+            continue
+        if clean_word.isdigit() and len(clean_word) > 4:
+            continue  # remove junky numeric tokens
+        tokens.append((_stemmer.stem(clean_word) if use_stemming else clean_word, token.i))
+
+    return tokens
+
+
+def extract_positional_tokens(text, use_stemming=True):
+    """Positional tokens of one cleaned line of text (see doc_positional_tokens)."""
+    if not text:
+        return []
+    return doc_positional_tokens(load_model(required=True)(text), use_stemming)
+
+
+def extract_meaningful_tokens(text, use_stemming=True):
+    """
+    Tokens of one cleaned line of text with dual entity indexing:
+    - named entities (PERSON, ORG, GPE) as complete phrases, and also their words
+    - Porter stemming (with use_stemming) of the remaining non-entity words
+    - long numbers (e.g. '00000') dropped, short ones (e.g. '2021') kept
+    """
+    return [term for term, _ in extract_positional_tokens(text, use_stemming)]
+
+
+def extract_file_positional_tokens(text, use_stemming=True):
+    """
+    Positional tokens of a whole file, tokenized line by line like the default (non-positional)
+    indexer path reads it, so both modes give the same tokens and doc_len. Positions run across
+    the file: each line's are offset by the spaCy token count of the lines before it.
+    """
+    nlp = load_model(required=True)
+    tokens = []
+    offset = 0
+    for line in LINE_BREAK.split(text or ""):
+        cleaned = clean_text(line)
+        if not cleaned:
+            continue
+        doc = nlp(cleaned)
+        tokens.extend((term, offset + pos) for term, pos in doc_positional_tokens(doc, use_stemming))
+        offset += len(doc)
+    return tokens
+
+
+# --- QUERY TOKENS ---
+
+def stem_query(text, positions=False, use_stemming=True):
+    """
+    Query terms, tokenized like the index was built (pass its "stemming" setting);
+    with positions, (term, token offset) pairs for phrase matching.
+    """
+    if load_model():
+        tokens = extract_positional_tokens(clean_text(text), use_stemming)
+    else:
+        tokens = [(_stemmer.stem(token) if use_stemming else token, i)
+                  for i, token in enumerate(normalize(text).split())]
+    return tokens if positions else [token for token, _ in tokens]
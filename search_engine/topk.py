@@ -0,0 +1,419 @@
+"""
+Safe top-k evaluation of disjunctive (OR) queries with score upper bounds.
+
+- exhaustive: scores every posting (the reference, same as getDocuments)
+- wand:       WAND pivoting on per-term max contributions
+- bmw:        Block-Max WAND, additionally checking per-block maxima
+- maxscore:   MaxScore, splitting terms into essential / non-essential lists
+
+All of them return the exhaustive top-k up to float rounding, and differ in how
+many postings they score. They add a document's contributions in different
+orders, so its score can differ in the last bits, and documents with tied scores
+can swap places (exact ties are broken by lower doc id). A static prior (Scorer.prior)
+is added to every score; Scorer.prior_bound keeps the skipping safe, and on an
+index in prior order it shrinks as the doc ids grow, so later documents are
+skipped sooner.
+
+Conjunctive (AND) queries use algorithm "and": document-at-a-time over the
+intersection only. The shortest list leads, the others are probed with
+galloping seeks, and the block index (block_last / block_max) serves as skip
+pointers past blocks that cannot reach the k-th score. A query word may be an
+OR group (a list of terms, e.g. the word and its spelling expansions): its
+cursor walks the union of their lists.
+"""
+
+import os, csv, glob, json, heapq, zlib
+from array import array
+from bisect import bisect_left
+
+from .positional import gallop
+from .scoring import Scorer, K1, B
+
+# Bounds are computed in Spark doubles; pad them so rounding can never make a bound unsafe
+BOUND_SLACK = 1e-9
+
+# Doc id scheme of the block boundaries, written by inverted_index.py --score-bounds into
+# <output>_blocks: {"doc_order": "filename", "N": ..., "checksum": doc_ids_checksum(...)}
+DOC_IDS_FILE = "_doc_ids.json"
+CHECKSUM_MOD = (1 << 31) - 1
+
+
+def doc_ids_checksum(filenames):
+    """Sum of crc32(filename) * (doc id + 1) mod 2^31 - 1 over filenames in doc id order."""
+    return sum(zlib.crc32(name.encode("utf-8")) * (doc + 1) % CHECKSUM_MOD
+               for doc, name in enumerate(filenames)) % CHECKSUM_MOD
+
+
+# --- SCORE BOUNDS ---
+
+class TermBounds:
+    __slots__ = ("max_score", "block_last", "block_max")
+
+    def __init__(self, max_score, block_last, block_max):
+        self.max_score = max_score
+        self.block_last = block_last      # last doc id of each block
+        self.block_max = block_max        # max contribution within each block
+
+    def block_for(self, doc):
+        """Index of the block that would hold doc (or len(block_last) if past the end)."""
+        return bisect_left(self.block_last, doc)
+
+
+class ScoreBounds:
+    """term -> TermBounds for one ranking method."""
+
+    def __init__(self, method, terms):
+        self.method = method
+        self.terms = terms
+
+    def get(self, term):
+        return self.terms.get(term)
+
+    @staticmethod
+    def for_postings(postings, scorer, block_size=128):
+        idf = scorer.idf(postings.df)
+        block_last, block_max = array("i"), array("d")
+        for start in range(0, len(postings), block_size):
+            end = min(start + block_size, len(postings))
+            block_last.append(postings.doc_ids[end - 1])
+            block_max.append(max(scorer.score(postings.tfs[i], postings.doc_ids[i], idf)
+                                 for i in range(start, end)))
+        return TermBounds(max(block_max), block_last, block_max)
+
+    @classmethod
+    def compute(cls, index, method="bm25", block_size=128, k1=K1, b=B):
+        """Derive bounds from the loaded index (when the indexer ran without --score-bounds)."""
+        scorer = Scorer(index, method, k1, b)
+        return cls(method, {term: cls.for_postings(p, scorer, block_size)
+                            for term, p in index.postings.items() if len(p)})
+
+    @staticmethod
+    def check_doc_ids(blocks_path, index):
+        """Raise ValueError unless the blocks were built over the doc ids of index."""
+        directory = os.path.dirname(blocks_path) if blocks_path.endswith(".csv") else blocks_path
+        path = os.path.join(directory, DOC_IDS_FILE)
+        if not os.path.exists(path):
+            raise ValueError(f"{blocks_path} records no doc id scheme ({DOC_IDS_FILE}); "
+                             f"rebuild it with inverted_index.py --score-bounds")
+        with open(path, "r", encoding="utf-8") as f:
+            scheme = json.load(f)
+        doc_order = getattr(index, "doc_order", "filename")
+        if scheme.get("doc_order") != doc_order:
+            raise ValueError(f"Bounds are per {scheme.get('doc_order')}-ranked doc id; the index is in {doc_order} order")
+        if scheme.get("N") != index.N or scheme.get("checksum") != doc_ids_checksum(index.filenames):
+            raise ValueError(f"Bounds at {blocks_path} were built over other documents than the index")
+
+    @classmethod
+    def from_csv(cls, blocks_path, method="bm25"):
+        """
+        Load <output>_blocks written by inverted_index.py --score-bounds (parts glob or directory).
+        Check them against the index they will serve with check_doc_ids first.
+        """
+        files = sorted(glob.glob(blocks_path if blocks_path.endswith(".csv") else f"{blocks_path}/*.csv"))
+        if not files:
+            raise FileNotFoundError(f"No block files found at {blocks_path}")
+        rows = {}
+        for path in files:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    rows.setdefault(row["term"], []).append(
+                        (int(row["block"]), int(row["last_doc"]), float(row[f"max_{method}"])))
+        terms = {}
+        for term, blocks in rows.items():
+            blocks.sort()
+            block_max = array("d", (b[2] * (1 + BOUND_SLACK) + BOUND_SLACK for b in blocks))
+            terms[term] = TermBounds(max(block_max), array("i", (b[1] for b in blocks)), block_max)
+        return cls(method, terms)
+
+
+# --- CURSORS ---
+
+class Cursor:
+    """Iterator over one term's postings that scores lazily and can skip with galloping search."""
+
+    __slots__ = ("postings", "bounds", "idf", "scorer", "i", "doc", "stats")
+
+    END = float("inf")
+
+    def __init__(self, postings, bounds, scorer, stats):
+        self.postings = postings
+        self.bounds = bounds
+        self.idf = scorer.idf(postings.df)
+        self.scorer = scorer
+        self.stats = stats
+        self.i = 0
+        self.doc = postings.doc_ids[0] if len(postings) else Cursor.END
+
+    @property
+    def max_score(self):
+        return self.bounds.max_score
+
+    def __len__(self):
+        return len(self.postings)
+
+    def at(self, doc):
+        """The cursors positioned on doc (this one or none)."""
+        return (self,) if self.doc == doc else ()
+
+    def score(self):
+        self.stats["postings_scored"] += 1
+        return self.scorer.score(self.postings.tfs[self.i], self.doc, self.idf)
+
+    def next(self):
+        self.i += 1
+        self._settle()
+
+    def seek(self, target):
+        """Advance to the first doc >= target."""
+        if self.doc >= target:
+            return
+        self.i = gallop(self.postings.doc_ids, target, self.i)
+        self._settle()
+
+    def block_max(self, doc):
+        b = self.bounds.block_for(doc)
+        return self.bounds.block_max[b] if b < len(self.bounds.block_max) else 0.0
+
+    def block_last(self, doc):
+        b = self.bounds.block_for(doc)
+        return self.bounds.block_last[b] if b < len(self.bounds.block_last) else Cursor.END
+
+    def _settle(self):
+        self.doc = self.postings.doc_ids[self.i] if self.i < len(self.postings) else Cursor.END
+
+
+class UnionCursor:
+    """Cursor over the union of an OR group's lists (a doc in several of them is in each one's at())."""
+
+    __slots__ = ("cursors", "doc")
+
+    def __init__(self, cursors):
+        self.cursors = cursors
+        self._settle()
+
+    def __len__(self):
+        return sum(len(c) for c in self.cursors)
+
+    def at(self, doc):
+        return tuple(c for c in self.cursors if c.doc == doc)
+
+    def next(self):
+        for c in self.cursors:
+            if c.doc == self.doc:
+                c.next()
+        self._settle()
+
+    def seek(self, target):
+        for c in self.cursors:
+            c.seek(target)
+        self._settle()
+
+    def block_max(self, doc):
+        return sum(c.block_max(doc) for c in self.cursors)
+
+    def block_last(self, doc):
+        # up to the first block end, every list stays in its current block
+        return min(c.block_last(doc) for c in self.cursors)
+
+    def _settle(self):
+        self.doc = min(c.doc for c in self.cursors)
+
+
+class TopK:
+    """Min-heap of the k best (score, doc); ties prefer the lower doc id."""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    @property
+    def threshold(self):
+        return self.heap[0][0] if len(self.heap) == self.k else float("-inf")
+
+    def push(self, doc, score):
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (score, -doc))
+        elif score > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (score, -doc))
+
+    def results(self):
+        return [(-neg_doc, score) for score, neg_doc in sorted(self.heap, key=lambda e: (-e[0], -e[1]))]
+
+
+# --- EVALUATOR ---
+
+class TopKEvaluator:
+    def __init__(self, index, method="bm25", bounds=None, block_size=128, k1=K1, b=B, prior_weight=0.0):
+        self.index = index
+        self.scorer = Scorer(index, method, k1, b, prior_weight)
+        self.block_size = block_size
+        # precomputed bounds (--score-bounds) assume the default k1/b
+        self.bounds = bounds or ScoreBounds.compute(index, method, block_size, k1, b)
+        if self.bounds.method != method:
+            raise ValueError(f"Bounds were built for {self.bounds.method}, not {method}")
+
+    def search(self, terms, k=50, algorithm="bmw", stats=None):
+        """
+        Top-k [(doc, score)] for the union of terms (with "and", their intersection), best first.
+        With "and", a term may be a list of terms: a document needs one of them (an OR group).
+        stats (optional dict) gets this call's postings_total / postings_scored.
+        """
+        algorithms = {"exhaustive": self._exhaustive, "wand": self._wand,
+                      "bmw": self._block_max_wand, "maxscore": self._maxscore, "and": self._conjunctive}
+        if algorithm not in algorithms:
+            raise ValueError(f"Unknown top-k algorithm: {algorithm}")
+
+        groups = [tuple(dict.fromkeys(t)) if isinstance(t, list) else (t,) for t in terms]
+        if algorithm != "and":
+            groups = [(t,) for group in groups for t in group]
+        groups = [[p for p in map(self.index.get, group) if p is not None and len(p)] for group in dict.fromkeys(groups)]
+        if algorithm == "and" and not all(groups):
+            groups = []         # a word no document holds: nothing matches all of them
+        groups = [group for group in groups if group]
+        stats = {} if stats is None else stats
+        stats.update(postings_total=sum(len(p) for group in groups for p in group), postings_scored=0)
+        cursors = []
+        for group in groups:
+            members = [Cursor(p, self._term_bounds(p), self.scorer, stats) for p in group]
+            cursors.append(members[0] if len(members) == 1 else UnionCursor(members))
+        top = TopK(k)
+        if cursors:
+            algorithms[algorithm](cursors, top)
+        return top.results()
+
+    def _term_bounds(self, postings):
+        bounds = self.bounds.get(postings.term)
+        if bounds is None:
+            # Term missing from the bounds artifact (e.g. indexed later): derive it now
+            bounds = self.bounds.terms[postings.term] = ScoreBounds.for_postings(postings, self.scorer, self.block_size)
+        return bounds
+
+    def _exhaustive(self, cursors, top):
+        scores = {}
+        for c in cursors:
+            while c.doc != Cursor.END:
+                scores[c.doc] = scores.get(c.doc, 0.0) + c.score()
+                c.next()
+        for doc in sorted(scores):
+            top.push(doc, scores[doc] + self.scorer.prior(doc))
+
+    def _score_pivot(self, cursors, doc, top):
+        score = 0.0
+        for c in cursors:
+            if c.doc == doc:
+                score += c.score()
+                c.next()
+        top.push(doc, score + self.scorer.prior(doc))
+
+    def _find_pivot(self, cursors, threshold):
+        acc = 0.0
+        for p, c in enumerate(cursors):
+            if c.doc == Cursor.END:
+                return None
+            acc += c.max_score
+            # docs from c.doc on can hold at most the terms of cursors[:p + 1]
+            if acc + self.scorer.prior_bound(c.doc) > threshold:
+                return p
+        return None
+
+    def _wand(self, cursors, top):
+        while True:
+            cursors.sort(key=lambda c: c.doc)
+            p = self._find_pivot(cursors, top.threshold)
+            if p is None:
+                return
+            pivot = cursors[p].doc
+            if cursors[0].doc == pivot:
+                self._score_pivot(cursors, pivot, top)
+            else:
+                for c in cursors[:p]:
+                    c.seek(pivot)
+
+    def _block_max_wand(self, cursors, top):
+        while True:
+            cursors.sort(key=lambda c: c.doc)
+            threshold = top.threshold
+            p = self._find_pivot(cursors, threshold)
+            if p is None:
+                return
+            pivot = cursors[p].doc
+            # Include every list sitting on the pivot doc, not just up to p
+            while p + 1 < len(cursors) and cursors[p + 1].doc == pivot:
+                p += 1
+
+            if sum(c.block_max(pivot) for c in cursors[:p + 1]) + self.scorer.prior_bound(pivot) > threshold:
+                if cursors[0].doc == pivot:
+                    self._score_pivot(cursors, pivot, top)
+                else:
+                    for c in cursors[:p]:
+                        c.seek(pivot)
+                continue
+
+            # No doc before the end of the shallowest current block can make it: jump past it
+            target = min(c.block_last(pivot) for c in cursors[:p + 1]) + 1
+            if p + 1 < len(cursors):
+                target = min(target, cursors[p + 1].doc)
+            target = max(target, pivot + 1)
+            for c in cursors[:p + 1]:
+                c.seek(target)
+
+    def _maxscore(self, cursors, top):
+        cursors.sort(key=lambda c: c.max_score)
+        prefix, acc = [], 0.0
+        for c in cursors:
+            acc += c.max_score
+            prefix.append(acc)
+
+        next_doc = 0
+        while True:
+            threshold = top.threshold
+            # cursors[:first_essential] cannot reach the threshold on their own (prior included)
+            prior_bound = self.scorer.prior_bound(next_doc)
+            first_essential = 0
+            while first_essential < len(cursors) and prefix[first_essential] + prior_bound <= threshold:
+                first_essential += 1
+            essential = cursors[first_essential:]
+            if not essential:
+                return
+            doc = min(c.doc for c in essential)
+            if doc == Cursor.END:
+                return
+
+            score, prior = 0.0, self.scorer.prior(doc)
+            for c in essential:
+                if c.doc == doc:
+                    score += c.score()
+                    c.next()
+            # Non-essential lists, strongest first, while the doc can still make it
+            for j in range(first_essential - 1, -1, -1):
+                if score + prefix[j] + prior <= threshold:
+                    break
+                c = cursors[j]
+                c.seek(doc)
+                if c.doc == doc:
+                    score += c.score()
+            top.push(doc, score + prior)
+            next_doc = doc + 1
+
+    def _conjunctive(self, cursors, top):
+        # The shortest list drives: the others are only probed at its docs (or past them)
+        cursors.sort(key=len)
+        lead, others = cursors[0], cursors[1:]
+        while lead.doc != Cursor.END:
+            doc, threshold = lead.doc, top.threshold
+            if threshold != float("-inf") and \
+                    sum(c.block_max(doc) for c in cursors) + self.scorer.prior_bound(doc) <= threshold:
+                # No doc before the end of the shallowest current block can make it: jump past it
+                lead.seek(min(c.block_last(doc) for c in cursors) + 1)
+                continue
+            for c in others:
+                c.seek(doc)
+                if c.doc != doc:
+                    # c has nothing from doc to c.doc: resume the lead there
+                    lead.seek(c.doc)
+                    break
+            else:
+                # a term in several OR groups (a shared expansion) is scored once
+                held = {c.postings.term: c for group in cursors for c in group.at(doc)}
+                top.push(doc, sum(c.score() for c in held.values()) + self.scorer.prior(doc))
+                lead.next()
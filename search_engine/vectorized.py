@@ -0,0 +1,122 @@
+"""
+NumPy scoring: each term's postings become an int32 doc id array and a float32
+array of its per-posting BM25/TF-IDF contribution, scores are scatter-added into
+a dense per-document array, and the top-k is selected with a partition instead
+of sorting every candidate.
+
+Doc ids are unique within one postings list, so `scores[ids] += weights` is an
+exact scatter-add (no np.add.at needed). Batches accumulate several queries into
+the rows of one 2-D array, reading each shared term's postings once.
+Requires numpy.
+"""
+
+import numpy as np
+
+from .scoring import Scorer, K1, B
+
+
+def as_int32(values):
+    """Zero-copy int32 view of an array('i') / memoryview (MmapIndex) postings column."""
+    return np.frombuffer(values, dtype=np.int32) if len(values) else np.empty(0, dtype=np.int32)
+
+
+def top_k(scores, candidates, k):
+    """(doc ids, scores) of the k best candidates, best first, ties broken by lower doc id."""
+    cand_scores = scores[candidates]
+    if len(candidates) > k:
+        # np.partition finds the k-th score; ties on it are resolved by doc id (candidates are ascending)
+        kth = -np.partition(-cand_scores, k - 1)[k - 1]
+        above = np.flatnonzero(cand_scores > kth)
+        tied = np.flatnonzero(cand_scores == kth)[:k - len(above)]
+        keep = np.concatenate([above, tied])
+        candidates, cand_scores = candidates[keep], cand_scores[keep]
+    order = np.lexsort((candidates, -cand_scores))
+    return candidates[order], cand_scores[order]
+
+
+class VectorScorer:
+    def __init__(self, index, method="tfidf", k1=K1, b=B, cache_terms=4096, prior_weight=0.0):
+        self.index = index
+        self.scorer = Scorer(index, method, k1, b, prior_weight)
+        self.method = method
+        # Weighted static priors, added to every score row (None without priors)
+        self.prior = None
+        if self.scorer.priors is not None:
+            self.prior = np.frombuffer(self.scorer.priors, dtype=np.float32) * np.float32(self.scorer.prior_weight)
+        doc_lens = np.asarray(as_int32(index.doc_lens), dtype=np.float32)
+        # Per-document part of the BM25 denominator, computed once for the whole index
+        self.norm = (k1 * (1 - b + b * doc_lens / index.collection_avgdl)).astype(np.float32) if index.N else doc_lens
+        self.k1 = k1
+        self.cache_terms = cache_terms
+        self.weights = {}
+
+    def term_weights(self, term):
+        """(doc ids int32, contributions float32) of one term, or None if it is not indexed."""
+        cached = self.weights.get(term)
+        if cached is not None:
+            return cached
+        postings = self.index.get(term)
+        if postings is None or not len(postings):
+            return None
+        ids = as_int32(postings.doc_ids)
+        tfs = as_int32(postings.tfs).astype(np.float32)
+        idf = np.float32(self.scorer.idf(postings.df))
+        if self.method == "bm25":
+            weights = idf * tfs * np.float32(self.k1 + 1) / (tfs + self.norm[ids])
+        else:
+            weights = tfs * idf
+        if len(self.weights) >= self.cache_terms:
+            self.weights.pop(next(iter(self.weights)))
+        self.weights[term] = (ids, weights)
+        return ids, weights
+
+    def search(self, terms, k=50, stats=None):
+        """Top-k [(doc, score)] for the union of terms, best first; stats (optional dict) gets postings_scored."""
+        lists = [w for w in map(self.term_weights, dict.fromkeys(terms)) if w is not None]
+        if stats is not None:
+            stats["postings_scored"] = sum(len(ids) for ids, _ in lists)
+        if not lists:
+            return []
+        scores = np.zeros(self.index.N, dtype=np.float32)
+        touched = np.zeros(self.index.N, dtype=bool)
+        for ids, weights in lists:
+            scores[ids] += weights
+            touched[ids] = True
+        if self.prior is not None:
+            scores += self.prior
+        docs, best = top_k(scores, np.flatnonzero(touched), k)
+        return list(zip(docs.tolist(), best.tolist()))
+
+    def search_batch(self, queries, k=50, max_bytes=256 << 20):
+        """
+        Top-k for many queries at once. Each term's weights are fetched once per batch, and up to
+        max_bytes of score rows are accumulated and ranked together.
+        """
+        rows_per_pass = max(1, max_bytes // max(1, self.index.N * 5))  # float32 score + bool touched
+        results = []
+        for start in range(0, len(queries), rows_per_pass):
+            chunk = [list(dict.fromkeys(q)) for q in queries[start:start + rows_per_pass]]
+            scores = np.zeros((len(chunk), self.index.N), dtype=np.float32)
+            touched = np.zeros((len(chunk), self.index.N), dtype=bool)
+            rows_by_term = {}
+            for row, terms in enumerate(chunk):
+                for term in terms:
+                    rows_by_term.setdefault(term, []).append(row)
+            for term, rows in rows_by_term.items():
+                entry = self.term_weights(term)
+                if entry is None:
+                    continue
+                ids, weights = entry
+                for row in rows:
+                    scores[row, ids] += weights
+                    touched[row, ids] = True
+            if self.prior is not None:
+                scores += self.prior
+            for row in range(len(chunk)):
+                candidates = np.flatnonzero(touched[row])
+                if not len(candidates):
+                    results.append([])
+                    continue
+                docs, best = top_k(scores[row], candidates, k)
+                results.append(list(zip(docs.tolist(), best.tolist())))
+        return results